@@ -0,0 +1,187 @@
+import asyncio
+import os
+import serial  # install this module using command in the terminal "pip install pyserial"
+import pynmea2
+import nmea_fast
+from nmea_stream import NMEAFramer, READ_CHUNK_SIZE
+
+QUEUE_SIZE = 64  # Decoded messages kept per device before the oldest are dropped
+POLL_INTERVAL = 0.01  # Seconds between reads of sources that have no file descriptor
+
+
+class GPSDevice:
+    def __init__(self, name, source, queue_size):
+        """
+        Per-receiver state: the open port, its framer and the queue its consumer reads from.
+        """
+        self.name = name
+        self.source = source
+        self.framer = NMEAFramer()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.fd = None
+        self.sentences = 0
+        self.parse_errors = 0
+        self.dropped = 0
+        self.is_open = True
+
+
+class AsyncGPSManager:
+    def __init__(self, queue_size=QUEUE_SIZE, decode=nmea_fast.parse):
+        """
+        Read many GPS receivers from one asyncio event loop.
+        Ports with a file descriptor (serial ports, ptys) are watched with loop.add_reader, so an
+        idle receiver costs nothing; sources without one (e.g. nmea_replay.ReplaySource) are polled.
+        """
+        self.queue_size = queue_size
+        self.decode = decode
+        self.devices = {}
+        self._tasks = []
+        self._loop = None
+
+    def add_port(self, name, serial_port, baud_rate=9600):
+        """
+        Open a serial port (or pty) by name and register it as device name.
+        """
+        try:
+            gps_serial = serial.Serial(serial_port, baud_rate, timeout=0)
+        except serial.SerialException as e:
+            print(f"Error connecting to GPS {name} on {serial_port}: {e}")
+            return None
+        return self.add_source(name, gps_serial)
+
+    def add_source(self, name, source):
+        """
+        Register an already open serial-like source as device name.
+        """
+        device = GPSDevice(name, source, self.queue_size)
+        self.devices[name] = device
+        if self._loop is not None:
+            self._watch(device)
+        return device
+
+    async def start(self):
+        """
+        Start reading every registered device.
+        """
+        self._loop = asyncio.get_running_loop()
+        for device in self.devices.values():
+            self._watch(device)
+
+    def _watch(self, device):
+        try:
+            fd = device.source.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None
+        if fd is not None:
+            device.fd = fd
+            self._loop.add_reader(fd, self._on_readable, device)
+        else:
+            device.source.timeout = 0
+            self._tasks.append(self._loop.create_task(self._poll(device)))
+
+    def _on_readable(self, device):
+        try:
+            data = os.read(device.fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"Serial error on {device.name}: {e}")
+            self._close_device(device)
+            return
+        if not data:
+            self._close_device(device)
+            return
+        self._handle(device, data)
+
+    async def _poll(self, device):
+        source = device.source
+        while device.is_open and source.is_open:
+            data = source.read(READ_CHUNK_SIZE)
+            if data:
+                self._handle(device, data)
+                # An unpaced source always has data: let the consumers and other devices run
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+        self._close_device(device)
+
+    def _handle(self, device, data):
+        """
+        Frame and decode one chunk of a device's stream and queue the results.
+        When the consumer falls behind, the oldest messages are dropped rather than blocking the loop.
+        """
+        queue = device.queue
+        for frame in device.framer.feed(data):
+            try:
+                msg = self.decode(frame)
+            except pynmea2.ParseError:
+                device.parse_errors += 1
+                continue
+            device.sentences += 1
+            if queue.full():
+                queue.get_nowait()
+                device.dropped += 1
+            queue.put_nowait(msg)
+
+    def _close_device(self, device):
+        if not device.is_open:
+            return
+        device.is_open = False
+        if device.fd is not None:
+            self._loop.remove_reader(device.fd)
+        if device.source.is_open:
+            device.source.close()
+        # Wake the consumer up; None marks the end of the stream
+        if device.queue.full():
+            device.queue.get_nowait()
+        device.queue.put_nowait(None)
+
+    async def messages(self, name):
+        """
+        Yield the decoded messages of one device as they arrive, until the device closes.
+        """
+        device = self.devices[name]
+        while device.is_open or not device.queue.empty():
+            msg = await device.queue.get()
+            if msg is None:
+                break
+            yield msg
+
+    async def close(self):
+        """
+        Stop reading and close every device.
+        """
+        for device in self.devices.values():
+            self._close_device(device)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def print_positions(manager, name):
+    async for msg in manager.messages(name):
+        if msg.sentence_type == "RMC":
+            print(f"{name}: {msg.timestamp} {msg.latitude} {msg.longitude} {msg.spd_over_grnd}")
+
+
+async def main(serial_ports, baud_rate):
+    manager = AsyncGPSManager()
+    for name, serial_port in serial_ports.items():
+        manager.add_port(name, serial_port, baud_rate)
+    await manager.start()
+    try:
+        await asyncio.gather(*(print_positions(manager, name) for name in manager.devices))
+    finally:
+        await manager.close()
+
+
+if __name__ == "__main__":
+    # Replace with the serial ports of your GPS modules
+    SERIAL_PORTS = {"gps1": "/dev/ttyUSB0", "gps2": "/dev/ttyUSB1"}
+    BAUD_RATE = 9600  # Default baud rate for many GPS modules
+
+    try:
+        asyncio.run(main(SERIAL_PORTS, BAUD_RATE))
+    except KeyboardInterrupt:
+        print("\nExiting...")
@@ -0,0 +1,411 @@
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+import pynmea2
+import serial  # install this module using command in the terminal "pip install pyserial"
+import nmea_fast
+from nmea_stream import read_frames
+from nmea_synth import SyntheticNMEA, SENTENCE_MIX
+from gps_epoch import EpochAssembler
+from gps_time import GPSClock
+from gps_sinks import ConsoleSink
+
+BAUD_RATES = (9600, 38400, 115200, 460800, 921600)
+MEMORY_SAMPLE = 2000  # Sentences traced with tracemalloc per decode path (tracing is slow)
+LATENCY_GRACE = 1.0  # Seconds the latency test waits for the last sentences after the writer stops
+
+
+def _main_module():
+    import main
+    return main
+
+
+def _null_stream():
+    return open(os.devnull, 'w')
+
+
+# Decode paths: name -> factory returning a function that takes one line (str)
+def _pynmea2():
+    return pynmea2.parse
+
+
+def _nmea_fast():
+    return nmea_fast.parse
+
+
+def _gps_reader_pynmea2():
+    from gps_reader import GPSReader
+    reader = GPSReader(use_fast_decoder=False)
+    return reader.parse_gps_data
+
+
+def _gps_reader():
+    from gps_reader import GPSReader
+    reader = GPSReader()
+    return reader.parse_gps_data
+
+
+def _main_no_sinks():
+    main = _main_module()
+    main.sinks[:] = []
+    return main.parse_gps_data
+
+
+def _main_console():
+    # Console output is formatted as usual but written to os.devnull
+    main = _main_module()
+    main.sinks[:] = [ConsoleSink(main.clock, main.sky_view, _null_stream())]
+    return main.parse_gps_data
+
+
+def _parse_and_display():
+    from gps_class_code import GPSReader
+    reader = GPSReader("bench", 9600, sinks=[ConsoleSink(target=_null_stream())])
+    return reader.parse_and_display
+
+
+DECODE_PATHS = {
+    'pynmea2.parse': _pynmea2,
+    'nmea_fast.parse': _nmea_fast,
+    'GPSReader.parse_gps_data (pynmea2)': _gps_reader_pynmea2,
+    'GPSReader.parse_gps_data': _gps_reader,
+    'main.parse_gps_data (no sinks)': _main_no_sinks,
+    'main.parse_gps_data (console)': _main_console,
+    'GPSReader.parse_and_display': _parse_and_display,
+}
+
+
+def _call_all(decode, lines):
+    # Bad checksums raise ParseError in some paths and are reported in others; both count as processed
+    for line in lines:
+        try:
+            decode(line)
+        except pynmea2.ParseError:
+            pass
+
+
+def bench_decode(name, factory, lines, repeat=5):
+    """
+    Time one decode path over lines (best of repeat runs) and trace its memory on a sample.
+    Anything the path prints (e.g. parse errors) goes to os.devnull.
+    """
+    with _null_stream() as null, contextlib.redirect_stdout(null):
+        return _bench_decode(name, factory, lines, repeat)
+
+
+def _bench_decode(name, factory, lines, repeat):
+    decode = factory()
+    _call_all(decode, lines[:100])  # warm up caches and imports
+    best = None
+    for _ in range(repeat):
+        decode = factory()
+        gc.collect()
+        start = time.perf_counter_ns()
+        _call_all(decode, lines)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Memory: peak bytes allocated while handling one sentence, and blocks still held afterwards.
+    # CPython has no allocation counter, so these stand in for "allocations per sentence".
+    decode = factory()
+    sample = lines[:MEMORY_SAMPLE]
+    gc.collect()
+    tracemalloc.start()
+    peak_total = 0
+    blocks_before = sys.getallocatedblocks()
+    for line in sample:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _call_all(decode, (line,))
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+
+    count = len(lines)
+    return {
+        'name': name,
+        'sentences': count,
+        'seconds': best / 1e9,
+        'sentences_per_sec': count * 1e9 / best,
+        'ns_per_sentence': best / count,
+        'peak_bytes_per_sentence': peak_total / len(sample),
+        'retained_blocks_per_sentence': (blocks_after - blocks_before) / len(sample),
+    }
+
+
+def bench_batch(data, count, repeat=5):
+    """
+    Time nmea_batch.load_nmea over the same stream (only when numpy is installed).
+    """
+    try:
+        import nmea_batch
+    except ImportError:
+        return None
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        nmea_batch.load_nmea(data)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'name': 'nmea_batch.load_nmea', 'sentences': count, 'seconds': best / 1e9,
+            'sentences_per_sec': count * 1e9 / best, 'ns_per_sentence': best / count}
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def bench_latency(lines, baud_rate, seconds=2.0):
+    """
+    End-to-end latency over a local pty: a writer thread sends one sentence at a time, paced as
+    the serial line would deliver it at baud_rate (10 bits per byte), and the reader measures the
+    time from the write to the decoded message through read_frames() and nmea_fast.parse.
+    Transmission time itself is not included. Linux/macOS only.
+    Reading ends once everything sent has arrived, or LATENCY_GRACE seconds after the writer
+    stops; sentences that never arrived are reported as lost.
+    """
+    import pty
+    import tty
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    gps_serial = serial.Serial(os.ttyname(slave), baud_rate, timeout=0.5)
+    sent = {}  # frame -> send times not yet matched (GSA and other sentences without a time repeat)
+    sent_count = 0
+    latencies = []
+    stop = threading.Event()
+    end = time.perf_counter() + seconds + LATENCY_GRACE
+
+    def write():
+        nonlocal sent_count, end
+        deadline = time.perf_counter() + seconds
+        next_send = time.perf_counter()
+        for line in lines:
+            if time.perf_counter() > deadline or stop.is_set():
+                break
+            data = line.encode('ascii')
+            next_send += len(data) * 10 / baud_rate
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent.setdefault(data.rstrip(), []).append(time.perf_counter_ns())
+            sent_count += 1
+            os.write(master, data)
+        end = min(end, time.perf_counter() + LATENCY_GRACE)
+        stop.set()
+
+    def finished():
+        return time.perf_counter() > end or (stop.is_set() and len(latencies) >= sent_count)
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    try:
+        for frame in read_frames(gps_serial, idle=finished):
+            try:
+                nmea_fast.parse(frame)
+            except pynmea2.ParseError:
+                pass
+            now = time.perf_counter_ns()
+            times = sent.get(frame)
+            if times:
+                latencies.append((now - times.pop(0)) / 1000)
+            if finished():
+                break
+    finally:
+        stop.set()
+        writer.join()
+        gps_serial.close()
+        os.close(master)
+        os.close(slave)
+
+    lost = sent_count - len(latencies)
+    if not latencies:
+        return {'baud_rate': baud_rate, 'sentences': 0, 'lost': lost}
+    return {
+        'baud_rate': baud_rate,
+        'sentences': len(latencies),
+        'lost': lost,
+        'p50_us': _percentile(latencies, 0.5),
+        'p99_us': _percentile(latencies, 0.99),
+        'max_us': max(latencies),
+    }
+
+
+def _sentence(body):
+    return f"${body}*{nmea_fast.nmea_checksum(body.encode('ascii')):02X}"
+
+
+# Sentences the generator does not produce: empty and missing fields, other hemispheres and
+# talkers, odd time formats and malformed numbers
+EDGE_CASES = [_sentence(body) for body in (
+    "GPRMC,,V,,,,,,,,,,N",
+    "GPRMC,235959.999,A,0000.0001,S,17959.9999,W,0.00,359.99,311299,3.1,W,A",
+    "GNRMC,001500,A,5130.123,N,00007.456,W,,,010170",
+    "GPRMC,123519,A,4807.038,N,01131.000,E",
+    "GPGGA,,,,,,0,00,99.99,,,,,,",
+    "GNGGA,092750.000,5321.6802,N,00630.3372,W,2,8,1.03,61.7,M,55.2,M,,*",
+    "GPGGA,092750.000,53216802,N,00630.3372,W,1,08,1.03,61.7,M,55.2,M,,",
+    "GPGGA,092750.000,-321.6802,S,00630.3372,E,1,08,1.03,-61.7,M,55.2,M,1.5,0001",
+    "GLGLL,3723.2475,N,12158.3416,W,161229.487,A,A",
+    "GPGLL,3723.2475,N,12158.3416,W",
+    "GPGLL,,,,,,V,N",
+    "GNGSA,A,3,01,02,03,,,,,,,,,,2.5,1.3,2.1,1",
+    "GPGSA,A,1,,,,,,,,,,,,,,,",
+    "GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A",
+    "GPVTG,,T,,M,0.0,N,0.0,K,N",
+    "GLGSV,3,3,09,65,12,034,",
+    "GPGSV,1,1,00",
+)]
+
+
+def check_decoders(lines):
+    """
+    Decode every line with nmea_fast.parse and pynmea2.parse and compare the sentence type, the
+    talker and every attribute nmea_fast decodes: the value and its type, or the exception raised.
+    Both streams of decoded sentences also go through an EpochAssembler, which must not raise and
+    must build the same fixes.
+    Returns the differences as (line, attribute, nmea_fast result, pynmea2 result) tuples.
+    """
+    def outcome(call):
+        try:
+            value = call()
+        except Exception as e:
+            return 'raises', type(e).__name__
+        return type(value).__name__, value
+
+    fast_assembler = EpochAssembler(GPSClock("UTC"))
+    slow_assembler = EpochAssembler(GPSClock("UTC"))
+    differences = []
+    for line in lines:
+        fast = outcome(lambda: nmea_fast.parse(line.encode('ascii')))
+        slow = outcome(lambda: pynmea2.parse(line))
+        if fast[0] == 'raises' or slow[0] == 'raises':
+            if fast != slow:
+                differences.append((line, 'parse', fast, slow))
+            continue
+        fast_msg, slow_msg = fast[1], slow[1]
+        names = ('sentence_type', 'talker') + getattr(type(fast_msg), 'attributes', ())
+        for name in names:
+            fast = outcome(lambda: getattr(fast_msg, name))
+            slow = outcome(lambda: getattr(slow_msg, name))
+            if fast != slow:
+                differences.append((line, name, fast, slow))
+        fast = outcome(lambda: repr(fast_assembler.add(fast_msg)))
+        slow = outcome(lambda: repr(slow_assembler.add(slow_msg)))
+        if fast != slow or fast[0] == 'raises':
+            differences.append((line, 'EpochAssembler.add', fast, slow))
+    return differences
+
+
+def compare(results, baseline_path):
+    """
+    Print the change of each decode path against an earlier results file.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {r['name']: r for r in json.load(baseline_file)['results']}
+    print(f"\nCompared with {baseline_path} (ns per sentence, lower is better):")
+    for result in results['results']:
+        old = baseline.get(result['name'])
+        if old is None:
+            continue
+        change = (result['ns_per_sentence'] / old['ns_per_sentence'] - 1) * 100
+        print(f"  {result['name']:<40} {old['ns_per_sentence']:>10.0f} -> {result['ns_per_sentence']:>10.0f}"
+              f"  ({change:+.1f}%)")
+
+
+def run(settings, paths=None, repeat=5, bauds=BAUD_RATES, latency_seconds=2.0):
+    """
+    Run the benchmarks on a generated stream and return the results as a JSON-ready dict.
+    settings are passed to nmea_synth.SyntheticNMEA, plus 'epochs'.
+    """
+    settings = dict(settings)
+    epochs = settings.pop('epochs')
+    generator = SyntheticNMEA(**settings)
+    lines = [line.rstrip('\r\n') for line in generator.lines(epochs)]
+    results = []
+    for name in paths or DECODE_PATHS:
+        result = bench_decode(name, DECODE_PATHS[name], lines, repeat)
+        results.append(result)
+        print(f"{name:<40} {result['sentences_per_sec']:>10.0f} sentences/s {result['ns_per_sentence']:>9.0f} ns"
+              f" {result['peak_bytes_per_sentence']:>7.0f} B peak")
+
+    batch = bench_batch("".join(line + "\r\n" for line in lines).encode('ascii'), len(lines), repeat)
+    if batch is not None:
+        results.append(batch)
+        print(f"{batch['name']:<40} {batch['sentences_per_sec']:>10.0f} sentences/s {batch['ns_per_sentence']:>9.0f} ns")
+
+    latency = []
+    if bauds and hasattr(os, 'openpty'):
+        for baud_rate in bauds:
+            result = bench_latency([line + "\r\n" for line in lines], baud_rate, latency_seconds)
+            latency.append(result)
+            if result['sentences']:
+                print(f"pty latency at {baud_rate:>6} baud: p50 {result['p50_us']:.0f} us, p99 {result['p99_us']:.0f} us"
+                      f" ({result['sentences']} sentences, {result['lost']} lost)")
+            elif result['lost']:
+                print(f"pty latency at {baud_rate:>6} baud: all {result['lost']} sentences lost")
+
+    settings['epochs'] = epochs
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pynmea2': getattr(pynmea2, '__version__', None),
+            'generator': settings,
+            'sentences': len(lines),
+            'corrupted': generator.corrupted,
+            'repeat': repeat,
+        },
+        'results': results,
+        'latency': latency,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the NMEA decode paths on synthetic data.")
+    parser.add_argument("--epochs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default=",".join(SENTENCE_MIX), help="sentence types per epoch")
+    parser.add_argument("--constellations", default="GP,GL", help="GSV talkers, e.g. GP,GL,GA")
+    parser.add_argument("--satellites", type=int, default=12, help="satellites in view per constellation")
+    parser.add_argument("--corrupt", type=float, default=0.01, help="fraction of sentences with a bad checksum")
+    parser.add_argument("--rate", type=float, default=1.0, help="epochs per second")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per path (the best is kept)")
+    parser.add_argument("--path", action="append", choices=list(DECODE_PATHS), help="only benchmark this path")
+    parser.add_argument("--bauds", default=",".join(map(str, BAUD_RATES)),
+                        help="baud rates for the pty latency test (empty to skip)")
+    parser.add_argument("--latency-seconds", type=float, default=2.0, help="duration of each latency test")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier JSON results file to compare with")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that nmea_fast decodes the stream like pynmea2, then exit")
+    args = parser.parse_args()
+
+    settings = {'seed': args.seed, 'mix': args.mix.split(","), 'constellations': args.constellations.split(","),
+                'satellites': args.satellites, 'corrupt_rate': args.corrupt, 'update_rate': args.rate,
+                'epochs': args.epochs}
+    if args.check:
+        settings.pop('epochs')
+        lines = [line.rstrip('\r\n') for line in SyntheticNMEA(**settings).lines(args.epochs)] + EDGE_CASES
+        differences = check_decoders(lines)
+        for line, name, fast, slow in differences[:20]:
+            print(f"{line}\n  {name}: nmea_fast {fast} != pynmea2 {slow}")
+        print(f"{len(lines)} sentences checked, {len(differences)} differences.")
+        sys.exit(1 if differences else 0)
+    bauds = [int(b) for b in args.bauds.split(",") if b]
+    results = run(settings, args.path, args.repeat, bauds, args.latency_seconds)
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -1,15 +1,28 @@
 import serial
 import pynmea2
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
+from nmea_stream import read_frames
+import nmea_fast
+from gps_time import GPSClock
+from gps_epoch import EpochAssembler
+from gps_sinks import ConsoleSink
 
 class GPSReader:
-    def __init__(self, serial_port, baud_rate, local_offset_hours=5, local_offset_minutes=30):
+    def __init__(self, serial_port, baud_rate, local_offset_hours=5, local_offset_minutes=30, time_zone=None,
+                 sinks=None):
         """
         Initialize the GPSReader object with serial port, baud rate, and local time offset.
+        Pass an IANA time_zone name (e.g. "Europe/Berlin") instead of the offset to follow DST.
+        sinks (see gps_sinks.py) receive the decoded data; by default it is printed to the console.
         """
         self.serial_port = serial_port
         self.baud_rate = baud_rate
-        self.local_offset = timedelta(hours=local_offset_hours, minutes=local_offset_minutes)
+        if time_zone is None:
+            time_zone = timezone(timedelta(hours=local_offset_hours, minutes=local_offset_minutes))
+        self.clock = GPSClock(time_zone)
+        # One record per time step, for sinks that take fixes
+        self.assembler = EpochAssembler(self.clock)
+        self.sinks = [ConsoleSink(self.clock)] if sinks is None else sinks
         self.gps_serial = None
 
     def connect(self):
@@ -33,45 +46,36 @@ class GPSReader:
 
     def convert_to_local_time(self, utc_time):
         """
-        Convert UTC time to local time using the predefined time zone offset.
+        Convert an aware UTC datetime to local time using the predefined time zone.
         """
-        return utc_time + self.local_offset
+        return utc_time.astimezone(self.clock.tz)
 
     def parse_and_display(self, line):
         """
-        Parse the GPS data line and display relevant information.
+        Parse the GPS data line and pass it to the output sinks for display.
         """
         try:
-            msg = pynmea2.parse(line)
-
-            if msg.sentence_type == "GGA":
-                print("\nGPS Fix Data:")
-                print(f"  Time (UTC): {msg.timestamp}")
-                if msg.timestamp:
-                    utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                    local_time = self.convert_to_local_time(utc_time)
-                    print(f"  Zone Time: {local_time.strftime('%H:%M:%S')} (Local)")
+            msg = nmea_fast.parse(line)
+        except (pynmea2.ParseError, ValueError) as e:
+            if isinstance(line, bytes):
+                line = line.decode('ascii', errors='ignore')
+            for sink in self.sinks:
+                sink.write_error(line, e)
+            return
 
-            elif msg.sentence_type == "RMC":
-                print("\nRecommended Minimum Navigation Data:")
-                print(f"  Time (UTC): {msg.timestamp}")
-                if msg.timestamp:
-                    utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                    local_time = self.convert_to_local_time(utc_time)
-                    print(f"  Zone Time: {local_time.strftime('%H:%M:%S')} (Local)")
-                print(f"  Status: {'Active' if msg.status == 'A' else 'Void'}")
-                print(f"  Latitude: {msg.latitude} {msg.lat_dir}")
-                print(f"  Longitude: {msg.longitude} {msg.lon_dir}")
-                print(f"  Speed (knots): {msg.spd_over_grnd}")
-                print(f"  Date: {msg.datestamp}")
+        utc_ns = None
+        if msg.sentence_type in ("GGA", "RMC", "GLL") and msg.timestamp:
+            utc_ns = self.clock.update(msg)
+        fix = self.assembler.add(msg)
+        for sink in self.sinks:
+            sink.write(msg, utc_ns)
+            if fix is not None:
+                sink.write_fix(fix)
 
-            # Other message types can be handled similarly as in the procedural example
-            else:
-                print(f"\nUnhandled Message ({msg.sentence_type}):")
-                print(msg)
-        except pynmea2.ParseError as e:
-            print(f"Could not parse the line: {line}")
-            print(f"Error: {e}")
+    def flush_due(self):
+        # Called when a read times out: print what the sinks still hold while the receiver is quiet
+        for sink in self.sinks:
+            sink.flush_due()
 
     def read_data(self):
         """
@@ -83,15 +87,16 @@ class GPSReader:
 
         try:
             print("Listening for GPS data...")
-            while True:
-                if self.gps_serial.in_waiting > 0:
-                    line = self.gps_serial.readline().decode('ascii', errors='ignore').strip()
-                    if line.startswith('$'):
-                        self.parse_and_display(line)
-                        print("/////////////////////////////////////////////////////////////////////")
+            for frame in read_frames(self.gps_serial, idle=self.flush_due):
+                self.parse_and_display(frame)
         except KeyboardInterrupt:
             print("\nExiting...")
         finally:
+            fix = self.assembler.flush()
+            for sink in self.sinks:
+                if fix is not None:
+                    sink.write_fix(fix)
+                sink.flush()
             self.disconnect()
 
 if __name__ == "__main__":
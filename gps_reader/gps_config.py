@@ -0,0 +1,516 @@
+import os
+import random
+import struct
+import threading
+import time
+from datetime import timedelta
+import serial  # install this module using command in the terminal "pip install pyserial"
+from nmea_fast import checksum_ok, nmea_checksum
+from nmea_stream import NMEAFramer, READ_CHUNK_SIZE, burst_reads
+from nmea_synth import SENTENCE_MIX, SyntheticNMEA
+from ubx import UBXDecoder, ubx_frame
+
+BAUD_RATES = (9600, 115200, 38400, 57600, 19200, 4800, 230400, 460800, 921600)  # Probe order, most common first
+PROBE_SECONDS = 1.5  # Time to listen at each baud rate (receivers send at least once a second)
+PROBE_FRAMES = 2  # Valid sentences (or UBX frames) needed to accept a baud rate
+ACK_TIMEOUT = 1.0  # Seconds to wait for a receiver to acknowledge a command
+BAUD_SWITCH_DELAY = 0.1  # Seconds for the receiver to switch to a new baud rate
+VERIFY_SECONDS = 3.0  # Time to measure the update rate after configuring
+RATE_TOLERANCE = 0.9  # Fraction of the requested update rate that counts as reached
+LINK_LOAD = 0.8  # Largest fraction of the link's bytes per second the sentences may use
+DEFAULT_SENTENCES = ('RMC', 'GGA', 'GSA', 'GSV', 'VTG')  # GPSReader's fixes, plus GSV for the satellite table
+
+# Typical length in bytes of each sentence type per epoch (GSV: one constellation of 3-4 parts)
+SENTENCE_BYTES = {'RMC': 72, 'GGA': 76, 'GSA': 66, 'GSV': 280, 'VTG': 42, 'GLL': 52, 'ZDA': 38, 'GRS': 70,
+                  'GST': 64}
+
+# MediaTek PMTK314: output frequency of each sentence type, in this field order ('' = reserved)
+MTK_SENTENCE_FIELDS = ('GLL', 'RMC', 'VTG', 'GGA', 'GSA', 'GSV', 'GRS', 'GST') + ('',) * 9 + ('ZDA', 'MCHN')
+MTK_ACK_FLAGS = {0: "invalid command", 1: "unsupported command", 2: "command failed", 3: "ok"}
+
+# u-blox (legacy UBX-CFG messages, supported up to the M9 generation)
+CFG_PRT = (0x06, 0x00)
+CFG_MSG = (0x06, 0x01)
+CFG_RATE = (0x06, 0x08)
+CFG_CFG = (0x06, 0x09)
+MON_VER = (0x0A, 0x04)
+ACK_ACK = (0x05, 0x01)
+ACK_NAK = (0x05, 0x00)
+UBX_NMEA_CLASS = 0xF0
+UBX_NMEA_IDS = {'GGA': 0x00, 'GLL': 0x01, 'GSA': 0x02, 'GSV': 0x03, 'RMC': 0x04, 'VTG': 0x05, 'GRS': 0x06,
+                'GST': 0x07, 'ZDA': 0x08}
+UBX_UART1 = 1
+UBX_MODE_8N1 = 0x08D0
+UBX_PROTOCOLS = 0x0003  # UBX and NMEA, in and out
+_CFG_PRT = struct.Struct('<BBHIIHHHH')
+_CFG_RATE = struct.Struct('<HHH')
+_CFG_CFG = struct.Struct('<IIIB')
+
+
+# ----------------------------------------------------------------------------------------------
+# Commands
+
+def pmtk(body):
+    """
+    A MediaTek command sentence with its checksum, e.g. pmtk("PMTK220,100") -> b"$PMTK220,100*2F\\r\\n".
+    """
+    data = body.encode('ascii')
+    return b'$' + data + f"*{nmea_checksum(data):02X}\r\n".encode('ascii')
+
+
+def pmtk_set_baud(baud_rate):
+    return pmtk(f"PMTK251,{baud_rate}")
+
+
+def pmtk_set_rate(update_rate):
+    # Fix interval in milliseconds
+    return pmtk(f"PMTK220,{round(1000 / update_rate)}")
+
+
+def pmtk_set_sentences(sentences):
+    fields = ','.join('1' if name in sentences else '0' for name in MTK_SENTENCE_FIELDS)
+    return pmtk(f"PMTK314,{fields}")
+
+
+def ubx_set_baud(baud_rate, port_id=UBX_UART1):
+    return ubx_frame(*CFG_PRT, _CFG_PRT.pack(port_id, 0, 0, UBX_MODE_8N1, baud_rate, UBX_PROTOCOLS,
+                                             UBX_PROTOCOLS, 0, 0))
+
+
+def ubx_set_rate(update_rate):
+    # Measurement interval in milliseconds, one navigation solution per measurement, aligned to GPS time
+    return ubx_frame(*CFG_RATE, _CFG_RATE.pack(round(1000 / update_rate), 1, 1))
+
+
+def ubx_set_sentence(sentence, rate):
+    # Output rate (per navigation solution) of one NMEA sentence type on the current port
+    return ubx_frame(*CFG_MSG, bytes((UBX_NMEA_CLASS, UBX_NMEA_IDS[sentence], rate)))
+
+
+def ubx_save():
+    # Save the current configuration to battery-backed RAM, flash and EEPROM
+    return ubx_frame(*CFG_CFG, _CFG_CFG.pack(0, 0x1F1F, 0, 0x17))
+
+
+def required_baud(sentences, update_rate, rates=BAUD_RATES):
+    """
+    The lowest standard baud rate that carries sentences update_rate times a second within LINK_LOAD
+    (10 bits per byte on the wire), or the highest rate if none does.
+    """
+    bytes_per_second = sum(SENTENCE_BYTES.get(name, 80) for name in sentences) * update_rate
+    for baud_rate in sorted(rates):
+        if baud_rate / 10 * LINK_LOAD >= bytes_per_second:
+            return baud_rate
+    return max(rates)
+
+
+# ----------------------------------------------------------------------------------------------
+# Talking to the receiver
+
+def _reply(key):
+    return lambda view: (key, bytes(view))
+
+
+REPLY_DECODERS = {key: _reply(key) for key in (ACK_ACK, ACK_NAK, MON_VER)}
+
+
+def _wait_for(gps_serial, match, timeout=ACK_TIMEOUT):
+    """
+    Read from the port until match(frame or UBX reply) returns something other than None, and return
+    that; None if nothing matched within timeout seconds. NMEA frames are bytes, UBX replies
+    ((class, id), payload) tuples.
+    """
+    framer = NMEAFramer()
+    decoder = UBXDecoder(REPLY_DECODERS)
+    burst_reads(gps_serial)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = gps_serial.read(READ_CHUNK_SIZE)
+        if not data:
+            continue
+        for reply in framer.feed(data) + decoder.feed(data):
+            result = match(reply)
+            if result is not None:
+                return result
+    return None
+
+
+def send_pmtk(gps_serial, command, timeout=ACK_TIMEOUT):
+    """
+    Send a PMTK command (from pmtk()) and wait for its PMTK001 acknowledgement.
+    Returns the acknowledgement flag (3 = ok, see MTK_ACK_FLAGS), or None if none arrived.
+    """
+    gps_serial.write(command)
+    prefix = b'$PMTK001,' + command[5:8] + b','
+
+    def acknowledged(reply):
+        if isinstance(reply, bytes) and reply.startswith(prefix) and checksum_ok(reply):
+            return int(reply[len(prefix):-3].split(b',')[0])
+        return None
+
+    return _wait_for(gps_serial, acknowledged, timeout)
+
+
+def send_ubx(gps_serial, frame, timeout=ACK_TIMEOUT):
+    """
+    Send a UBX-CFG frame (from ubx_frame()) and wait for ACK-ACK or ACK-NAK.
+    Returns True (acknowledged), False (rejected) or None (no answer).
+    """
+    gps_serial.write(frame)
+    command = frame[2:4]
+
+    def acknowledged(reply):
+        if isinstance(reply, tuple) and reply[0] in (ACK_ACK, ACK_NAK) and reply[1][:2] == command:
+            return reply[0] == ACK_ACK
+        return None
+
+    return _wait_for(gps_serial, acknowledged, timeout)
+
+
+def probe_baud(port, rates=BAUD_RATES, seconds=PROBE_SECONDS, errors=None):
+    """
+    Find the baud rate a receiver is sending at: listen at each rate in turn until PROBE_FRAMES
+    sentences with a valid checksum (or valid UBX frames) arrive. Returns the rate, or None.
+    A rate the port cannot be opened or read at is skipped, and the error appended to errors
+    (a list) if one is given.
+    """
+    for baud_rate in rates:
+        try:
+            with serial.Serial(port, baud_rate, timeout=0.1) as gps_serial:
+                burst_reads(gps_serial)
+                gps_serial.reset_input_buffer()
+                framer = NMEAFramer()
+                decoder = UBXDecoder({})
+                valid = 0
+                deadline = time.monotonic() + seconds
+                while time.monotonic() < deadline and valid + decoder.frames < PROBE_FRAMES:
+                    data = gps_serial.read(READ_CHUNK_SIZE)
+                    if data:
+                        valid += sum(1 for frame in framer.feed(data) if checksum_ok(frame))
+                        decoder.feed(data)
+                if valid + decoder.frames >= PROBE_FRAMES:
+                    return baud_rate
+        except serial.SerialException as e:
+            if errors is not None:
+                errors.append(f"Serial error at {baud_rate} baud: {e}")
+    return None
+
+
+def detect_vendor(gps_serial, timeout=ACK_TIMEOUT):
+    """
+    Ask for the firmware version both ways (PMTK605 and UBX MON-VER) and return "mtk" or "ublox"
+    depending on which one answers, or None.
+    """
+    gps_serial.write(pmtk("PMTK605"))
+    gps_serial.write(ubx_frame(*MON_VER))
+
+    def vendor(reply):
+        if isinstance(reply, bytes):
+            return "mtk" if reply.startswith(b'$PMTK705,') else None
+        return "ublox" if reply[0] == MON_VER else None
+
+    return _wait_for(gps_serial, vendor, timeout)
+
+
+def measure_rate(gps_serial, seconds=VERIFY_SECONDS):
+    """
+    Observed update rate (epochs per second): distinct RMC/GGA/GLL times received during seconds.
+    """
+    framer = NMEAFramer()
+    burst_reads(gps_serial)
+    gps_serial.reset_input_buffer()
+    times = set()
+    first = None
+    last = None
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        data = gps_serial.read(READ_CHUNK_SIZE)
+        for frame in framer.feed(data) if data else ():
+            kind = frame[3:6]
+            if kind in (b'RMC', b'GGA', b'GLL') and checksum_ok(frame):
+                fields = frame.split(b',')
+                stamp = fields[5] if kind == b'GLL' and len(fields) > 5 else fields[1]
+                if stamp and stamp not in times:
+                    times.add(stamp)
+                    now = time.monotonic()
+                    first = now if first is None else first
+                    last = now
+    if len(times) < 2 or last == first:
+        return float(len(times)) / seconds
+    return (len(times) - 1) / (last - first)
+
+
+class ConfigResult:
+    def __init__(self):
+        """
+        What configure() did: the receiver type, the baud rate before and after, the requested and
+        measured update rates, the answer to each command (True acknowledged, False rejected,
+        None no answer) and the errors met on the way, as messages.
+        """
+        self.vendor = None
+        self.old_baud = None
+        self.baud = None
+        self.update_rate = None
+        self.measured_rate = None
+        self.acks = {}
+        self.errors = []
+        self.ok = False
+
+    def __repr__(self):
+        return (f"ConfigResult(vendor={self.vendor!r}, baud {self.old_baud} -> {self.baud}, "
+                f"rate {self.update_rate} Hz (measured {self.measured_rate if self.measured_rate is None else round(self.measured_rate, 2)}), ok={self.ok})")
+
+
+def configure(port, update_rate=10.0, baud_rate=None, sentences=DEFAULT_SENTENCES, vendor=None,
+              current_baud=None, save=False, verify_seconds=VERIFY_SECONDS):
+    """
+    Configure a MediaTek (PMTK) or u-blox (UBX-CFG) receiver for a higher update rate:
+    find its current baud rate (unless current_baud is given) and type (unless vendor is given),
+    turn off the sentences not in sentences, raise the baud rate (to baud_rate, or the lowest one that
+    carries the sentences at update_rate), reopen the port at the new rate, set the update rate,
+    optionally save the settings (u-blox), and measure the update rate actually received.
+    Returns a ConfigResult; result.baud is the rate to open the port at from now on, and
+    result.errors says what went wrong if result.ok is False.
+    """
+    result = ConfigResult()
+    result.update_rate = update_rate
+    result.old_baud = current_baud or probe_baud(port, errors=result.errors)
+    if result.old_baud is None:
+        result.errors.append(f"No GPS data found on {port} at any of {', '.join(map(str, BAUD_RATES))} baud.")
+        return result
+    result.baud = result.old_baud
+    if baud_rate is None:
+        baud_rate = required_baud(sentences, update_rate)
+
+    try:
+        gps_serial = serial.Serial(port, result.old_baud, timeout=0.1)
+    except serial.SerialException as e:
+        result.errors.append(f"Serial error: {e}")
+        return result
+    try:
+        result.vendor = vendor or detect_vendor(gps_serial)
+        if result.vendor == "mtk":
+            flag = send_pmtk(gps_serial, pmtk_set_sentences(sentences))
+            result.acks['sentences'] = None if flag is None else flag == 3
+        elif result.vendor == "ublox":
+            for name in UBX_NMEA_IDS:
+                result.acks[f'sentence {name}'] = send_ubx(gps_serial, ubx_set_sentence(name, int(name in sentences)))
+        else:
+            result.errors.append(f"Receiver on {port} answered neither PMTK nor UBX commands.")
+            return result
+
+        if baud_rate != result.old_baud:
+            # Neither receiver reliably acknowledges a baud change at the old rate
+            gps_serial.write(pmtk_set_baud(baud_rate) if result.vendor == "mtk" else ubx_set_baud(baud_rate))
+            gps_serial.flush()
+            time.sleep(BAUD_SWITCH_DELAY)
+            gps_serial.close()
+            gps_serial = serial.Serial(port, baud_rate, timeout=0.1)
+            result.baud = baud_rate
+
+        if result.vendor == "mtk":
+            flag = send_pmtk(gps_serial, pmtk_set_rate(update_rate))
+            result.acks['rate'] = None if flag is None else flag == 3
+        else:
+            result.acks['rate'] = send_ubx(gps_serial, ubx_set_rate(update_rate))
+            if save:
+                result.acks['save'] = send_ubx(gps_serial, ubx_save())
+
+        if verify_seconds:
+            result.measured_rate = measure_rate(gps_serial, verify_seconds)
+            result.ok = result.measured_rate >= update_rate * RATE_TOLERANCE
+        else:
+            result.ok = result.acks.get('rate') is True
+    except serial.SerialException as e:
+        result.errors.append(f"Serial error: {e}")
+    finally:
+        gps_serial.close()
+    return result
+
+
+# ----------------------------------------------------------------------------------------------
+# Stand-in receiver for testing without hardware
+
+class SimulatedReceiver:
+    def __init__(self, vendor="mtk", baud_rate=9600, update_rate=1.0, mix=SENTENCE_MIX, seed=0):
+        """
+        A scripted receiver on a local pseudo-terminal (Linux/macOS) that behaves like a MediaTek
+        ("mtk") or u-blox ("ublox") module: it sends a SyntheticNMEA stream at update_rate, limited to
+        what baud_rate can carry (epochs that do not fit are dropped), sends garbage when the port is
+        opened at another baud rate, and obeys PMTK or UBX-CFG commands for baud rate, update rate
+        and sentence selection. Open .port like a serial port.
+        """
+        import pty
+        import tty
+
+        self.vendor = vendor
+        self.baud_rate = baud_rate
+        self.update_rate = update_rate
+        self.enabled = set(mix)
+        self.synth = SyntheticNMEA(seed, mix=mix, update_rate=update_rate)
+        self.random = random.Random(seed)
+        self.commands = []  # commands understood, in order
+        self.sent_epochs = 0
+        self.dropped_epochs = 0
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._framer = NMEAFramer()
+        self._decoder = UBXDecoder({key: _reply(key) for key in (CFG_PRT, CFG_MSG, CFG_RATE, CFG_CFG, MON_VER)})
+        self._speeds = {}
+        import termios
+        for rate in BAUD_RATES:
+            constant = getattr(termios, f"B{rate}", None)
+            if constant is not None:
+                self._speeds[constant] = rate
+        self._termios = termios
+        self._thread = None
+        self._running = False
+
+    def host_baud(self):
+        # The speed the host opened the port at (a pty master sees the slave's settings)
+        return self._speeds.get(self._termios.tcgetattr(self.master)[4])
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="simulated-receiver", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        import select
+
+        last = time.monotonic()
+        next_epoch = last
+        credit = 0.0
+        while self._running:
+            ready, _, _ = select.select([self.master], [], [], max(0.0, next_epoch - time.monotonic()))
+            if ready:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                if self.host_baud() == self.baud_rate:
+                    self._receive(data)
+            now = time.monotonic()
+            if now < next_epoch:
+                continue
+            # The link carries baud_rate / 10 bytes a second; an epoch that does not fit is skipped
+            credit = min(credit + (now - last) * self.baud_rate / 10, self.baud_rate / 10)
+            last = now
+            data = "".join(line for line in self.synth.epoch() if line[3:6] in self.enabled).encode('ascii')
+            if len(data) <= credit:
+                credit -= len(data)
+                self._send(data)
+                self.sent_epochs += 1
+            else:
+                self.dropped_epochs += 1
+            next_epoch = max(next_epoch + 1 / self.update_rate, now)
+
+    def _send(self, data):
+        if self.host_baud() != self.baud_rate:
+            data = bytes(self.random.getrandbits(8) | 0x80 for _ in range(len(data)))  # framing errors
+        try:
+            os.write(self.master, data)
+        except OSError:
+            pass
+
+    def _set_rate(self, update_rate):
+        self.update_rate = update_rate
+        self.synth.step = timedelta(seconds=1 / update_rate)
+
+    def _receive(self, data):
+        for frame in self._framer.feed(data):
+            if self.vendor == "mtk" and frame.startswith(b'$PMTK') and checksum_ok(frame):
+                self._pmtk(frame[5:-3].decode('ascii'))
+        for key, payload in self._decoder.feed(data):
+            if self.vendor == "ublox":
+                self._ubx(key, payload)
+
+    def _pmtk(self, body):
+        command, *fields = body.split(',')
+        self.commands.append(f"PMTK{body}")
+        if command == "251":
+            self.baud_rate = int(fields[0])  # no acknowledgement
+        elif command in ("220", "300"):
+            self._set_rate(1000 / int(fields[0]))
+            self._send(pmtk(f"PMTK001,{command},3"))
+        elif command == "314":
+            if fields[0] == "-1":
+                self.enabled = set(SENTENCE_MIX)
+            else:
+                self.enabled = {name for name, value in zip(MTK_SENTENCE_FIELDS, fields) if name and value != "0"}
+            self._send(pmtk(f"PMTK001,{command},3"))
+        elif command == "605":
+            self._send(pmtk("PMTK705,AXN_5.1.7_3333_19020118,0027,SIMULATED,1.0"))
+        else:
+            self._send(pmtk(f"PMTK001,{command},1"))
+
+    def _ubx(self, key, payload):
+        self.commands.append(f"UBX {key[0]:02X}-{key[1]:02X} {payload.hex()}")
+        if key == MON_VER:
+            if not payload:
+                self._send(ubx_frame(*MON_VER, b'ROM SPG 3.01 (simulated)'.ljust(30, b'\0') + b'00080000\0\0'))
+            return
+        ack = ubx_frame(*ACK_ACK, bytes(key))
+        if key == CFG_PRT and len(payload) >= _CFG_PRT.size:
+            self._send(ack)  # acknowledged at the old baud rate, then switched
+            self.baud_rate = _CFG_PRT.unpack_from(payload)[4]
+            return
+        if key == CFG_RATE and len(payload) >= _CFG_RATE.size:
+            self._set_rate(1000 / _CFG_RATE.unpack_from(payload)[0])
+        elif key == CFG_MSG and len(payload) >= 3 and payload[0] == UBX_NMEA_CLASS:
+            names = {value: name for name, value in UBX_NMEA_IDS.items()}
+            name = names.get(payload[1])
+            rate = payload[2] if len(payload) == 3 else payload[2 + UBX_UART1]
+            if name is not None:
+                if rate:
+                    self.enabled.add(name)
+                else:
+                    self.enabled.discard(name)
+        self._send(ack)
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Configure a GPS receiver for a higher update rate.")
+    parser.add_argument("port", nargs="?", help="serial port of the GPS module, e.g. COM16 or /dev/ttyUSB0")
+    parser.add_argument("--rate", type=float, default=10.0, help="update rate in Hz")
+    parser.add_argument("--baud", type=int, help="new baud rate (default: the lowest that fits)")
+    parser.add_argument("--sentences", default=",".join(DEFAULT_SENTENCES), help="sentence types to keep")
+    parser.add_argument("--vendor", choices=("mtk", "ublox"), help="receiver type (default: detect)")
+    parser.add_argument("--current-baud", type=int, help="current baud rate (default: probe)")
+    parser.add_argument("--save", action="store_true", help="save the settings in the receiver (u-blox)")
+    parser.add_argument("--simulate", choices=("mtk", "ublox"), help="configure a simulated receiver on a pty")
+    args = parser.parse_args()
+
+    receiver = None
+    port = args.port
+    if args.simulate:
+        receiver = SimulatedReceiver(args.simulate).start()
+        port = receiver.port
+    elif not port:
+        parser.error("a port (or --simulate) is required")
+    try:
+        result = configure(port, args.rate, args.baud, tuple(args.sentences.split(",")), args.vendor,
+                           args.current_baud, args.save)
+        print(result)
+        for error in result.errors:
+            print(f"  {error}")
+        for command, ack in result.acks.items():
+            print(f"  {command}: {'acknowledged' if ack else 'rejected' if ack is False else 'no answer'}")
+        if result.ok:
+            print(f"Set BAUD_RATE = {result.baud} in main.py.")
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        if receiver is not None:
+            receiver.stop()
@@ -0,0 +1,175 @@
+from datetime import date, time
+from gps_time import GPSClock
+
+
+def _float(value):
+    # pynmea2 leaves some numeric fields (num_sats, horizontal_dil, pdop...) as text
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    value = _float(value)
+    return None if value is None else int(value)
+
+
+def position(msg):
+    """
+    (latitude, longitude) of a decoded RMC/GGA/GLL sentence, or None when it has no position.
+    A malformed coordinate (e.g. "53216802" or "-321.6802") counts as no position: pynmea2 and
+    nmea_fast raise ValueError for it when latitude or longitude is read.
+    """
+    if not msg.lat_dir:
+        return None
+    try:
+        return msg.latitude, msg.longitude
+    except (ValueError, TypeError):
+        return None
+
+
+class Fix:
+    __slots__ = ('utc_ns', 'timestamp', 'date', 'status', 'latitude', 'longitude', 'altitude',
+                 'speed', 'course', 'quality', 'num_sats', 'fix_type', 'pdop', 'hdop', 'vdop',
+                 'satellites_in_view', 'sentences')
+
+    def __init__(self):
+        """
+        Everything the receiver reported for one time step (epoch), merged from all its sentences.
+        Fields that no sentence of the epoch carried stay None.
+        """
+        self.utc_ns = None  # epoch nanoseconds (see gps_time.GPSClock)
+        self.timestamp = None  # datetime.time from the sentences
+        self.date = None
+        self.status = None  # 'A' active / 'V' void
+        self.latitude = None
+        self.longitude = None
+        self.altitude = None  # meters above mean sea level
+        self.speed = None  # knots
+        self.course = None  # degrees true
+        self.quality = None  # GGA fix quality
+        self.num_sats = None  # satellites used
+        self.fix_type = None  # GSA: 1 none, 2 2D, 3 3D
+        self.pdop = None
+        self.hdop = None
+        self.vdop = None
+        self.satellites_in_view = None
+        self.sentences = 0
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) is not None)
+        return f"Fix({fields})"
+
+
+class EpochAssembler:
+    def __init__(self, clock=None, cycle_end=None, on_fix=None):
+        """
+        Group decoded sentences by UTC time step and emit one Fix per step.
+        An epoch closes when a sentence with a different timestamp arrives or, if cycle_end is set
+        (e.g. "GLL", the last sentence the receiver sends each cycle), as soon as that sentence arrives.
+        on_fix, if given, is called with each completed Fix.
+        """
+        self.clock = clock if clock is not None else GPSClock()
+        self.cycle_end = cycle_end
+        self.on_fix = on_fix
+        self.current = Fix()
+        self._in_view = {}  # GSV satellites in view per talker
+
+    def add(self, msg):
+        """
+        Merge one decoded sentence. Returns the Fix of the epoch it closed, or None.
+        """
+        completed = None
+        timestamp = getattr(msg, 'timestamp', None)
+        if not isinstance(timestamp, time):
+            timestamp = None  # no time, or text that did not convert
+        current = self.current
+        if timestamp and current.timestamp is not None and timestamp != current.timestamp:
+            completed = self._emit()
+            current = self.current
+
+        merge = self._MERGE.get(msg.sentence_type)
+        if merge is not None:
+            if timestamp and current.timestamp is None:
+                current.timestamp = timestamp
+            merge(self, current, msg)
+            current.sentences += 1
+
+        if msg.sentence_type == self.cycle_end and current.sentences:
+            completed = self._emit()
+        return completed
+
+    def flush(self):
+        """
+        Emit the epoch in progress, e.g. when the stream ends.
+        """
+        if self.current.sentences:
+            return self._emit()
+        return None
+
+    def _emit(self):
+        fix = self.current
+        if self._in_view:
+            fix.satellites_in_view = sum(self._in_view.values())
+            self._in_view = {}
+        self.current = Fix()
+        if self.on_fix is not None:
+            self.on_fix(fix)
+        return fix
+
+    def _merge_rmc(self, fix, msg):
+        if isinstance(msg.datestamp, date):
+            fix.date = msg.datestamp
+        if msg.timestamp:
+            fix.utc_ns = self.clock.update(msg)
+        fix.status = msg.status
+        coordinates = position(msg)
+        if coordinates is not None:
+            fix.latitude, fix.longitude = coordinates
+        fix.speed = _float(msg.spd_over_grnd)
+        fix.course = _float(msg.true_course)
+
+    def _merge_gga(self, fix, msg):
+        if msg.timestamp and fix.utc_ns is None:
+            fix.utc_ns = self.clock.update(msg)
+        coordinates = position(msg)
+        if coordinates is not None:
+            fix.latitude, fix.longitude = coordinates
+        fix.quality = _int(msg.gps_qual)
+        fix.num_sats = _int(msg.num_sats)
+        fix.hdop = _float(msg.horizontal_dil)
+        fix.altitude = _float(msg.altitude)
+
+    def _merge_gll(self, fix, msg):
+        if msg.timestamp and fix.utc_ns is None:
+            fix.utc_ns = self.clock.update(msg)
+        if fix.latitude is None:
+            coordinates = position(msg)
+            if coordinates is not None:
+                fix.latitude, fix.longitude = coordinates
+        if fix.status is None:
+            fix.status = msg.status
+
+    def _merge_gsa(self, fix, msg):
+        fix.fix_type = _int(msg.mode_fix_type)
+        fix.pdop = _float(msg.pdop)
+        fix.hdop = _float(msg.hdop) or fix.hdop
+        fix.vdop = _float(msg.vdop)
+
+    def _merge_vtg(self, fix, msg):
+        if fix.course is None:
+            fix.course = _float(msg.true_track)
+        if fix.speed is None:
+            fix.speed = _float(msg.spd_over_grnd_kts)
+
+    def _merge_gsv(self, fix, msg):
+        in_view = _int(msg.num_sv_in_view)
+        if in_view is not None:
+            self._in_view[msg.talker] = in_view
+
+    _MERGE = {'RMC': _merge_rmc, 'GGA': _merge_gga, 'GLL': _merge_gll,
+              'GSA': _merge_gsa, 'VTG': _merge_vtg, 'GSV': _merge_gsv}
@@ -0,0 +1,344 @@
+import math
+from gps_time import NS_PER_SECOND
+
+EARTH_RADIUS = 6371008.8  # Mean Earth radius in meters
+KNOTS_TO_M_PER_S = 0.514444
+
+DEAD_BAND_DISTANCE = 10.0  # Meters moved before the dead-band filter passes a fix...
+DEAD_BAND_HEADING = 20.0  # ...or degrees of course change (while moving)...
+MAX_INTERVAL = 60.0  # ...or seconds since the last fix passed (a heartbeat)
+TOLERANCE = 10.0  # Largest distance in meters between a dropped fix and the simplified track
+STOP_RADIUS = 5.0  # Fixes within this many meters of where the receiver stopped belong to the stop (< TOLERANCE)
+STOP_SPEED = 1.0  # Knots below which the receiver counts as stopped
+
+
+def _local(latitude, longitude, origin_latitude, origin_longitude):
+    """
+    East and north offsets in meters of a position from an origin (equirectangular, accurate to a
+    fraction of a percent over the few kilometers between two kept fixes).
+    """
+    scale = math.radians(EARTH_RADIUS)
+    east = (longitude - origin_longitude) * scale * math.cos(math.radians(origin_latitude))
+    if east > 180 * scale:
+        east -= 360 * scale
+    elif east < -180 * scale:
+        east += 360 * scale
+    return east, (latitude - origin_latitude) * scale
+
+
+def distance(fix_a, fix_b):
+    east, north = _local(fix_b.latitude, fix_b.longitude, fix_a.latitude, fix_a.longitude)
+    return math.hypot(east, north)
+
+
+def _seconds(fix_a, fix_b):
+    if fix_a.utc_ns is None or fix_b.utc_ns is None:
+        return 0.0
+    return (fix_b.utc_ns - fix_a.utc_ns) / NS_PER_SECOND
+
+
+def _wrap(angle):
+    # Angle in radians to [-pi, pi)
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+class DeadBandFilter:
+    def __init__(self, distance=DEAD_BAND_DISTANCE, heading=DEAD_BAND_HEADING, max_interval=MAX_INTERVAL,
+                 min_speed=STOP_SPEED):
+        """
+        Pass a fix only when it differs enough from the last one passed: moved distance meters,
+        turned heading degrees (while faster than min_speed knots), changed status, or max_interval
+        seconds went by. Every dropped fix is within distance meters of the last passed fix.
+        Set any threshold to None to disable it.
+        """
+        self.distance = distance
+        self.heading = heading
+        self.max_interval = max_interval
+        self.min_speed = min_speed
+        self.last = None
+        self.passed = 0
+        self.dropped = 0
+
+    def add(self, fix):
+        """
+        Offer the next fix; returns the list of fixes to keep (here at most this one).
+        Fixes without a position are ignored.
+        """
+        if fix.latitude is None or fix.longitude is None:
+            return []
+        last = self.last
+        if last is None or self._changed(last, fix):
+            self.last = fix
+            self.passed += 1
+            return [fix]
+        self.dropped += 1
+        return []
+
+    def _changed(self, last, fix):
+        if fix.status != last.status:
+            return True
+        if self.max_interval is not None and _seconds(last, fix) >= self.max_interval:
+            return True
+        if self.distance is not None and distance(last, fix) >= self.distance:
+            return True
+        if (self.heading is not None and fix.course is not None and last.course is not None
+                and fix.speed is not None and fix.speed >= self.min_speed):
+            turn = abs((fix.course - last.course + 180) % 360 - 180)
+            if turn >= self.heading:
+                return True
+        return False
+
+    def flush(self):
+        return []
+
+
+class SimplifyFilter:
+    def __init__(self, tolerance=TOLERANCE, max_interval=MAX_INTERVAL, stop_radius=0.0, stop_speed=STOP_SPEED):
+        """
+        Online line simplification with a bounded error: keeps only the fixes where the track bends,
+        so every dropped fix lies within tolerance meters of the straight line between the kept fixes
+        around it.
+        From the last kept fix (the anchor), each later fix allows the directions whose ray passes
+        within tolerance of it; the intersection of these allowed directions (a wedge) is kept, so
+        the state is a few numbers however long the straight stretch is. When the next fix falls
+        outside the wedge, or doubles back, the previous fix is kept and becomes the new anchor.
+        A fix is always kept after max_interval seconds (None to disable).
+        Kept fixes are returned one fix late, as it takes the next fix to know where a line ends.
+        After a StationaryFilter(stop_radius), pass the same stop_radius: fixes slower than stop_speed
+        knots (the stop fixes it kept) are then held to tolerance - stop_radius, so the stop fixes
+        it dropped around them also stay within tolerance of the line.
+        """
+        if stop_radius >= tolerance:
+            raise ValueError(f"stop_radius ({stop_radius} m) must be smaller than tolerance ({tolerance} m)")
+        self.tolerance = tolerance
+        # A dropped fix may be up to width off the line and width past its end: width**2 * 2 == tolerance**2
+        self.width = tolerance / math.sqrt(2)
+        self.stop_width = (tolerance - stop_radius) / math.sqrt(2)
+        self.stop_speed = stop_speed
+        self.max_interval = max_interval
+        self.anchor = None
+        self.candidate = None  # last fix that can still end the current line
+        self.passed = 0
+        self.dropped = 0
+        self._reset()
+
+    def _reset(self):
+        self._reference = None  # direction (radians) the wedge is measured from
+        self._low = -math.pi
+        self._high = math.pi
+        self._reach = 0.0  # least distance from the anchor the line may end at (a fix's distance less its width)
+
+    def _keep(self, fix):
+        self.anchor = fix
+        self.candidate = None
+        self.passed += 1
+        self._reset()
+        return fix
+
+    def add(self, fix):
+        """
+        Offer the next fix; returns the list of fixes to keep (the fix that ended the previous line, if any).
+        Fixes without a position are ignored.
+        """
+        if fix.latitude is None or fix.longitude is None:
+            return []
+        if self.anchor is None:
+            return [self._keep(fix)]
+        kept = []
+        if not self._extends(fix):
+            kept.append(self._keep(self.candidate))
+            self._extends(fix)  # the new line starts with this fix
+        if self.max_interval is not None and _seconds(self.anchor, fix) >= self.max_interval:
+            if self.candidate is not None:
+                self.dropped += 1
+            kept.append(self._keep(fix))
+            return kept
+        if self.candidate is not None:
+            self.dropped += 1
+        self.candidate = fix
+        return kept
+
+    def _extends(self, fix):
+        """
+        Whether fix can end the current line without leaving any earlier fix more than tolerance
+        away from it; if so, narrow the wedge to the directions that also pass close to fix.
+        """
+        anchor = self.anchor
+        width = self.width
+        if fix.speed is not None and fix.speed < self.stop_speed:
+            width = self.stop_width
+        east, north = _local(fix.latitude, fix.longitude, anchor.latitude, anchor.longitude)
+        reach = math.hypot(east, north)
+        if reach < self._reach:
+            return False  # doubled back past fixes already on the line
+        if not reach:
+            return True
+        angle = math.atan2(north, east)
+        offset = 0.0
+        if self._reference is not None:
+            offset = _wrap(angle - self._reference)
+            if not self._low <= offset <= self._high:
+                return False
+        self._reach = max(self._reach, reach - width)
+        if reach > width:  # nearer fixes are close enough to any line from the anchor
+            if self._reference is None:
+                self._reference = angle
+            spread = math.asin(width / reach)
+            self._low = max(self._low, offset - spread)
+            self._high = min(self._high, offset + spread)
+        return True
+
+    def flush(self):
+        """
+        End of the track: keep the last fix.
+        """
+        if self.candidate is None:
+            return []
+        return [self._keep(self.candidate)]
+
+
+class StationaryFilter:
+    def __init__(self, radius=STOP_RADIUS, stop_speed=STOP_SPEED, max_interval=None):
+        """
+        Collapse stops: while the receiver stays slower than stop_speed knots and within radius meters
+        of where it stopped, only the first and the last fix of the stop are kept. Every dropped fix is
+        within radius of the first fix (and so within 2 * radius of the last). Moving fixes pass through.
+        With max_interval, one fix is also kept every max_interval seconds during a long stop.
+        """
+        self.radius = radius
+        self.stop_speed = stop_speed
+        self.max_interval = max_interval
+        self.stop = None  # first fix of the current stop
+        self.last_kept = None
+        self.pending = None  # latest fix of the stop, kept when the stop ends
+        self.passed = 0
+        self.dropped = 0
+
+    def _stopped(self, fix):
+        return fix.speed is not None and fix.speed < self.stop_speed
+
+    def _keep(self, fix, kept):
+        self.last_kept = fix
+        self.passed += 1
+        kept.append(fix)
+
+    def add(self, fix):
+        """
+        Offer the next fix; returns the list of fixes to keep.
+        Fixes without a position are ignored.
+        """
+        if fix.latitude is None or fix.longitude is None:
+            return []
+        kept = []
+        if self.stop is not None:
+            if self._stopped(fix) and distance(self.stop, fix) <= self.radius:
+                if self.max_interval is not None and _seconds(self.last_kept, fix) >= self.max_interval:
+                    if self.pending is not None:
+                        self.dropped += 1
+                    self.pending = None
+                    self._keep(fix, kept)
+                else:
+                    if self.pending is not None:
+                        self.dropped += 1
+                    self.pending = fix
+                return kept
+            # The stop is over: keep its last fix, then treat this fix as moving
+            if self.pending is not None:
+                self._keep(self.pending, kept)
+            self.stop = None
+            self.pending = None
+        if self._stopped(fix):
+            self.stop = fix
+        self._keep(fix, kept)
+        return kept
+
+    def flush(self):
+        kept = []
+        if self.pending is not None:
+            self._keep(self.pending, kept)
+            self.pending = None
+        self.stop = None
+        return kept
+
+
+class FilterChain:
+    def __init__(self, *filters):
+        """
+        Run fixes through several filters in turn, e.g. FilterChain(StationaryFilter(), SimplifyFilter()).
+        """
+        self.filters = filters
+
+    def add(self, fix):
+        fixes = [fix]
+        for fix_filter in self.filters:
+            fixes = [kept for fix in fixes for kept in fix_filter.add(fix)]
+        return fixes
+
+    def flush(self):
+        fixes = []
+        for fix_filter in self.filters:
+            fixes = [kept for fix in fixes for kept in fix_filter.add(fix)] + fix_filter.flush()
+        return fixes
+
+
+def default_filter(tolerance=TOLERANCE, radius=STOP_RADIUS):
+    """
+    Collapse stops within radius meters, then simplify the track, so that every dropped fix is within
+    tolerance meters of the kept track: radius is taken out of the tolerance of the stop fixes.
+    """
+    return FilterChain(StationaryFilter(radius), SimplifyFilter(tolerance, stop_radius=radius))
+
+
+class DeviceFilters:
+    def __init__(self, make_filter=default_filter):
+        """
+        One filter per device, created on the device's first fix by make_filter().
+        """
+        self.make_filter = make_filter
+        self.filters = {}
+
+    def add(self, device, fix):
+        fix_filter = self.filters.get(device)
+        if fix_filter is None:
+            fix_filter = self.filters[device] = self.make_filter()
+        return fix_filter.add(fix)
+
+    def flush(self, device=None):
+        """
+        Fixes still held for device (or for every device, as (device, fix) pairs).
+        """
+        if device is not None:
+            fix_filter = self.filters.get(device)
+            return [] if fix_filter is None else fix_filter.flush()
+        return [(name, fix) for name, fix_filter in self.filters.items() for fix in fix_filter.flush()]
+
+
+class FilteredSink:
+    def __init__(self, sink, fix_filter=None):
+        """
+        Wrap an output sink (see gps_sinks.py and gps_store.StoreSink) so it only receives the fixes
+        the filter keeps. Sentences and errors are passed through unchanged.
+        """
+        self.sink = sink
+        self.filter = default_filter() if fix_filter is None else fix_filter
+
+    def write(self, msg, utc_ns=None):
+        self.sink.write(msg, utc_ns)
+
+    def write_fix(self, fix):
+        for kept in self.filter.add(fix):
+            self.sink.write_fix(kept)
+
+    def write_error(self, line, error):
+        self.sink.write_error(line, error)
+
+    def flush_due(self):
+        self.sink.flush_due()
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        for kept in self.filter.flush():
+            self.sink.write_fix(kept)
+        self.sink.close()
@@ -0,0 +1,354 @@
+import numpy as np  # install this module using command in the terminal "pip install numpy"
+from gps_time import NS_PER_SECOND
+
+# WGS84 ellipsoid
+A = 6378137.0  # semi-major axis in meters
+F = 1 / 298.257223563  # flattening
+B = A * (1 - F)  # semi-minor axis
+E2 = F * (2 - F)  # first eccentricity squared
+EP2 = E2 / (1 - E2)  # second eccentricity squared
+E = np.sqrt(E2)
+MEAN_RADIUS = (2 * A + B) / 3  # for great-circle distances
+
+# UTM: Krueger series to n**6 (Karney 2011), accurate to well under a millimeter within a zone
+K0 = 0.9996
+FALSE_EASTING = 500000.0
+FALSE_NORTHING_SOUTH = 10000000.0
+_N = F / (2 - F)
+_RECTIFYING_RADIUS = A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64 + _N ** 6 / 256)
+_ALPHA = np.array([
+    _N / 2 - 2 * _N ** 2 / 3 + 5 * _N ** 3 / 16 + 41 * _N ** 4 / 180 - 127 * _N ** 5 / 288 + 7891 * _N ** 6 / 37800,
+    13 * _N ** 2 / 48 - 3 * _N ** 3 / 5 + 557 * _N ** 4 / 1440 + 281 * _N ** 5 / 630 - 1983433 * _N ** 6 / 1935360,
+    61 * _N ** 3 / 240 - 103 * _N ** 4 / 140 + 15061 * _N ** 5 / 26880 + 167603 * _N ** 6 / 181440,
+    49561 * _N ** 4 / 161280 - 179 * _N ** 5 / 168 + 6601661 * _N ** 6 / 7257600,
+    34729 * _N ** 5 / 80640 - 3418889 * _N ** 6 / 1995840,
+    212378941 * _N ** 6 / 319334400,
+])
+_BETA = np.array([
+    _N / 2 - 2 * _N ** 2 / 3 + 37 * _N ** 3 / 96 - _N ** 4 / 360 - 81 * _N ** 5 / 512 + 96199 * _N ** 6 / 604800,
+    _N ** 2 / 48 + _N ** 3 / 15 - 437 * _N ** 4 / 1440 + 46 * _N ** 5 / 105 - 1118711 * _N ** 6 / 3870720,
+    17 * _N ** 3 / 480 - 37 * _N ** 4 / 840 - 209 * _N ** 5 / 4480 + 5569 * _N ** 6 / 90720,
+    4397 * _N ** 4 / 161280 - 11 * _N ** 5 / 504 - 830251 * _N ** 6 / 7257600,
+    4583 * _N ** 5 / 161280 - 108847 * _N ** 6 / 3991680,
+    20648693 * _N ** 6 / 638668800,
+])
+
+VINCENTY_TOLERANCE = 1e-12  # radians of longitude on the auxiliary sphere (about 0.006 mm)
+VINCENTY_ITERATIONS = 200  # nearly antipodal points that have not converged by then are NaN
+LOCAL_MAX_STEP = 10000.0  # Track steps longer than this (meters) are measured with Vincenty's formula
+
+
+def geodetic_to_ecef(latitude, longitude, altitude=0.0):
+    """
+    Earth-centered, Earth-fixed x, y, z in meters from latitude and longitude in degrees and
+    height above the ellipsoid in meters. All arguments may be arrays.
+    """
+    lat = np.radians(latitude)
+    lon = np.radians(longitude)
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    prime_vertical = A / np.sqrt(1 - E2 * sin_lat * sin_lat)
+    radius = (prime_vertical + altitude) * cos_lat
+    return radius * np.cos(lon), radius * np.sin(lon), (prime_vertical * (1 - E2) + altitude) * sin_lat
+
+
+def ecef_to_geodetic(x, y, z):
+    """
+    Latitude and longitude in degrees and height above the ellipsoid in meters from ECEF meters,
+    in closed form (Heikkinen), so whole arrays convert without iterating.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    p2 = x * x + y * y
+    p = np.sqrt(p2)
+    z2 = z * z
+    f = 54 * B * B * z2
+    g = p2 + (1 - E2) * z2 - E2 * (A * A - B * B)
+    c = E2 * E2 * f * p2 / (g * g * g)
+    s = np.cbrt(1 + c + np.sqrt(c * c + 2 * c))
+    k = s + 1 + 1 / s
+    big_p = f / (3 * k * k * g * g)
+    q = np.sqrt(1 + 2 * E2 * E2 * big_p)
+    r0 = (-big_p * E2 * p / (1 + q)
+          + np.sqrt(np.maximum(A * A / 2 * (1 + 1 / q) - big_p * (1 - E2) * z2 / (q * (1 + q)) - big_p * p2 / 2, 0)))
+    t = p - E2 * r0
+    u = np.sqrt(t * t + z2)
+    v = np.sqrt(t * t + (1 - E2) * z2)
+    z0 = B * B * z / (A * v)
+    altitude = u * (1 - B * B / (A * v))
+    latitude = np.degrees(np.arctan2(z + EP2 * z0, p))
+    longitude = np.degrees(np.arctan2(y, x))
+    return latitude, longitude, altitude
+
+
+def _enu_rotation(latitude0, longitude0):
+    lat = np.radians(latitude0)
+    lon = np.radians(longitude0)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+    return np.array([
+        [-sin_lon, cos_lon, 0.0],
+        [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+        [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat],
+    ])
+
+
+def ecef_to_enu(x, y, z, latitude0, longitude0, altitude0=0.0):
+    """
+    Local east, north, up in meters relative to the reference point (latitude0, longitude0, altitude0).
+    """
+    x0, y0, z0 = geodetic_to_ecef(latitude0, longitude0, altitude0)
+    rotation = _enu_rotation(latitude0, longitude0)
+    dx = np.asarray(x) - x0
+    dy = np.asarray(y) - y0
+    dz = np.asarray(z) - z0
+    return (rotation[0, 0] * dx + rotation[0, 1] * dy,
+            rotation[1, 0] * dx + rotation[1, 1] * dy + rotation[1, 2] * dz,
+            rotation[2, 0] * dx + rotation[2, 1] * dy + rotation[2, 2] * dz)
+
+
+def enu_to_ecef(east, north, up, latitude0, longitude0, altitude0=0.0):
+    x0, y0, z0 = geodetic_to_ecef(latitude0, longitude0, altitude0)
+    rotation = _enu_rotation(latitude0, longitude0)
+    east = np.asarray(east)
+    north = np.asarray(north)
+    up = np.asarray(up)
+    return (x0 + rotation[0, 0] * east + rotation[1, 0] * north + rotation[2, 0] * up,
+            y0 + rotation[0, 1] * east + rotation[1, 1] * north + rotation[2, 1] * up,
+            z0 + rotation[1, 2] * north + rotation[2, 2] * up)
+
+
+def geodetic_to_enu(latitude, longitude, altitude, latitude0, longitude0, altitude0=0.0):
+    """
+    Local east, north, up in meters of positions around a reference point, e.g. the first fix of a track.
+    """
+    return ecef_to_enu(*geodetic_to_ecef(latitude, longitude, altitude), latitude0, longitude0, altitude0)
+
+
+def enu_to_geodetic(east, north, up, latitude0, longitude0, altitude0=0.0):
+    return ecef_to_geodetic(*enu_to_ecef(east, north, up, latitude0, longitude0, altitude0))
+
+
+def utm_zone(latitude, longitude):
+    """
+    UTM zone numbers (1-60) for positions in degrees, with the Norway and Svalbard exceptions.
+    """
+    latitude = np.asarray(latitude)
+    longitude = np.asarray(longitude)
+    zone = (np.floor((longitude + 180) / 6).astype(np.int64) % 60) + 1
+    zone = np.where((latitude >= 56) & (latitude < 64) & (longitude >= 3) & (longitude < 12), 32, zone)
+    svalbard = (latitude >= 72) & (latitude < 84)
+    for low, high, number in ((0, 9, 31), (9, 21, 33), (21, 33, 35), (33, 42, 37)):
+        zone = np.where(svalbard & (longitude >= low) & (longitude < high), number, zone)
+    return zone
+
+
+def _clenshaw(coefficients, zeta):
+    """
+    zeta + sum(c[j] * sin(2 * (j + 1) * zeta)) for complex zeta = xi + i*eta, by Clenshaw summation:
+    one complex sine and cosine for all terms instead of four functions per term.
+    """
+    sin_2zeta = np.sin(2 * zeta)
+    y = 2 * np.cos(2 * zeta)
+    b1 = np.zeros_like(zeta)
+    b2 = np.zeros_like(zeta)
+    for coefficient in coefficients[::-1]:
+        b1, b2 = coefficient + y * b1 - b2, b1
+    return zeta + b1 * sin_2zeta
+
+
+def geodetic_to_utm(latitude, longitude, zone=None):
+    """
+    UTM easting and northing in meters, zone number and northern-hemisphere flag for positions in
+    degrees. Pass zone to project a whole track into one zone (e.g. one that crosses a zone edge).
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    if zone is None:
+        zone = utm_zone(latitude, longitude)
+    zone = np.asarray(zone)
+    lat = np.radians(latitude)
+    lon = np.radians(longitude - (zone * 6 - 183))
+    lon = (lon + np.pi) % (2 * np.pi) - np.pi
+    sin_lat = np.sin(lat)
+    t = np.sinh(np.arctanh(sin_lat) - E * np.arctanh(E * sin_lat))
+    zeta = _clenshaw(_ALPHA, np.arctan2(t, np.cos(lon)) + 1j * np.arctanh(np.sin(lon) / np.sqrt(1 + t * t)))
+    easting = FALSE_EASTING + K0 * _RECTIFYING_RADIUS * zeta.imag
+    northing = K0 * _RECTIFYING_RADIUS * zeta.real
+    northern = latitude >= 0
+    northing = np.where(northern, northing, northing + FALSE_NORTHING_SOUTH)
+    return easting, northing, zone, northern
+
+
+def utm_to_geodetic(easting, northing, zone, northern=True):
+    """
+    Latitude and longitude in degrees from UTM easting and northing in meters.
+    """
+    easting = np.asarray(easting, dtype=np.float64)
+    northing = np.asarray(northing, dtype=np.float64)
+    northing = np.where(northern, northing, northing - FALSE_NORTHING_SOUTH)
+    zeta = _clenshaw(-_BETA, (northing + 1j * (easting - FALSE_EASTING)) / (K0 * _RECTIFYING_RADIUS))
+    xi_prime = zeta.real
+    eta_prime = zeta.imag
+    conformal = np.arcsin(np.sin(xi_prime) / np.cosh(eta_prime))
+    # Latitude from conformal latitude: tau = tan(latitude) solved by Newton's method
+    tau_prime = np.tan(conformal)
+    tau = tau_prime.copy()
+    for _ in range(5):
+        sigma = np.sinh(E * np.arctanh(E * tau / np.sqrt(1 + tau * tau)))
+        tau_i = tau * np.sqrt(1 + sigma * sigma) - sigma * np.sqrt(1 + tau * tau)
+        tau += ((tau_prime - tau_i) / np.sqrt(1 + tau_i * tau_i)
+                * (1 + (1 - E2) * tau * tau) / ((1 - E2) * np.sqrt(1 + tau * tau)))
+    latitude = np.degrees(np.arctan(tau))
+    longitude = np.asarray(zone) * 6 - 183 + np.degrees(np.arctan2(np.sinh(eta_prime), np.cos(xi_prime)))
+    return latitude, longitude
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2, radius=MEAN_RADIUS):
+    """
+    Great-circle distance in meters on a sphere; about 0.5% from the ellipsoidal distance at worst.
+    """
+    lat1 = np.radians(latitude1)
+    lat2 = np.radians(latitude2)
+    half_dlat = (lat2 - lat1) / 2
+    half_dlon = np.radians(np.asarray(longitude2) - longitude1) / 2
+    h = np.sin(half_dlat) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(half_dlon) ** 2
+    return 2 * radius * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def vincenty(latitude1, longitude1, latitude2, longitude2):
+    """
+    Distance in meters on the WGS84 ellipsoid (Vincenty's inverse formula), for whole arrays at once.
+    Iterates until every pair has converged; nearly antipodal pairs that do not converge are NaN.
+    """
+    lat1, lat2 = np.broadcast_arrays(np.radians(latitude1), np.radians(latitude2))
+    lon_diff = np.radians(np.asarray(longitude2, dtype=np.float64) - longitude1)
+    u1 = np.arctan((1 - F) * np.tan(lat1))
+    u2 = np.arctan((1 - F) * np.tan(lat2))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+    lam = np.array(lon_diff, dtype=np.float64, copy=True) * np.ones_like(lat1)
+    converged = np.zeros(lam.shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(VINCENTY_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha * sin_alpha
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+            c = F / 16 * cos2_alpha * (4 + F * (4 - 3 * cos2_alpha))
+            previous = lam
+            lam = lon_diff + (1 - c) * F * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = (np.abs(lam - previous) < VINCENTY_TOLERANCE) | np.isnan(lam)  # missing positions stay NaN
+            if converged.all():
+                break
+        u2_ = cos2_alpha * (A * A - B * B) / (B * B)
+        big_a = 1 + u2_ / 16384 * (4096 + u2_ * (-768 + u2_ * (320 - 175 * u2_)))
+        big_b = u2_ / 1024 * (256 + u2_ * (-128 + u2_ * (74 - 47 * u2_)))
+        delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        distance = B * big_a * (sigma - delta_sigma)
+    return np.where(converged, distance, np.nan)
+
+
+def bearing(latitude1, longitude1, latitude2, longitude2):
+    """
+    Initial great-circle bearing in degrees (0-360, clockwise from north) from point 1 to point 2.
+    """
+    lat1 = np.radians(latitude1)
+    lat2 = np.radians(latitude2)
+    dlon = np.radians(np.asarray(longitude2) - longitude1)
+    y = np.sin(dlon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def _local_steps(latitude, longitude):
+    """
+    Distance in meters and heading in degrees of each step between consecutive positions, from the
+    ellipsoid's radii of curvature at the step's mean latitude: one sine and cosine per step, within
+    a few centimeters of Vincenty up to LOCAL_MAX_STEP and far closer for the short steps between fixes.
+    Longer steps are measured with vincenty().
+    """
+    lat = np.radians(latitude)
+    middle = (lat[:-1] + lat[1:]) / 2
+    sin_middle = np.sin(middle)
+    w2 = 1 - E2 * sin_middle * sin_middle
+    prime_vertical = A / np.sqrt(w2)
+    north = prime_vertical * (1 - E2) / w2 * np.diff(lat)
+    east = prime_vertical * np.cos(middle) * ((np.radians(np.diff(longitude)) + np.pi) % (2 * np.pi) - np.pi)
+    step = np.hypot(east, north)
+    heading = np.degrees(np.arctan2(east, north)) % 360
+    long_steps = np.flatnonzero(step > LOCAL_MAX_STEP)
+    if len(long_steps):
+        step[long_steps] = vincenty(latitude[long_steps], longitude[long_steps],
+                                    latitude[long_steps + 1], longitude[long_steps + 1])
+        heading[long_steps] = bearing(latitude[long_steps], longitude[long_steps],
+                                      latitude[long_steps + 1], longitude[long_steps + 1])
+    return step, heading
+
+
+def _steps(distance):
+    def steps(latitude, longitude):
+        return (distance(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:]),
+                bearing(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:]))
+    return steps
+
+
+STEPS = {'local': _local_steps, 'haversine': _steps(haversine), 'vincenty': _steps(vincenty)}
+
+
+def track_columns(records):
+    """
+    utc_ns, latitude and longitude arrays of a track: a gps_history.FIX_DTYPE array (FixHistory.last(),
+    nmea_ingest.load_track, TrackStore.query) or an nmea_batch table with time and date (RMC).
+    utc_ns is None when the records have no date.
+    """
+    names = records.dtype.names
+    if 'latitude' in names:
+        return records['utc_ns'], records['latitude'], records['longitude']
+    utc_ns = None
+    if 'date' in names:
+        utc_ns = (records['date'].astype('datetime64[ns]').astype(np.int64)
+                  + np.round(records['time'] * NS_PER_SECOND).astype(np.int64))
+    return utc_ns, records['lat'], records['lon']
+
+
+def track_metrics(records, method='local'):
+    """
+    Per-fix step distance (meters from the previous fix), cumulative distance, speed derived from
+    position (m/s) and heading (degrees) of the step into each fix, plus totals, as a dict of arrays.
+    The first fix has no step: its distance is 0 and its speed and heading are NaN. Steps from or to
+    a fix without a position are NaN and add nothing to the cumulative distance.
+    method is 'local' (ellipsoidal, see _local_steps), 'vincenty' or 'haversine' (spherical).
+    """
+    utc_ns, latitude, longitude = track_columns(records)
+    count = len(latitude)
+    step = np.zeros(count)
+    heading = np.full(count, np.nan)
+    speed = np.full(count, np.nan)
+    if count > 1:
+        with np.errstate(invalid='ignore'):
+            step[1:], heading[1:] = STEPS[method](latitude, longitude)
+        heading[1:][step[1:] == 0] = np.nan
+        if utc_ns is not None:
+            seconds = np.diff(utc_ns) / NS_PER_SECOND
+            with np.errstate(invalid='ignore', divide='ignore'):
+                speed[1:] = np.where(seconds > 0, step[1:] / seconds, np.nan)
+    cumulative = np.cumsum(np.nan_to_num(step))
+    duration = (int(utc_ns[-1]) - int(utc_ns[0])) / NS_PER_SECOND if utc_ns is not None and count else 0.0
+    return {
+        'step': step,
+        'distance': cumulative,
+        'speed': speed,
+        'heading': heading,
+        'total_distance': float(cumulative[-1]) if count else 0.0,
+        'duration': duration,
+        'mean_speed': float(cumulative[-1]) / duration if duration > 0 else np.nan,
+        'max_speed': float(np.nanmax(speed)) if count > 1 and not np.isnan(speed).all() else np.nan,
+    }
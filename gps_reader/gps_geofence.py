@@ -0,0 +1,311 @@
+import json
+import math
+from gps_sinks import Sink
+from gps_time import NS_PER_SECOND
+
+CELL_SIZE = 0.01  # Degrees per side of the finest grid cell (about 1.1 km of latitude)
+LEVEL_FACTOR = 8  # Each coarser grid level has cells this many times larger
+LEVELS = 6  # 0.01 to 327.68 degrees, so any fence fits some level
+MAX_CELLS = 64  # A fence is indexed at the finest level where its bounding box covers at most this many cells
+DWELL_SECONDS = 300.0  # Time inside a fence before a dwell event
+METERS_PER_DEGREE = 111195.0  # Of latitude, on a sphere of the mean Earth radius
+
+
+class CircleFence:
+    def __init__(self, fence_id, latitude, longitude, radius, name=None, dwell=None):
+        """
+        A circular fence of radius meters around (latitude, longitude) in degrees. It may cross the
+        180th meridian, in which case its bounds run past +-180 degrees.
+        dwell overrides the engine's dwell time (seconds) for this fence.
+        """
+        self.fence_id = fence_id
+        self.name = name or str(fence_id)
+        self.dwell = dwell
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+        self._scale = math.cos(math.radians(latitude))
+        self._radius2 = (radius / METERS_PER_DEGREE) ** 2
+        half_lat = radius / METERS_PER_DEGREE
+        half_lon = half_lat / max(self._scale, 1e-6)
+        self.bounds = (latitude - half_lat, longitude - half_lon, latitude + half_lat, longitude + half_lon)
+
+    def contains(self, latitude, longitude):
+        east = ((longitude - self.longitude + 180.0) % 360.0 - 180.0) * self._scale
+        north = latitude - self.latitude
+        return east * east + north * north <= self._radius2
+
+
+def _lon_ranges(min_lon, max_lon):
+    # Longitude ranges of a bounding box, split where it crosses the 180th meridian
+    if max_lon - min_lon >= 360.0:
+        return [(-180.0, 180.0)]
+    if min_lon < -180.0:
+        return [(min_lon + 360.0, 180.0), (-180.0, max_lon)]
+    if max_lon > 180.0:
+        return [(min_lon, 180.0), (-180.0, max_lon - 360.0)]
+    return [(min_lon, max_lon)]
+
+
+def _ring(points):
+    # Edges as (lat1, lon1, lat2, lon2), the ring closed if it is not already
+    points = [(float(lat), float(lon)) for lat, lon in points]
+    if points[0] == points[-1]:
+        points = points[:-1]
+    return [(*points[i - 1], *points[i]) for i in range(len(points))]
+
+
+def _inside(edges, latitude, longitude):
+    # Even-odd ray casting along increasing longitude
+    inside = False
+    for lat1, lon1, lat2, lon2 in edges:
+        if (lat1 > latitude) != (lat2 > latitude):
+            if longitude < lon1 + (latitude - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                inside = not inside
+    return inside
+
+
+class PolygonFence:
+    def __init__(self, fence_id, points, holes=(), name=None, dwell=None):
+        """
+        A polygon fence from (latitude, longitude) vertices in degrees, with optional holes (lists of
+        vertices). Polygons must not cross the 180th meridian.
+        """
+        self.fence_id = fence_id
+        self.name = name or str(fence_id)
+        self.dwell = dwell
+        if len(points) < 3:
+            raise ValueError(f"fence {fence_id}: a polygon needs at least 3 points")
+        self.edges = _ring(points)
+        self.holes = [_ring(hole) for hole in holes]
+        latitudes = [lat for lat, _ in points]
+        longitudes = [lon for _, lon in points]
+        self.bounds = (min(latitudes), min(longitudes), max(latitudes), max(longitudes))
+
+    def contains(self, latitude, longitude):
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        if not (min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon):
+            return False
+        if not _inside(self.edges, latitude, longitude):
+            return False
+        return not any(_inside(hole, latitude, longitude) for hole in self.holes)
+
+
+class GeofenceEvent:
+    __slots__ = ('kind', 'device', 'fence', 'utc_ns', 'fix')
+
+    def __init__(self, kind, device, fence, utc_ns, fix=None):
+        """
+        kind is "enter", "exit" or "dwell"; fence is the CircleFence or PolygonFence.
+        """
+        self.kind = kind
+        self.device = device
+        self.fence = fence
+        self.utc_ns = utc_ns
+        self.fix = fix
+
+    def __repr__(self):
+        return f"GeofenceEvent({self.kind!r}, {self.device!r}, {self.fence.fence_id!r}, {self.utc_ns})"
+
+
+class _DeviceState:
+    __slots__ = ('inside', 'cell', 'candidates', 'version')
+
+    def __init__(self):
+        self.inside = {}  # fence_id -> [entered utc_ns, dwell reported]
+        self.cell = None  # finest grid cell of the last position
+        self.candidates = ()  # fences indexed in that cell at any level
+        self.version = -1  # engine version the candidates were collected at
+
+
+class GeofenceEngine:
+    def __init__(self, cell_size=CELL_SIZE, dwell=DWELL_SECONDS, on_event=None):
+        """
+        Enter, exit and dwell events for many devices against many fences.
+        Fences are indexed in a hierarchical grid: each is stored in the cells its bounding box
+        overlaps at the finest level where that is at most MAX_CELLS cells. For each fix, only the
+        fences indexed in the fix's cells are tested, and the list of them is reused while a device
+        stays in the same cell, so the cost per fix depends on how many fences are near the device,
+        not on how many there are.
+        on_event, if given, is called with each GeofenceEvent.
+        """
+        self.cell_size = cell_size
+        self.dwell = dwell
+        self.on_event = on_event
+        self.fences = {}
+        self.devices = {}
+        self.version = 0
+        self._grids = [{} for _ in range(LEVELS)]
+        self._cells = {}  # fence_id -> (level, list of cell keys)
+
+    def _level_cells(self, bounds):
+        min_lat, min_lon, max_lat, max_lon = bounds
+        ranges = _lon_ranges(min_lon, max_lon)
+        size = self.cell_size
+        for level in range(LEVELS):
+            low_i, high_i = math.floor(min_lat / size), math.floor(max_lat / size)
+            spans = [(math.floor(low / size), math.floor(high / size)) for low, high in ranges]
+            columns = sum(high_j - low_j + 1 for low_j, high_j in spans)
+            if (high_i - low_i + 1) * columns <= MAX_CELLS or level == LEVELS - 1:
+                # Both sides of the meridian can share a cell at the coarsest levels
+                columns = sorted({j for low_j, high_j in spans for j in range(low_j, high_j + 1)})
+                return level, [(i, j) for i in range(low_i, high_i + 1) for j in columns]
+            size *= LEVEL_FACTOR
+
+    def add(self, fence):
+        """
+        Add a CircleFence or PolygonFence, replacing any fence with the same id.
+        """
+        if fence.fence_id in self.fences:
+            self.remove(fence.fence_id)
+        level, cells = self._level_cells(fence.bounds)
+        grid = self._grids[level]
+        for cell in cells:
+            grid.setdefault(cell, []).append(fence)
+        self.fences[fence.fence_id] = fence
+        self._cells[fence.fence_id] = (level, cells)
+        self.version += 1
+        return fence
+
+    def remove(self, fence_id):
+        fence = self.fences.pop(fence_id, None)
+        if fence is None:
+            return None
+        level, cells = self._cells.pop(fence_id)
+        grid = self._grids[level]
+        for cell in cells:
+            members = grid[cell]
+            members.remove(fence)
+            if not members:
+                del grid[cell]
+        for state in self.devices.values():
+            state.inside.pop(fence_id, None)
+        self.version += 1
+        return fence
+
+    def load_geojson(self, source):
+        """
+        Add the fences of a GeoJSON FeatureCollection (a path, a JSON string or a dict): Polygon and
+        MultiPolygon features (each part of a MultiPolygon becomes a fence "<id>/<n>"), and Point
+        features with a "radius" property in meters. The id is the feature's "id", or its "id" or "name"
+        property; a "dwell" property sets the fence's dwell time. Returns the number of fences added.
+        """
+        if isinstance(source, dict):
+            collection = source
+        elif source.lstrip().startswith('{'):
+            collection = json.loads(source)
+        else:
+            with open(source) as geojson_file:
+                collection = json.load(geojson_file)
+        features = collection.get('features', [collection])
+        added = 0
+        for number, feature in enumerate(features):
+            properties = feature.get('properties') or {}
+            fence_id = feature.get('id', properties.get('id', properties.get('name', number)))
+            name = properties.get('name')
+            dwell = properties.get('dwell')
+            geometry = feature.get('geometry') or {}
+            kind = geometry.get('type')
+            coordinates = geometry.get('coordinates')
+            # GeoJSON positions are [longitude, latitude]
+            if kind == 'Point' and 'radius' in properties:
+                lon, lat = coordinates[:2]
+                self.add(CircleFence(fence_id, lat, lon, float(properties['radius']), name, dwell))
+                added += 1
+            elif kind in ('Polygon', 'MultiPolygon'):
+                parts = [coordinates] if kind == 'Polygon' else coordinates
+                for part_number, rings in enumerate(parts):
+                    rings = [[(lat, lon) for lon, lat, *_ in ring] for ring in rings]
+                    part_id = fence_id if kind == 'Polygon' else f"{fence_id}/{part_number}"
+                    self.add(PolygonFence(part_id, rings[0], rings[1:], name, dwell))
+                    added += 1
+            else:
+                print(f"Skipping geofence feature {fence_id}: unsupported geometry {kind}")
+        return added
+
+    def candidates(self, latitude, longitude):
+        """
+        The fences indexed in the grid cells of a position (a superset of those containing it).
+        """
+        size = self.cell_size
+        i = math.floor(latitude / size)
+        j = math.floor(longitude / size)
+        found = []
+        for grid in self._grids:
+            if grid:
+                members = grid.get((i, j))
+                if members:
+                    found.extend(members)
+            i //= LEVEL_FACTOR
+            j //= LEVEL_FACTOR
+        return found
+
+    def check(self, device, fix):
+        """
+        Test one gps_epoch.Fix of device; returns the list of events it caused.
+        Fixes without a position cause no events.
+        """
+        if fix.latitude is None or fix.longitude is None:
+            return []
+        return self.check_position(device, fix.latitude, fix.longitude, fix.utc_ns, fix)
+
+    def check_position(self, device, latitude, longitude, utc_ns=None, fix=None):
+        state = self.devices.get(device)
+        if state is None:
+            state = self.devices[device] = _DeviceState()
+        cell = (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+        if cell != state.cell or state.version != self.version:
+            state.cell = cell
+            state.candidates = self.candidates(latitude, longitude)
+            state.version = self.version
+
+        events = []
+        inside = state.inside
+        now_inside = set()
+        for fence in state.candidates:
+            if fence.contains(latitude, longitude):
+                fence_id = fence.fence_id
+                now_inside.add(fence_id)
+                entry = inside.get(fence_id)
+                if entry is None:
+                    inside[fence_id] = [utc_ns, False]
+                    events.append(GeofenceEvent("enter", device, fence, utc_ns, fix))
+                elif not entry[1] and utc_ns is not None and entry[0] is not None:
+                    dwell = self.dwell if fence.dwell is None else fence.dwell
+                    if dwell is not None and (utc_ns - entry[0]) >= dwell * NS_PER_SECOND:
+                        entry[1] = True
+                        events.append(GeofenceEvent("dwell", device, fence, utc_ns, fix))
+        if len(now_inside) != len(inside):
+            for fence_id in [fence_id for fence_id in inside if fence_id not in now_inside]:
+                del inside[fence_id]
+                events.append(GeofenceEvent("exit", device, self.fences[fence_id], utc_ns, fix))
+        if events and self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def inside(self, device):
+        """
+        The fences device is currently inside.
+        """
+        state = self.devices.get(device)
+        return [] if state is None else [self.fences[fence_id] for fence_id in state.inside]
+
+
+class GeofenceSink(Sink):
+    def __init__(self, engine, device="gps", clock=None, target=None, **kwargs):
+        """
+        Output sink that checks every fix against the engine's fences and prints the events,
+        e.g. in the sinks list of main.py.
+        """
+        Sink.__init__(self, target, **kwargs)
+        self.engine = engine
+        self.device = device
+        self.clock = clock
+
+    def write_fix(self, fix):
+        for event in self.engine.check(self.device, fix):
+            when = event.utc_ns
+            if self.clock is not None and when is not None:
+                when = self.clock.format_local(when)
+            self._append(f"Geofence {event.kind.upper()}: {event.fence.name} ({event.device}) at {when}\n")
@@ -0,0 +1,106 @@
+import numpy as np  # install this module using command in the terminal "pip install numpy"
+from gps_time import NS_PER_SECOND
+
+HISTORY_SIZE = 3600  # Fixes kept by default (one hour at 1 Hz)
+
+MISSING = -1  # Stored for missing counts; missing numbers are NaN and a missing status is b''
+
+FIX_DTYPE = np.dtype([
+    ('utc_ns', 'i8'), ('latitude', 'f8'), ('longitude', 'f8'), ('altitude', 'f4'),
+    ('speed', 'f4'), ('course', 'f4'), ('hdop', 'f4'), ('status', 'S1'),
+    ('quality', 'i1'), ('num_sats', 'i1'), ('fix_type', 'i1'),
+])
+
+
+def _number(value):
+    return np.nan if value is None else value
+
+
+def _count(value):
+    return MISSING if value is None else value
+
+
+class FixHistory:
+    def __init__(self, capacity=HISTORY_SIZE):
+        """
+        The last capacity fixes in a preallocated NumPy structured array (see FIX_DTYPE).
+        Every fix is written twice, capacity rows apart, so the most recent fixes are always one
+        contiguous slice: last() and between() return views, not copies, and appending never allocates.
+        Fixes are expected in time order, as a receiver sends them.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.records = np.zeros(2 * capacity, dtype=FIX_DTYPE)
+        self.head = 0  # row the next fix is written to (0 <= head < capacity)
+        self.count = 0  # fixes currently held, at most capacity
+        self.total = 0  # fixes appended since creation
+
+    def __len__(self):
+        return self.count
+
+    def append(self, fix):
+        """
+        Store a gps_epoch.Fix. Fixes without a time are skipped, as they cannot be placed in a window.
+        Returns True if the fix was stored.
+        """
+        if fix.utc_ns is None:
+            return False
+        self.append_values(fix.utc_ns, fix.latitude, fix.longitude, fix.altitude, fix.speed, fix.course,
+                           fix.hdop, fix.status, fix.quality, fix.num_sats, fix.fix_type)
+        return True
+
+    def append_values(self, utc_ns, latitude, longitude, altitude=None, speed=None, course=None, hdop=None,
+                      status=None, quality=None, num_sats=None, fix_type=None):
+        row = (utc_ns, _number(latitude), _number(longitude), _number(altitude), _number(speed),
+               _number(course), _number(hdop), status or b'', _count(quality), _count(num_sats),
+               _count(fix_type))
+        head = self.head
+        self.records[head] = row
+        self.records[head + self.capacity] = row
+        head += 1
+        self.head = 0 if head == self.capacity else head
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def last(self, n=None):
+        """
+        The last n fixes (all held fixes if n is None), oldest first, as a view into the buffer.
+        The view is overwritten as new fixes arrive; copy() it to keep it.
+        """
+        if n is None or n > self.count:
+            n = self.count
+        end = self.head + self.capacity
+        return self.records[end - n:end]
+
+    def latest(self):
+        """
+        The most recent fix as a record, or None when the history is empty.
+        """
+        if not self.count:
+            return None
+        return self.records[self.head + self.capacity - 1]
+
+    def between(self, start_ns, end_ns=None):
+        """
+        Fixes with start_ns <= utc_ns < end_ns (no upper bound if end_ns is None), as a view.
+        """
+        window = self.last()
+        times = window['utc_ns']
+        first = np.searchsorted(times, start_ns, side='left')
+        stop = len(times) if end_ns is None else np.searchsorted(times, end_ns, side='left')
+        return window[first:stop]
+
+    def since(self, seconds):
+        """
+        Fixes from the last seconds before the most recent one, as a view.
+        """
+        latest = self.latest()
+        if latest is None:
+            return self.last(0)
+        return self.between(int(latest['utc_ns']) - int(seconds * NS_PER_SECOND))
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
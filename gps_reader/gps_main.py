@@ -1,41 +1,32 @@
-import serial  # install this module using command in the terminal "pip install pyserial"
-from gps_reader import GPSReader
+from gps_snapshot import GPSReaderThread
 
 # Serial port and baud rate
 SERIAL_PORT = "COM16"  # Com port where the GPS Module is connected
 BAUD_RATE = 9600  # Default baud rate for many GPS modules
 
-# Initialize GPSReader
-gps_reader = GPSReader()
+# Read and decode the GPS data in a background thread; each complete fix is published to gps_thread.latest
+gps_thread = GPSReaderThread(SERIAL_PORT, BAUD_RATE)
+clock = gps_thread.reader.clock
+gps_thread.start()
 
-# Establish serial connection
+# Print every new fix. Other threads can call gps_thread.latest.get() at any time without blocking the reader.
 try:
-    gps_serial = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    print(f"Listening to GPS data on {SERIAL_PORT} at {BAUD_RATE} baud.")
-except serial.SerialException as e:
-    print(f"Error connecting to GPS: {e}")
-    gps_serial = None
-
-# Read data continuously
-try:
-    while gps_serial and gps_serial.is_open:
-        if gps_serial.in_waiting > 0:
-            line = gps_serial.readline().decode('ascii', errors='ignore').strip()
-            if line.startswith('$'):
-                # Parse the GPS data
-                if gps_reader.parse_gps_data(line):
-                    # Access and print individual parameters from GPSReader
-                    print(f"Time (UTC): {gps_reader.get_utc_time().strftime('%H:%M:%S+00:00')}")
-                    print(f"Zone Time: {gps_reader.get_local_time().strftime('%H:%M:%S')}")
-                    print(f"Status: {gps_reader.get_status()}")
-                    print(f"Latitude: {gps_reader.get_latitude()} N")
-                    print(f"Longitude: {gps_reader.get_longitude()} E")
-                    print(f"Speed (knots): {gps_reader.get_speed()}")
-                    print(f"Date: {gps_reader.get_date()}")
-                    print(" ")
+    seq = 0
+    while gps_thread.is_alive():
+        fix = gps_thread.latest.wait_newer(seq, timeout=1)
+        if fix is None:
+            continue
+        seq = fix.seq
+        if fix.utc_ns is not None:
+            print(f"Time (UTC): {clock.utc_datetime(fix.utc_ns).strftime('%H:%M:%S+00:00')}")
+            print(f"Zone Time: {clock.format_local(fix.utc_ns)}")
+        print(f"Status: {'Active' if fix.status == 'A' else 'Void'}")
+        print(f"Latitude: {fix.latitude} N")
+        print(f"Longitude: {fix.longitude} E")
+        print(f"Speed (knots): {fix.speed}")
+        print(f"Date: {fix.date}")
+        print(" ")
 except KeyboardInterrupt:
     print("\nExiting...")
 finally:
-    if gps_serial and gps_serial.is_open:
-        gps_serial.close()
-        print("Disconnected from GPS.")
+    gps_thread.stop()
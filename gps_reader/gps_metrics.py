@@ -0,0 +1,172 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pynmea2
+
+STAGES = ('read', 'frame', 'parse', 'convert', 'emit')  # Timed stages of the read -> emit path
+SUB_BITS = 4  # Each power of two is split into 2**SUB_BITS buckets (about 6% precision)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+METRICS_PORT = 9108  # Local port of the optional Prometheus endpoint
+
+_SUB = 1 << SUB_BITS
+_EXACT = 2 * _SUB  # Values below this get a bucket each
+
+
+def _bucket_bounds(index):
+    """
+    Lowest and highest value counted in bucket index.
+    """
+    if index < _EXACT:
+        return index, index
+    shift = (index >> SUB_BITS) - 1
+    low = ((index & (_SUB - 1)) + _SUB) << shift
+    return low, low + (1 << shift) - 1
+
+
+class Histogram:
+    def __init__(self):
+        """
+        HDR-style histogram of nanosecond durations: log-linear buckets with a fixed relative
+        precision, so recording is a few integer operations and memory does not grow with the count.
+        """
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < _EXACT:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - SUB_BITS - 1
+            index = ((shift + 1) << SUB_BITS) + (value >> shift) - _SUB
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """
+        Value below which fraction (0..1) of the recorded durations fall, to the bucket precision.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def snapshot(self):
+        result = {'count': self.count, 'sum_ns': self.total, 'max_ns': self.max,
+                  'mean_ns': self.total / self.count if self.count else 0}
+        for q in QUANTILES:
+            result[f'p{q * 100:g}_ns'] = self.percentile(q)
+        return result
+
+    def reset(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Counters and per-stage latency histograms for one GPS stream.
+        Pass it as metrics= to the readers; they only call into it when one is given.
+        """
+        self.started = time.time()
+        self.reads = 0
+        self.bytes_read = 0
+        self.frames = 0
+        self.discarded_lines = 0  # lines without a '$'
+        self.carryovers = 0  # reads that ended in the middle of a sentence
+        self.overflows = 0  # partial frames dropped for exceeding the maximum sentence length
+        self.checksum_errors = 0
+        self.parse_errors = 0  # other ParseErrors
+        self.sentences = {}  # decoded sentences by type
+        self.stages = {name: Histogram() for name in STAGES}
+
+    def count_sentence(self, sentence_type):
+        self.sentences[sentence_type] = self.sentences.get(sentence_type, 0) + 1
+
+    def count_error(self, error):
+        if isinstance(error, pynmea2.ChecksumError):
+            self.checksum_errors += 1
+        else:
+            self.parse_errors += 1
+
+    def snapshot(self):
+        """
+        All counters and histogram summaries as a plain dict.
+        """
+        return {
+            'uptime_s': time.time() - self.started,
+            'reads': self.reads,
+            'bytes_read': self.bytes_read,
+            'frames': self.frames,
+            'discarded_lines': self.discarded_lines,
+            'carryovers': self.carryovers,
+            'overflows': self.overflows,
+            'checksum_errors': self.checksum_errors,
+            'parse_errors': self.parse_errors,
+            'sentences': dict(self.sentences),
+            'stages': {name: histogram.snapshot() for name, histogram in self.stages.items()},
+        }
+
+    def prometheus(self, prefix='gps'):
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name in ('reads', 'bytes_read', 'frames', 'discarded_lines', 'carryovers', 'overflows',
+                     'checksum_errors', 'parse_errors'):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {getattr(self, name)}")
+        lines.append(f"# TYPE {prefix}_sentences_total counter")
+        for sentence_type, count in sorted(self.sentences.items()):
+            lines.append(f'{prefix}_sentences_total{{type="{sentence_type}"}} {count}')
+        lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for name, histogram in self.stages.items():
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q:g}"}} '
+                             f'{histogram.percentile(q) / 1e9:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {histogram.total / 1e9:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(metrics, port=METRICS_PORT, host='127.0.0.1'):
+    """
+    Serve metrics at http://host:port/metrics from a background thread. Returns the server;
+    call shutdown() on it to stop.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, name="gps-metrics", daemon=True).start()
+    return server
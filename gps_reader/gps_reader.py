@@ -1,48 +1,115 @@
+import time
 import pynmea2 # install this module using command in the terminal "pip install pynmea2"
-from datetime import datetime, timedelta, timezone # pre-installed library
+import nmea_fast
+from gps_time import GPSClock, DEFAULT_TIME_ZONE
+from gps_epoch import EpochAssembler, position
+from ubx import UBXAssembler
+
+
+def parse_pynmea2(line):
+    # pynmea2 only takes str lines; frames from read_frames are bytes
+    if isinstance(line, bytes):
+        line = line.decode('ascii', errors='ignore')
+    return pynmea2.parse(line)
+
 
 class GPSReader:
-    def __init__(self):
+    def __init__(self, use_fast_decoder=True, time_zone=DEFAULT_TIME_ZONE, history=None,
+                 metrics=None):
+        # nmea_fast decodes the common sentence types itself and falls back to pynmea2 for the rest
+        self.decode = nmea_fast.parse if use_fast_decoder else parse_pynmea2
+        # Time zone for local time, e.g. "Asia/Kolkata" (change this for other zones)
+        self.clock = GPSClock(time_zone)
+        # Merges the GGA/RMC/GSA/GSV/VTG sentences of each time step into one Fix (see get_fix)
+        self.assembler = EpochAssembler(self.clock)
+        self.fix = None
+        # Builds the same Fix records from u-blox UBX messages (see parse_ubx)
+        self.ubx = UBXAssembler()
+        # Optional fixed-size history of the last `history` fixes (needs numpy, see gps_history.py)
+        self.history = None
+        if history:
+            from gps_history import FixHistory
+            self.history = FixHistory(history)
+        # Optional gps_metrics.Metrics: sentence and error counts, parse and convert timings
+        self.metrics = metrics
         self.latitude = None
         self.longitude = None
         self.speed = None
-        self.utc_time = None
-        self.local_time = None
+        self.utc_ns = None  # UTC time of the last fix as epoch nanoseconds
         self.status = None
         self.date = None
 
+    @property
+    def utc_time(self):
+        # datetime objects are only built when asked for
+        return None if self.utc_ns is None else self.clock.utc_datetime(self.utc_ns)
+
+    @property
+    def local_time(self):
+        return None if self.utc_ns is None else self.clock.local_datetime(self.utc_ns)
+
     def get_zone_time(self, utc_time):
         """
-        Convert UTC time to local time using a predefined time zone offset.
-        Modify the offset as per your local time zone.
+        Convert an aware UTC datetime to local time in the reader's time zone.
         """
-        local_offset = timedelta(hours=5, minutes=30)  # Change this for other zones
-        local_time = utc_time + local_offset
-        return local_time
+        return utc_time.astimezone(self.clock.tz)
 
     def parse_gps_data(self, line):
         """
         Parse and extract individual GPS data parameters.
         """
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
         try:
-            msg = pynmea2.parse(line)
+            msg = self.decode(line)
+            if metrics is not None:
+                parsed = time.perf_counter_ns()
+                metrics.stages['parse'].record(parsed - start)
+                metrics.count_sentence(msg.sentence_type)
+            fix = self.assembler.add(msg)
+            if fix is not None:
+                self.fix = fix
+                if self.history is not None:
+                    self.history.append(fix)
 
             if msg.sentence_type == "RMC":
                 # Extract and store data
-                self.utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                self.local_time = self.get_zone_time(self.utc_time)
+                self.utc_ns = self.clock.update(msg)
                 self.status = 'Active' if msg.status == 'A' else 'Void'
-                self.latitude = msg.latitude
-                self.longitude = msg.longitude
+                self.latitude, self.longitude = position(msg) or (None, None)
                 self.speed = msg.spd_over_grnd
                 self.date = msg.datestamp
 
-                return True  # Successfully parsed and updated the data
-            return False
-        except pynmea2.ParseError as e:
+            if metrics is not None:
+                metrics.stages['convert'].record(time.perf_counter_ns() - parsed)
+            return msg.sentence_type == "RMC"  # True when the data was updated
+        except (pynmea2.ParseError, ValueError) as e:
+            # ValueError: a field that pynmea2 cannot convert, counted like any other bad sentence
+            if metrics is not None:
+                metrics.count_error(e)
             print(f"Error parsing data: {e}")
             return False
 
+    def parse_ubx(self, msg):
+        """
+        Update the reader from a decoded UBX message (see ubx.read_ubx). A NAV-PVT message fills
+        everything a GGA+RMC+GSA+VTG epoch would.
+        """
+        fix = self.ubx.add(msg)
+        if fix is None:
+            return False
+        self.fix = fix
+        if self.history is not None:
+            self.history.append(fix)
+        self.utc_ns = fix.utc_ns
+        self.status = 'Active' if fix.status == 'A' else 'Void'
+        self.latitude = fix.latitude
+        self.longitude = fix.longitude
+        self.speed = fix.speed
+        self.date = fix.date
+        return True
+
     def get_latitude(self):
         return self.latitude
 
@@ -63,3 +130,15 @@ class GPSReader:
 
     def get_date(self):
         return self.date
+
+    def get_fix(self):
+        # Last complete epoch: position, altitude, satellites and DOP from the same time step
+        return self.fix
+
+    def get_history(self, n=None):
+        # Last n fixes as a NumPy structured array view (oldest first), or None without a history
+        return None if self.history is None else self.history.last(n)
+
+    def get_history_since(self, seconds):
+        # Fixes from the last `seconds` seconds, as a view
+        return None if self.history is None else self.history.since(seconds)
@@ -0,0 +1,127 @@
+from array import array
+
+MISSING = -1  # Stored for empty elevation/azimuth/SNR fields (SNR is empty when a satellite is not tracked)
+
+
+def _int(text):
+    return int(text) if text and text.isdigit() else MISSING
+
+
+class Constellation:
+    def __init__(self, talker):
+        """
+        Satellites in view of one talker (GP, GL, GA, BD...), kept in parallel typed arrays that are
+        updated in place as the parts of each GSV burst arrive.
+        """
+        self.talker = talker
+        self.prn = array('H')
+        self.elevation = array('h')
+        self.azimuth = array('h')
+        self.snr = array('h')
+        self._seen = array('L')  # burst number in which each slot was last reported
+        self.slots = {}  # PRN -> index in the arrays
+        self.burst = 0
+        self.in_view = 0  # satellite count the receiver announces in the burst
+        self.complete = False  # True once the last part of the latest burst has arrived
+
+    def __len__(self):
+        return len(self.prn)
+
+    def update(self, data):
+        """
+        Apply one GSV sentence, given as its data fields. Returns True when it completes a burst.
+        """
+        num_messages = _int(data[0])
+        msg_num = _int(data[1])
+        if msg_num == 1:
+            self.burst += 1
+            self.complete = False
+        self.in_view = _int(data[2])
+
+        burst = self.burst
+        slots = self.slots
+        for i in range(3, len(data) - 3, 4):
+            prn = _int(data[i])
+            if prn == MISSING:
+                continue
+            slot = slots.get(prn)
+            if slot is None:
+                slot = slots[prn] = len(self.prn)
+                self.prn.append(prn)
+                self.elevation.append(MISSING)
+                self.azimuth.append(MISSING)
+                self.snr.append(MISSING)
+                self._seen.append(burst)
+            self.elevation[slot] = _int(data[i + 1])
+            self.azimuth[slot] = _int(data[i + 2])
+            self.snr[slot] = _int(data[i + 3])
+            self._seen[slot] = burst
+
+        if msg_num != MISSING and msg_num == num_messages:
+            self._drop_unseen()
+            self.complete = True
+            return True
+        return False
+
+    def _drop_unseen(self):
+        """
+        Remove satellites that were not reported in the burst that just completed.
+        """
+        seen = self._seen
+        burst = self.burst
+        if all(s == burst for s in seen):
+            return
+        keep = [i for i, s in enumerate(seen) if s == burst]
+        for name in ('prn', 'elevation', 'azimuth', 'snr', '_seen'):
+            values = getattr(self, name)
+            setattr(self, name, array(values.typecode, (values[i] for i in keep)))
+        self.slots = {prn: i for i, prn in enumerate(self.prn)}
+
+    def satellites(self):
+        """
+        Yield (prn, elevation, azimuth, snr) tuples, for display.
+        """
+        return zip(self.prn, self.elevation, self.azimuth, self.snr)
+
+
+class SkyView:
+    def __init__(self):
+        """
+        Satellites in view across all constellations, keyed by talker and PRN.
+        """
+        self.constellations = {}
+
+    def update(self, msg):
+        """
+        Apply a decoded GSV sentence (nmea_fast or pynmea2).
+        Returns True when it was the last part of a burst, i.e. that constellation's table is complete.
+        """
+        constellation = self.constellations.get(msg.talker)
+        if constellation is None:
+            constellation = self.constellations[msg.talker] = Constellation(msg.talker)
+        return constellation.update(msg.data)
+
+    @property
+    def complete(self):
+        return bool(self.constellations) and all(c.complete for c in self.constellations.values())
+
+    def satellites_in_view(self):
+        return sum(len(c) for c in self.constellations.values())
+
+    def count_above(self, snr_threshold):
+        """
+        Number of satellites tracked with an SNR (C/N0, dB-Hz) of at least snr_threshold.
+        """
+        return sum(1 for c in self.constellations.values() for snr in c.snr if snr >= snr_threshold)
+
+    def mean_snr(self):
+        """
+        Mean C/N0 over the tracked satellites, or None when none is tracked.
+        """
+        total = count = 0
+        for c in self.constellations.values():
+            for snr in c.snr:
+                if snr != MISSING:
+                    total += snr
+                    count += 1
+        return total / count if count else None
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+import serial  # install this module using command in the terminal "pip install pyserial"
+import pynmea2
+import nmea_fast
+from gps_epoch import EpochAssembler
+from nmea_stream import NMEAFramer, READ_CHUNK_SIZE
+
+CLIENT_BUFFER = 64 * 1024  # Bytes queued for one client before its messages are dropped
+POLL_INTERVAL = 0.01  # Seconds between reads of sources that have no file descriptor
+MAX_REQUEST = 4096  # Longest subscription line accepted from a client
+BACKLOG = 1024  # Pending connections; hundreds of clients may connect at once when the server starts
+UNIX_PATH = "/tmp/gps.sock"
+TCP_ADDRESS = ("127.0.0.1", 2948)
+MULTICAST_ADDRESS = ("239.255.0.48", 5048)
+MULTICAST_TTL = 1  # Keep multicast on the local network
+
+
+def _encode_fix(fix):
+    record = {"type": "fix"}
+    for name in fix.__slots__:
+        record[name] = getattr(fix, name)
+    return (json.dumps(record, separators=(',', ':'), default=str) + "\n").encode('utf-8')
+
+
+class Subscription:
+    __slots__ = ('types', 'raw', 'fixes', 'min_interval', 'last_sent')
+
+    def __init__(self, types=None, raw=True, fixes=False, min_interval=0.0):
+        """
+        What one client receives: raw sentences (of the given types, or all when types is None)
+        and/or decoded fixes as JSON lines, each kind at most once per min_interval seconds.
+        """
+        self.types = None if types is None else frozenset(types)
+        self.raw = raw
+        self.fixes = fixes
+        self.min_interval = min_interval
+        self.last_sent = {}  # sentence type (or "fix") -> monotonic time last sent
+
+    @classmethod
+    def from_request(cls, line):
+        """
+        Parse a client's subscription line, a JSON object such as
+        {"types": ["RMC", "GGA"], "raw": true, "fixes": true, "min_interval": 0.5}
+        where types may also be a single sentence type ("RMC"). Raises ValueError or TypeError for
+        anything else.
+        """
+        request = json.loads(line)
+        types = request.get("types")
+        if isinstance(types, str):
+            types = [types]
+        elif types is not None and (not isinstance(types, list) or not all(isinstance(t, str) for t in types)):
+            raise TypeError(f"types must be a sentence type or a list of them, not {types!r}")
+        return cls(types, bool(request.get("raw", True)), bool(request.get("fixes", False)),
+                   float(request.get("min_interval", 0.0)))
+
+    def wants(self, kind, now):
+        if kind == "fix":
+            if not self.fixes:
+                return False
+        elif not self.raw or (self.types is not None and kind not in self.types):
+            return False
+        if self.min_interval:
+            last = self.last_sent.get(kind)
+            if last is not None and now - last < self.min_interval:
+                return False
+            self.last_sent[kind] = now
+        return True
+
+
+class ClientProtocol(asyncio.Protocol):
+    def __init__(self, server):
+        """
+        One connected client (Unix socket or TCP). It may send a subscription line at any time;
+        until it does, it receives every raw sentence.
+        """
+        self.server = server
+        self.subscription = Subscription()
+        self.transport = None
+        self.sent = 0
+        self.dropped = 0
+        self._request = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.clients.add(self)
+
+    def connection_lost(self, exc):
+        self.server.clients.discard(self)
+
+    def data_received(self, data):
+        self._request += data
+        while b'\n' in self._request:
+            line, _, rest = bytes(self._request).partition(b'\n')
+            self._request = bytearray(rest)
+            if line.strip():
+                try:
+                    self.subscription = Subscription.from_request(line)
+                except (ValueError, TypeError, AttributeError) as e:
+                    self.transport.write((json.dumps({"error": f"bad subscription: {e}"}) + "\n").encode('utf-8'))
+        if len(self._request) > MAX_REQUEST:
+            self.transport.close()
+
+    def send(self, kind, data, now):
+        if not self.subscription.wants(kind, now):
+            return
+        # A client that does not keep up loses messages instead of holding up the others
+        if self.transport.get_write_buffer_size() + len(data) > self.server.client_buffer:
+            self.dropped += 1
+            return
+        self.transport.write(data)
+        self.sent += 1
+
+
+class GPSServer:
+    def __init__(self, source=None, serial_port=None, baud_rate=9600, client_buffer=CLIENT_BUFFER,
+                 decode=nmea_fast.parse, multicast_subscription=None):
+        """
+        Own one GPS port, decode it once and broadcast raw sentences and decoded fixes to many local
+        clients over Unix domain sockets, TCP and UDP multicast.
+        Pass an open serial-like source, or serial_port and baud_rate to open one.
+        multicast_subscription (a Subscription) filters what is sent to the multicast group; by default
+        only the decoded fixes are sent.
+        """
+        self.source = source
+        self.serial_port = serial_port
+        self.baud_rate = baud_rate
+        self.client_buffer = client_buffer
+        self.decode = decode
+        self.framer = NMEAFramer()
+        self.assembler = EpochAssembler()
+        self.clients = set()
+        self.multicast_subscription = multicast_subscription or Subscription(raw=False, fixes=True)
+        self.sentences = 0
+        self.parse_errors = 0
+        self.fixes = 0
+        self.closed = None  # Future set when the source closes
+        self._servers = []
+        self._multicast = None
+        self._multicast_address = None
+        self._fd = None
+        self._poll_task = None
+        self._unix_path = None
+
+    async def start(self, unix_path=None, tcp_address=None, multicast_address=None):
+        """
+        Open the source and start listening on any of: a Unix socket path, a (host, port) TCP
+        address and a (group, port) multicast address.
+        """
+        loop = asyncio.get_running_loop()
+        self.closed = loop.create_future()
+        if self.source is None:
+            self.source = serial.Serial(self.serial_port, self.baud_rate, timeout=0)
+
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)  # left over from an earlier run
+            self._servers.append(await loop.create_unix_server(lambda: ClientProtocol(self), unix_path,
+                                                                 backlog=BACKLOG))
+            self._unix_path = unix_path
+        if tcp_address:
+            self._servers.append(await loop.create_server(lambda: ClientProtocol(self), *tcp_address,
+                                                            backlog=BACKLOG))
+        if multicast_address:
+            self._multicast = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            self._multicast.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, struct.pack('b', MULTICAST_TTL))
+            self._multicast.setblocking(False)
+            self._multicast_address = multicast_address
+
+        try:
+            fd = self.source.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None
+        if fd is not None:
+            self._fd = fd
+            loop.add_reader(fd, self._on_readable)
+        else:
+            self.source.timeout = 0
+            self._poll_task = loop.create_task(self._poll())
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"Serial error: {e}")
+            self._source_closed()
+            return
+        if not data:
+            self._source_closed()
+            return
+        self._handle(data)
+
+    async def _poll(self):
+        source = self.source
+        while source.is_open:
+            data = source.read(READ_CHUNK_SIZE)
+            if data:
+                self._handle(data)
+                # An unpaced source always has data: let the client writers and accept loop run
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+        self._source_closed()
+
+    def _handle(self, data):
+        """
+        Decode every frame once and hand the same encoded bytes to every client.
+        A sentence that does not decode, or has a field that does not convert (ValueError), is
+        counted in parse_errors and dropped; the rest of the chunk is still handled.
+        """
+        for frame in self.framer.feed(data):
+            try:
+                msg = self.decode(frame)
+                fix = self.assembler.add(msg)
+            except (pynmea2.ParseError, ValueError):
+                self.parse_errors += 1
+                continue
+            self.sentences += 1
+            self.broadcast(msg.sentence_type, frame + b'\r\n')
+            if fix is not None:
+                self.fixes += 1
+                self.broadcast("fix", _encode_fix(fix))
+
+    def broadcast(self, kind, data):
+        now = time.monotonic()
+        for client in tuple(self.clients):
+            client.send(kind, data, now)
+        if self._multicast is not None and self.multicast_subscription.wants(kind, now):
+            try:
+                self._multicast.sendto(data, self._multicast_address)
+            except (BlockingIOError, OSError):
+                pass  # datagrams are best effort
+
+    def _source_closed(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._fd = None
+        if self.closed is not None and not self.closed.done():
+            self.closed.set_result(None)
+
+    async def serve_forever(self):
+        """
+        Serve until the source closes.
+        """
+        await self.closed
+
+    async def close(self):
+        self._source_closed()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for client in tuple(self.clients):
+            client.transport.close()
+        if self._multicast is not None:
+            self._multicast.close()
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+        if self.source is not None and self.source.is_open:
+            self.source.close()
+
+
+def subscribe(address, types=None, raw=True, fixes=False, min_interval=0.0):
+    """
+    Connect to a GPSServer (a Unix socket path or a (host, port) tuple) and yield the lines it
+    sends as bytes: raw NMEA sentences and/or JSON fix records.
+    """
+    if isinstance(address, str):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client.connect(address)
+    request = {"types": types, "raw": raw, "fixes": fixes, "min_interval": min_interval}
+    client.sendall((json.dumps(request) + "\n").encode('utf-8'))
+    with client, client.makefile('rb') as lines:
+        yield from lines
+
+
+async def main(serial_port, baud_rate, unix_path, tcp_address, multicast_address):
+    server = GPSServer(serial_port=serial_port, baud_rate=baud_rate)
+    try:
+        await server.start(unix_path, tcp_address, multicast_address)
+    except (serial.SerialException, OSError) as e:
+        print(f"Error starting GPS server: {e}")
+        return
+    print(f"Serving {serial_port} on {', '.join(str(a) for a in (unix_path, tcp_address, multicast_address) if a)}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def address(text):
+        host, _, port = text.rpartition(":")
+        return host, int(port)
+
+    parser = argparse.ArgumentParser(description="Share one GPS port with many local clients.")
+    parser.add_argument("port", help="serial port of the GPS module, e.g. COM16 or /dev/ttyUSB0")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--unix", default=UNIX_PATH if hasattr(socket, 'AF_UNIX') else None,
+                        help="Unix socket path (empty to disable)")
+    parser.add_argument("--tcp", type=address, default=TCP_ADDRESS, help="host:port to listen on")
+    parser.add_argument("--multicast", type=address, nargs="?", const=MULTICAST_ADDRESS,
+                        help="group:port to send fixes to (239.255.0.48:5048 if given without a value)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.port, args.baud, args.unix or None, args.tcp, args.multicast))
+    except KeyboardInterrupt:
+        print("\nExiting...")
@@ -0,0 +1,260 @@
+import json
+import math
+import struct
+import sys
+import time
+
+FLUSH_BYTES = 8192  # Buffered output is written once it reaches this size...
+FLUSH_SECONDS = 0.25  # ...or when this much time has passed since the last write
+SEPARATOR = "/////////////////////////////////////////////////////////////////////"
+
+
+def _coordinates(msg):
+    # Decimal degrees, or the fields as received when they are malformed (reading them raises ValueError)
+    try:
+        return msg.latitude, msg.longitude
+    except (ValueError, TypeError):
+        return msg.lat, msg.lon
+
+
+class Sink:
+    empty = ''  # joins the buffered parts (b'' for binary sinks)
+    mode = 'w'
+
+    def __init__(self, target=None, max_bytes=FLUSH_BYTES, max_delay=FLUSH_SECONDS):
+        """
+        Base class for output sinks. Output is collected in memory and written to target
+        (a path or an open stream, stdout by default) in batches.
+        Subclasses implement any of write (decoded sentences), write_fix and write_error.
+        """
+        if isinstance(target, str):
+            self.stream = open(target, self.mode)
+            self._owns_stream = True
+        else:
+            self.stream = sys.stdout if target is None else target
+            self._owns_stream = False
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._parts = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, msg, utc_ns=None):
+        pass
+
+    def write_fix(self, fix):
+        pass
+
+    def write_error(self, line, error):
+        pass
+
+    def _append(self, data):
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= self.max_bytes or time.monotonic() - self._last_flush >= self.max_delay:
+            self.flush()
+
+    def flush_due(self):
+        """
+        Write out buffered output older than max_delay. Output is otherwise only checked on the next
+        write, so readers call this when the port goes quiet (see read_frames' idle).
+        """
+        if self._parts and time.monotonic() - self._last_flush >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.stream.write(self.empty.join(self._parts))
+            self._parts = []
+            self._size = 0
+            self.stream.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class ConsoleSink(Sink):
+    def __init__(self, clock=None, sky_view=None, target=None, separator=True, **kwargs):
+        """
+        Human-readable output, one block per sentence, in the format the readers always printed.
+        clock (gps_time.GPSClock) adds the local zone time; sky_view (gps_satellites.SkyView)
+        prints a full satellite table at the end of each GSV burst.
+        """
+        Sink.__init__(self, target, **kwargs)
+        self.clock = clock
+        self.sky_view = sky_view
+        self.separator = separator
+
+    def _zone_time(self, lines, utc_ns):
+        if utc_ns is not None and self.clock is not None:
+            lines.append(f"  Zone Time: {self.clock.format_local(utc_ns)} (Local)")
+
+    def write(self, msg, utc_ns=None):
+        kind = msg.sentence_type
+        if kind == "GGA":
+            lines = ["", "GPS Fix Data:", f"  Time (UTC): {msg.timestamp}"]
+            self._zone_time(lines, utc_ns)
+
+        elif kind == "RMC":
+            lines = ["", "Recommended Minimum Navigation Data:", f"  Time (UTC): {msg.timestamp}"]
+            self._zone_time(lines, utc_ns)
+            latitude, longitude = _coordinates(msg)
+            lines += [f"  Status: {'Active' if msg.status == 'A' else 'Void'}",
+                      f"  Latitude: {latitude} {msg.lat_dir}",
+                      f"  Longitude: {longitude} {msg.lon_dir}",
+                      f"  Speed (knots): {msg.spd_over_grnd}",
+                      f"  Date: {msg.datestamp}"]
+
+        elif kind == "GSA":
+            satellites_used = [sv for sv in (getattr(msg, f'sv_id{i:02d}', '') for i in range(1, 13)) if sv]
+            lines = ["", "Satellite Status:", f"  Mode: {msg.mode}", f"  Fix Type: {msg.mode_fix_type}",
+                     f"  Satellites Used: {', '.join(satellites_used) if satellites_used else 'Not available'}",
+                     f"  PDOP: {msg.pdop}, HDOP: {msg.hdop}, VDOP: {msg.vdop}"]
+
+        elif kind == "GSV":
+            # Only the last part of a burst is shown, with the whole constellation
+            if msg.msg_num != msg.num_messages:
+                return
+            lines = ["", f"Satellites in View ({msg.talker}):"]
+            constellation = self.sky_view.constellations.get(msg.talker) if self.sky_view else None
+            if constellation is None:
+                lines.append(f"  Total Satellites: {msg.num_sv_in_view}")
+            else:
+                lines.append(f"  Total Satellites: {len(constellation)}")
+                for n, (prn, elevation, azimuth, snr) in enumerate(constellation.satellites(), 1):
+                    lines.append(f"    Satellite {n}: ID={prn}, Elevation={elevation}, Azimuth={azimuth}, SNR={snr}")
+                lines.append(f"  Tracked above 30 dB-Hz (all constellations): {self.sky_view.count_above(30)},"
+                             f" Mean SNR: {self.sky_view.mean_snr()}")
+
+        elif kind == "GLL":
+            latitude, longitude = _coordinates(msg)
+            lines = ["", "Geographic Position:",
+                     f"  Latitude: {latitude} {msg.lat_dir}",
+                     f"  Longitude: {longitude} {msg.lon_dir}",
+                     f"  Time (UTC): {msg.timestamp}"]
+            self._zone_time(lines, utc_ns)
+            lines.append(f"  Status: {'Valid' if msg.status == 'A' else 'Invalid'}")
+
+        elif kind == "VTG":
+            lines = ["", "Course Over Ground and Ground Speed:",
+                     f"  True Track: {msg.true_track}°",
+                     f"  Magnetic Track: {msg.mag_track}°",
+                     f"  Speed (knots): {msg.spd_over_grnd_kts}",
+                     f"  Speed (km/h): {msg.spd_over_grnd_kmph}"]
+
+        else:
+            lines = ["", f"Unhandled Message ({kind}):", str(msg)]
+
+        if self.separator:
+            lines.append(SEPARATOR)
+        lines.append("")
+        self._append("\n".join(lines))
+
+    def write_error(self, line, error):
+        self._append(f"Could not parse the line: {line}\nError: {error}\n")
+
+
+class JsonLinesSink(Sink):
+    def __init__(self, target=None, sentences=True, fixes=True, **kwargs):
+        """
+        One JSON object per line: {"type": "RMC", "talker": "GP", "utc_ns": ..., "data": [...]}
+        for sentences and {"type": "fix", ...all Fix fields...} for fixes.
+        """
+        Sink.__init__(self, target, **kwargs)
+        self.sentences = sentences
+        self.fixes = fixes
+        self._encode = json.JSONEncoder(separators=(',', ':'), default=str).encode
+
+    def write(self, msg, utc_ns=None):
+        if self.sentences:
+            record = {"type": msg.sentence_type, "talker": getattr(msg, 'talker', None),
+                      "utc_ns": utc_ns, "data": msg.data}
+            self._append(self._encode(record) + "\n")
+
+    def write_fix(self, fix):
+        if self.fixes:
+            record = {"type": "fix"}
+            for name in fix.__slots__:
+                record[name] = getattr(fix, name)
+            self._append(self._encode(record) + "\n")
+
+
+# utc_ns, latitude, longitude, altitude, speed, course, hdop, status, quality, num_sats, fix_type
+FIX_RECORD = struct.Struct('<qddffffBBBB')
+
+
+def _nan(value):
+    return math.nan if value is None else value
+
+
+class BinarySink(Sink):
+    empty = b''
+    mode = 'wb'
+
+    def __init__(self, target, **kwargs):
+        """
+        Fixed-size little-endian fix records (see FIX_RECORD), for compact logs.
+        Missing numbers are stored as NaN, missing counts as 255 and utc_ns as -1.
+        """
+        Sink.__init__(self, target, **kwargs)
+        self._pack = FIX_RECORD.pack
+
+    def write_fix(self, fix):
+        self._append(self._pack(
+            -1 if fix.utc_ns is None else fix.utc_ns,
+            _nan(fix.latitude), _nan(fix.longitude), _nan(fix.altitude),
+            _nan(fix.speed), _nan(fix.course), _nan(fix.hdop),
+            ord(fix.status) if fix.status else 0,
+            255 if fix.quality is None else min(fix.quality, 254),
+            255 if fix.num_sats is None else min(fix.num_sats, 254),
+            255 if fix.fix_type is None else min(fix.fix_type, 254)))
+
+
+class LatestFixConsoleSink(Sink):
+    def __init__(self, clock=None, target=None, interval=1.0):
+        """
+        A single console status line showing the most recent fix, redrawn at most once per interval seconds.
+        Fixes arriving in between only replace the one that will be shown next, which is drawn by the
+        next write_fix or flush_due after the interval, or by flush/close.
+        """
+        Sink.__init__(self, target)
+        self.clock = clock
+        self.interval = interval
+        self.latest = None
+        self._pending = False  # latest has not been drawn yet
+        self._next_draw = 0.0
+
+    def write_fix(self, fix):
+        self.latest = fix
+        self._pending = True
+        self.flush_due()
+
+    def flush_due(self):
+        if self._pending and time.monotonic() >= self._next_draw:
+            self.draw()
+
+    def flush(self):
+        if self._pending:
+            self.draw()
+        Sink.flush(self)
+
+    def draw(self):
+        fix = self.latest
+        if fix is None:
+            return
+        self._pending = False
+        self._next_draw = time.monotonic() + self.interval
+        when = fix.timestamp
+        if self.clock is not None and fix.utc_ns is not None:
+            when = self.clock.format_local(fix.utc_ns)
+        self.stream.write(f"\r{when}  {fix.status or '-'}  lat {fix.latitude}  lon {fix.longitude}"
+                          f"  alt {fix.altitude}  {fix.speed} kn  sats {fix.num_sats}  hdop {fix.hdop}   ")
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        self.stream.write("\n")
+        Sink.close(self)
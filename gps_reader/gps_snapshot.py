@@ -0,0 +1,126 @@
+import threading
+import serial  # install this module using command in the terminal "pip install pyserial"
+from gps_reader import GPSReader
+from gps_epoch import Fix
+from nmea_stream import read_frames
+
+FIELDS = tuple(name for name in Fix.__slots__ if name != 'sentences')
+
+
+class Snapshot:
+    __slots__ = ('seq',) + FIELDS
+
+    def __init__(self, seq, fix):
+        """
+        Read-only copy of one complete fix, numbered by seq (1 for the first fix published).
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, 'seq', seq)
+        for name in FIELDS:
+            setattr_(self, name, getattr(fix, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("Snapshot is read-only")
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) is not None)
+        return f"Snapshot({fields})"
+
+
+class LatestFix:
+    def __init__(self):
+        """
+        The most recent fix, shared between one writer thread and any number of reader threads.
+        Each fix is published as a new Snapshot and swapped in with a single attribute assignment,
+        so get() never takes a lock and never sees half of one fix and half of the next.
+        Only wait_newer() uses the lock, to sleep until the writer publishes.
+        """
+        self.snapshot = None
+        self._changed = threading.Condition()
+
+    @property
+    def seq(self):
+        snapshot = self.snapshot
+        return 0 if snapshot is None else snapshot.seq
+
+    def publish(self, fix):
+        snapshot = Snapshot(self.seq + 1, fix)
+        self.snapshot = snapshot
+        with self._changed:
+            self._changed.notify_all()
+        return snapshot
+
+    def get(self):
+        """
+        The latest Snapshot, or None before the first fix.
+        """
+        return self.snapshot
+
+    def wait_newer(self, seq=0, timeout=None):
+        """
+        Block until a snapshot with a sequence number above seq is published and return it.
+        Returns None if timeout (seconds) passes first.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.seq > seq:
+            return snapshot
+        with self._changed:
+            if self._changed.wait_for(lambda: self.seq > seq, timeout):
+                return self.snapshot
+        return None
+
+
+class GPSReaderThread(threading.Thread):
+    def __init__(self, serial_port, baud_rate, reader=None):
+        """
+        Read and decode a GPS port in a background thread and publish every complete fix to
+        self.latest (a LatestFix). Use reader to pass a configured GPSReader.
+        """
+        threading.Thread.__init__(self, name=f"gps-{serial_port}", daemon=True)
+        self.serial_port = serial_port
+        self.baud_rate = baud_rate
+        self.reader = reader if reader is not None else GPSReader()
+        self.latest = LatestFix()
+        self.reader.assembler.on_fix = self.latest.publish
+        self.gps_serial = None
+        self.connected = threading.Event()  # set once the port is open
+        self._stop_reading = threading.Event()
+
+    def run(self):
+        try:
+            self.gps_serial = serial.Serial(self.serial_port, self.baud_rate, timeout=1)
+            print(f"Listening to GPS data on {self.serial_port} at {self.baud_rate} baud.")
+        except serial.SerialException as e:
+            print(f"Error connecting to GPS: {e}")
+            return
+        finally:
+            self.connected.set()
+
+        # stop() is noticed after the next frame, or when a read times out while the port is quiet
+        stopping = self._stop_reading.is_set
+        parse_gps_data = self.reader.parse_gps_data
+        try:
+            for frame in read_frames(self.gps_serial, metrics=self.reader.metrics, idle=stopping):
+                parse_gps_data(frame)
+                if stopping():
+                    break
+        except serial.SerialException as e:
+            print(f"Serial error: {e}")
+        finally:
+            # Publish the epoch in progress, so the last fix is not lost
+            self.reader.assembler.flush()
+            if self.gps_serial.is_open:
+                self.gps_serial.close()
+                print("Disconnected from GPS.")
+
+    def stop(self, timeout=None):
+        """
+        Stop reading (within the port timeout) and wait for the thread to finish.
+        """
+        self._stop_reading.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,385 @@
+import os
+import re
+import struct
+import threading
+import time
+import numpy as np  # install this module using command in the terminal "pip install numpy"
+from gps_history import FIX_DTYPE, MISSING
+from gps_sinks import Sink
+from gps_time import NS_PER_SECOND
+
+SEGMENT_SECONDS = 3600  # Each segment file holds one hour of fixes per device
+INDEX_STRIDE = 256  # The sparse index keeps the time of every INDEX_STRIDE-th record
+SYNC_SECONDS = 1.0  # Appended fixes are fsynced at least this often...
+SYNC_RECORDS = 1000  # ...or once this many are waiting
+STORE_ROOT = "gps_store"
+
+# One record is one FIX_DTYPE row: utc_ns, latitude, longitude, altitude, speed, course, hdop,
+# status, quality, num_sats, fix_type
+RECORD = struct.Struct('<qddffff1sbbb')
+RECORD_SIZE = RECORD.size
+INDEX_DTYPE = np.dtype('<i8')
+_SEGMENT_NAME = re.compile(r'^(\d+)\.seg$')
+
+assert RECORD_SIZE == FIX_DTYPE.itemsize
+
+
+def _number(value):
+    return np.nan if value is None else value
+
+
+def _count(value):
+    return MISSING if value is None else min(value, 127)
+
+
+def _last_record(path):
+    with open(path, 'rb') as segment:
+        segment.seek(0, os.SEEK_END)
+        count = segment.tell() // RECORD_SIZE
+        if not count:
+            return None
+        segment.seek((count - 1) * RECORD_SIZE)
+        return np.frombuffer(segment.read(RECORD_SIZE), dtype=FIX_DTYPE)[0]
+
+
+class _Segment:
+    def __init__(self, path, start_ns, end_ns, stride):
+        """
+        The segment a device is currently appending to: records in <start_ns>.seg and the sparse
+        time index in <start_ns>.idx. Reopening a segment after a crash drops a torn last record and
+        rebuilds the index from the records.
+        """
+        self.path = path
+        self.index_path = path[:-4] + ".idx"
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.stride = stride
+        self.count = 0
+        self.last_ns = None
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            self.count = size // RECORD_SIZE
+            if size % RECORD_SIZE:
+                os.truncate(path, self.count * RECORD_SIZE)
+            if self.count:
+                records = np.fromfile(path, dtype=FIX_DTYPE)
+                self.last_ns = int(records['utc_ns'][-1])
+                records['utc_ns'][::stride].astype(INDEX_DTYPE).tofile(self.index_path)
+        if not self.count:
+            open(self.index_path, 'wb').close()
+        self.data = open(path, 'ab')
+        self.index = open(self.index_path, 'ab')
+
+    def append(self, record, utc_ns):
+        if self.count % self.stride == 0:
+            self.index.write(struct.pack('<q', utc_ns))
+        self.data.write(record)
+        self.count += 1
+        self.last_ns = utc_ns
+
+    def append_array(self, records):
+        times = records['utc_ns']
+        first = -self.count % self.stride
+        self.data.write(records.tobytes())
+        self.index.write(times[first::self.stride].astype(INDEX_DTYPE).tobytes())
+        self.count += len(records)
+        self.last_ns = int(times[-1])
+
+    def flush(self):
+        # Records first, so the index never points past the data
+        self.data.flush()
+        self.index.flush()
+
+    def sync(self):
+        self.flush()
+        os.fsync(self.data.fileno())
+        os.fsync(self.index.fileno())
+
+    def close(self):
+        self.sync()
+        self.data.close()
+        self.index.close()
+
+
+class TrackStore:
+    def __init__(self, root=STORE_ROOT, segment_seconds=SEGMENT_SECONDS, retention_days=None,
+                 sync_seconds=SYNC_SECONDS, sync_records=SYNC_RECORDS, index_stride=INDEX_STRIDE):
+        """
+        Append-only store of fixes per device: fixed-width FIX_DTYPE records in one segment file per
+        device and segment_seconds, named by the segment's start time, with a sparse time index beside it.
+        Appends are batched and fsynced every sync_seconds or sync_records; range queries memory-map
+        only the part of each segment the index points to. With retention_days, segments older than
+        that are deleted as new segments are started (or by calling expire()).
+        Times must increase per device; fixes at or before the device's last stored time are rejected.
+        """
+        self.root = root
+        self.segment_ns = int(segment_seconds * NS_PER_SECOND)
+        self.retention_ns = None if retention_days is None else int(retention_days * 86400 * NS_PER_SECOND)
+        self.sync_seconds = sync_seconds
+        self.sync_records = sync_records
+        self.index_stride = index_stride
+        self.rejected = 0  # fixes without a time or out of order
+        self._segments = {}  # device -> open _Segment
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def devices(self):
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def segments(self, device):
+        """
+        (start_ns, path) of every segment of device, oldest first.
+        """
+        directory = os.path.join(self.root, device)
+        if not os.path.isdir(directory):
+            return []
+        found = []
+        for name in os.listdir(directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(directory, name)))
+        found.sort()
+        return found
+
+    def _segment_for(self, device, utc_ns):
+        segment = self._segments.get(device)
+        if segment is not None and utc_ns < segment.end_ns:
+            return segment
+        previous_ns = None
+        if segment is not None:
+            previous_ns = segment.last_ns
+            segment.close()
+        start_ns = utc_ns - utc_ns % self.segment_ns
+        existing = self.segments(device)
+        if segment is None and existing and existing[-1][0] >= start_ns:
+            # Carry on with the newest segment left by an earlier run
+            start_ns = existing[-1][0]
+        directory = os.path.join(self.root, device)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{start_ns:020d}.seg")
+        segment = _Segment(path, start_ns, start_ns - start_ns % self.segment_ns + self.segment_ns,
+                           self.index_stride)
+        if segment.last_ns is None:
+            # A new segment continues after the last time of the previous one
+            if previous_ns is None and existing and existing[-1][1] != path:
+                previous = _last_record(existing[-1][1])
+                previous_ns = None if previous is None else int(previous['utc_ns'])
+            segment.last_ns = previous_ns
+        self._segments[device] = segment
+        if self.retention_ns is not None:
+            self._expire_device(device, utc_ns - self.retention_ns)
+        return segment
+
+    def append(self, device, fix):
+        """
+        Store a gps_epoch.Fix for device. Returns True if it was stored.
+        """
+        return self.append_values(device, fix.utc_ns, fix.latitude, fix.longitude, fix.altitude, fix.speed,
+                                  fix.course, fix.hdop, fix.status, fix.quality, fix.num_sats, fix.fix_type)
+
+    def append_values(self, device, utc_ns, latitude, longitude, altitude=None, speed=None, course=None,
+                      hdop=None, status=None, quality=None, num_sats=None, fix_type=None):
+        if utc_ns is None:
+            self.rejected += 1
+            return False
+        if isinstance(status, str):
+            status = status.encode('ascii')
+        record = RECORD.pack(utc_ns, _number(latitude), _number(longitude), _number(altitude), _number(speed),
+                             _number(course), _number(hdop), status or b'', _count(quality), _count(num_sats),
+                             _count(fix_type))
+        with self._lock:
+            segment = self._segment_for(device, utc_ns)
+            if segment.last_ns is not None and utc_ns <= segment.last_ns:
+                self.rejected += 1
+                return False
+            segment.append(record, utc_ns)
+            self._pending += 1
+            if self._pending >= self.sync_records or time.monotonic() - self._last_sync >= self.sync_seconds:
+                self._sync()
+        return True
+
+    def append_array(self, device, records):
+        """
+        Store a FIX_DTYPE array (e.g. from nmea_ingest.load_track) in time order. Rows at or before
+        the device's last stored time are rejected. Returns the number of rows stored.
+        """
+        records = np.asarray(records, dtype=FIX_DTYPE)
+        times = np.ascontiguousarray(records['utc_ns'])
+        keep = np.concatenate(([True], np.diff(times) > 0))  # drop repeated times
+        if not keep.all():
+            self.rejected += int((~keep).sum())
+            records = records[keep]
+            times = times[keep]
+        start = stored = 0
+        with self._lock:
+            while start < len(times):
+                segment = self._segment_for(device, int(times[start]))
+                if segment.last_ns is not None and times[start] <= segment.last_ns:
+                    skip = int(np.searchsorted(times, segment.last_ns, side='right'))
+                    self.rejected += skip - start
+                    start = skip
+                    continue
+                split = int(np.searchsorted(times, segment.end_ns, side='left'))
+                segment.append_array(records[start:split])
+                stored += split - start
+                start = split
+            self._sync()
+        return stored
+
+    def _sync(self):
+        for segment in self._segments.values():
+            segment.sync()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """
+        Write and fsync everything appended so far.
+        """
+        with self._lock:
+            self._sync()
+
+    def flush(self):
+        """
+        Make everything appended so far visible to queries (without waiting for the disk).
+        """
+        with self._lock:
+            for segment in self._segments.values():
+                segment.flush()
+
+    def query(self, device, start_ns, end_ns):
+        """
+        Fixes of device with start_ns <= utc_ns < end_ns, oldest first, as a FIX_DTYPE array.
+        Only segments overlapping the range are opened; in each, the sparse index narrows the range
+        to INDEX_STRIDE records at either end before the records are memory-mapped.
+        """
+        segment = self._segments.get(device)
+        if segment is not None:
+            with self._lock:
+                segment.flush()
+        segments = self.segments(device)
+        starts = [start for start, _ in segments]
+        first = max(int(np.searchsorted(starts, start_ns, side='right')) - 1, 0)
+        stop = int(np.searchsorted(starts, end_ns, side='left'))
+        parts = []
+        for _, path in segments[first:stop]:
+            part = self._query_segment(path, start_ns, end_ns)
+            if len(part):
+                parts.append(part)
+        if not parts:
+            return np.empty(0, dtype=FIX_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _query_segment(self, path, start_ns, end_ns):
+        try:
+            count = os.path.getsize(path) // RECORD_SIZE
+        except OSError:
+            return np.empty(0, dtype=FIX_DTYPE)  # expired meanwhile
+        if not count:
+            return np.empty(0, dtype=FIX_DTYPE)
+        stride = self.index_stride
+        try:
+            index = np.fromfile(path[:-4] + ".idx", dtype=INDEX_DTYPE)[:(count + stride - 1) // stride]
+        except OSError:
+            index = np.empty(0, dtype=INDEX_DTYPE)  # index lost: search the whole segment
+        low = max(int(np.searchsorted(index, start_ns, side='right')) - 1, 0) * stride
+        high_block = int(np.searchsorted(index, end_ns, side='left'))
+        high = count if high_block >= len(index) else min(high_block * stride, count)
+        if low >= high:
+            return np.empty(0, dtype=FIX_DTYPE)
+        window = np.memmap(path, dtype=FIX_DTYPE, mode='r', offset=low * RECORD_SIZE, shape=(high - low,))
+        times = window['utc_ns']
+        result = np.array(window[np.searchsorted(times, start_ns, side='left'):
+                                 np.searchsorted(times, end_ns, side='left')])
+        del times, window  # unmap now, so expired segments can be deleted (on Windows too)
+        return result
+
+    def latest(self, device):
+        """
+        The most recent stored fix of device as a record, or None.
+        """
+        for _, path in reversed(self.segments(device)):
+            record = _last_record(path)
+            if record is not None:
+                return record
+        return None
+
+    def _expire_device(self, device, cutoff_ns):
+        # A segment ends where the next one starts, so it is expired once the next start is at or before cutoff
+        removed = 0
+        segments = self.segments(device)
+        active = self._segments.get(device)
+        for (_, path), (next_start, _) in zip(segments, segments[1:]):
+            if next_start > cutoff_ns:
+                break
+            if active is not None and active.path == path:
+                continue
+            for name in (path, path[:-4] + ".idx"):
+                try:
+                    os.remove(name)
+                except OSError as e:
+                    print(f"Error expiring segment {name}: {e}")
+            removed += 1
+        return removed
+
+    def expire(self, now_ns=None):
+        """
+        Delete segments whose fixes are all older than retention_days before now_ns (the current
+        time by default). Returns the number of segments removed.
+        """
+        if self.retention_ns is None:
+            return 0
+        cutoff_ns = (time.time_ns() if now_ns is None else now_ns) - self.retention_ns
+        with self._lock:
+            return sum(self._expire_device(device, cutoff_ns) for device in self.devices())
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments = {}
+
+
+class StoreSink(Sink):
+    def __init__(self, store, device="gps"):
+        """
+        Output sink that appends every fix to a TrackStore under device, e.g. in the sinks list of main.py.
+        Closing the sink closes the store's open segments; a store shared with other sinks reopens
+        them on its next append.
+        """
+        Sink.__init__(self)
+        self.store = store
+        self.device = device
+
+    def write_fix(self, fix):
+        self.store.append(self.device, fix)
+
+    def flush(self):
+        self.store.flush()
+
+    def close(self):
+        self.store.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime, timezone
+
+    def moment(text):
+        return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp() * NS_PER_SECOND)
+
+    parser = argparse.ArgumentParser(description="Print stored fixes of one device between two UTC times.")
+    parser.add_argument("device")
+    parser.add_argument("start", type=moment, help="UTC, e.g. 2024-01-01T10:00:00")
+    parser.add_argument("end", type=moment, help="UTC, e.g. 2024-01-01T10:05:00")
+    parser.add_argument("--root", default=STORE_ROOT)
+    args = parser.parse_args()
+
+    store = TrackStore(args.root)
+    for row in store.query(args.device, args.start, args.end):
+        when = datetime.fromtimestamp(row['utc_ns'] / NS_PER_SECOND, timezone.utc)
+        print(f"{when:%Y-%m-%d %H:%M:%S.%f}  {row['status'].decode() or '-'}  lat {row['latitude']:.7f}"
+              f"  lon {row['longitude']:.7f}  alt {row['altitude']:.1f}  {row['speed']:.2f} kn"
+              f"  sats {row['num_sats']}  hdop {row['hdop']:.1f}")
@@ -0,0 +1,202 @@
+import time
+from bisect import bisect_right
+from datetime import date, datetime, time as day_time, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo  # on Windows also run "pip install tzdata"
+
+DEFAULT_TIME_ZONE = "Asia/Kolkata"  # Change this for other zones (IANA name, e.g. "Europe/Berlin")
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86400 * NS_PER_SECOND
+HALF_DAY_NS = NS_PER_DAY // 2
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+EPOCH = datetime(1970, 1, 1)
+LOCAL_FORMAT = '%H:%M:%S'  # Zone time format of the console output
+
+
+class ZoneTable:
+    def __init__(self, tz):
+        """
+        UTC offsets of a time zone as a sorted table of transitions, so a lookup is a bisect
+        (or two comparisons while the offset has not changed) instead of a tzinfo call.
+        The table is filled one year at a time as timestamps reach it.
+        """
+        self.tz = tz
+        self.starts = []  # epoch seconds at which each offset starts
+        self.offsets = []  # offset in nanoseconds valid from the matching start
+        self.first_year = None
+        self.last_year = None
+        self._low = self._high = 0
+        self._offset = None
+
+    def _offset_at(self, seconds):
+        return int(datetime.fromtimestamp(seconds, self.tz).utcoffset().total_seconds()) * NS_PER_SECOND
+
+    def _year_transitions(self, year):
+        """
+        Find the offset changes of one year: compare offsets one day apart,
+        then bisect to the second where they differ.
+        """
+        start = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+        end = int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+        transitions = [(start, self._offset_at(start))]
+        previous = transitions[0][1]
+        for day in range(start + 86400, end + 86400, 86400):
+            offset = self._offset_at(day)
+            if offset != previous:
+                low, high = day - 86400, day
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if self._offset_at(middle) == previous:
+                        low = middle
+                    else:
+                        high = middle
+                if high < end:
+                    transitions.append((high, offset))
+                previous = offset
+        return transitions
+
+    def _cover(self, year):
+        if self.first_year is None:
+            self.first_year = self.last_year = year
+            table = self._year_transitions(year)
+        elif year < self.first_year:
+            table = []
+            for y in range(year, self.first_year):
+                table += self._year_transitions(y)
+            table += zip(self.starts, self.offsets)
+            self.first_year = year
+        else:
+            table = list(zip(self.starts, self.offsets))
+            for y in range(self.last_year + 1, year + 1):
+                table += self._year_transitions(y)
+            self.last_year = year
+        # Keep only real changes so each interval is as long as possible
+        merged = []
+        for start, offset in table:
+            if not merged or merged[-1][1] != offset:
+                merged.append((start, offset))
+        self.starts = [start for start, _ in merged]
+        self.offsets = [offset for _, offset in merged]
+        self._table_end = int(datetime(self.last_year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+
+    def offset_ns(self, utc_ns):
+        """
+        UTC offset in nanoseconds at the instant utc_ns (epoch nanoseconds).
+        """
+        seconds = utc_ns // NS_PER_SECOND
+        if self._low <= seconds < self._high:
+            return self._offset
+
+        year = 1970 + seconds // 31556952  # average Gregorian year, may be one off at the ends
+        if self.first_year is None or year - 1 < self.first_year or year + 1 > self.last_year:
+            self._cover(year - 1)
+            self._cover(year + 1)
+        i = bisect_right(self.starts, seconds) - 1
+        self._low = self.starts[i]
+        self._high = self.starts[i + 1] if i + 1 < len(self.starts) else self._table_end
+        self._offset = self.offsets[i]
+        return self._offset
+
+
+class GPSClock:
+    def __init__(self, time_zone=DEFAULT_TIME_ZONE):
+        """
+        Turn NMEA UTC timestamps into epoch nanoseconds and local time.
+        The date comes from RMC datestamps; until one arrives, the UTC day is taken once from the
+        system clock. Sentences without a date roll over to the next day when the time of day wraps.
+        time_zone is an IANA name or any tzinfo.
+        """
+        self.tz = ZoneInfo(time_zone) if isinstance(time_zone, str) else time_zone
+        if not isinstance(self.tz, tzinfo):
+            raise TypeError(f"time_zone must be a zone name or tzinfo, not {time_zone!r}")
+        self.zone = ZoneTable(self.tz)
+        self.day_ns = None  # epoch nanoseconds of the current UTC midnight
+        self.last_time_ns = None  # time of day of the last timestamp
+        self._last_timestamp = None
+        self._last_date = None
+        self.utc_ns = None  # last converted instant
+        self._formatted_second = None  # local second of day and its text, for format_local
+        self._formatted = None
+
+    def set_date(self, datestamp):
+        """
+        Use the UTC date of an RMC sentence (datetime.date) for the following timestamps.
+        """
+        if datestamp is not self._last_date:
+            self._last_date = datestamp
+            day_ns = (datestamp.toordinal() - EPOCH_ORDINAL) * NS_PER_DAY
+            if day_ns != self.day_ns:
+                self.day_ns = day_ns
+                self.last_time_ns = None
+                self._last_timestamp = None
+
+    def convert(self, timestamp):
+        """
+        Epoch nanoseconds of a UTC datetime.time from an NMEA sentence.
+        """
+        if timestamp is self._last_timestamp:
+            return self.utc_ns
+        time_ns = (((timestamp.hour * 60 + timestamp.minute) * 60 + timestamp.second) * NS_PER_SECOND
+                   + timestamp.microsecond * 1000)
+        if self.day_ns is None:
+            # No date yet: pick the UTC day that puts this time closest to the system clock
+            now = time.time_ns()
+            self.day_ns = (now - time_ns + HALF_DAY_NS) // NS_PER_DAY * NS_PER_DAY
+        elif self.last_time_ns is not None and time_ns < self.last_time_ns - HALF_DAY_NS:
+            self.day_ns += NS_PER_DAY  # passed midnight before the next RMC date
+        self.last_time_ns = time_ns
+        self._last_timestamp = timestamp
+        self.utc_ns = self.day_ns + time_ns
+        return self.utc_ns
+
+    def update(self, msg):
+        """
+        Convert the timestamp of a decoded sentence, taking the date from it when it has one.
+        Returns epoch nanoseconds, or None if the sentence has no time.
+        A time or date field that did not convert (pynmea2 then leaves it as text) counts as missing.
+        """
+        datestamp = getattr(msg, 'datestamp', None)
+        if isinstance(datestamp, date):
+            self.set_date(datestamp)
+        timestamp = msg.timestamp
+        if not isinstance(timestamp, day_time):
+            return None
+        return self.convert(timestamp)
+
+    def local_ns(self, utc_ns):
+        """
+        Local wall-clock time as epoch-style nanoseconds (UTC nanoseconds plus the zone offset).
+        """
+        return utc_ns + self.zone.offset_ns(utc_ns)
+
+    def utc_datetime(self, utc_ns):
+        """
+        Aware UTC datetime for epoch nanoseconds; only built when someone asks for it.
+        """
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=utc_ns // 1000)
+
+    def local_datetime(self, utc_ns):
+        """
+        Aware local datetime for epoch nanoseconds; only built when someone asks for it.
+        """
+        return self.utc_datetime(utc_ns).astimezone(self.tz)
+
+    def format_local(self, utc_ns, fmt=LOCAL_FORMAT):
+        """
+        Local time of epoch nanoseconds as text. The offset comes from the zone table and the
+        default "HH:MM:SS" is built from integer fields (and reused within the same second), so
+        no datetime is created per fix. Other formats go through a naive local datetime, or an
+        aware one when they ask for the zone (%z, %Z).
+        """
+        local_ns = self.local_ns(utc_ns)
+        if fmt == LOCAL_FORMAT:
+            second = local_ns // NS_PER_SECOND % 86400
+            if second != self._formatted_second:
+                hours, rest = divmod(second, 3600)
+                minutes, seconds = divmod(rest, 60)
+                self._formatted = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+                self._formatted_second = second
+            return self._formatted
+        if '%z' in fmt or '%Z' in fmt:
+            return self.local_datetime(utc_ns).strftime(fmt)
+        return (EPOCH + timedelta(microseconds=local_ns // 1000)).strftime(fmt)
@@ -0,0 +1,293 @@
+import ctypes
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from statistics import median
+import pynmea2
+import nmea_fast
+from gps_time import GPSClock, NS_PER_SECOND
+from nmea_stream import NMEAFramer, READ_CHUNK_SIZE
+
+WINDOW = 64  # Epochs the offset and drift are estimated from
+OUTLIER_MADS = 4.0  # Samples further than this many median absolute deviations from the fit are rejected
+MIN_SAMPLES = 4
+
+NTP_SHM_KEY = 0x4E545030  # "NTP0": ntpd/chrony shared memory segment of unit 0 is this key, unit 1 is +1...
+SHM_TIME = struct.Struct('@iiqiqiiiiiII8i')  # struct shmTime of ntpd (64-bit time_t)
+SHM_SIZE = 96  # sizeof(struct shmTime), including the tail padding
+SHM_PRECISION = -10  # log2 seconds, about 1 ms: what a serial NMEA timestamp is good for
+
+
+def read_timed_frames(gps_serial, chunk_size=READ_CHUNK_SIZE):
+    """
+    Like nmea_stream.read_frames, but yield (frame, monotonic_ns, realtime_ns) where the stamps
+    are taken right after the read that delivered the first byte of the frame.
+    While the port is idle, reads ask for one byte, so the first byte of a burst is stamped
+    as soon as the driver hands it over.
+    """
+    framer = NMEAFramer()
+    monotonic_ns = time.monotonic_ns
+    realtime_ns = time.time_ns
+    pending = None  # stamps of the read that started the partial frame in the buffer
+    while gps_serial.is_open:
+        data = gps_serial.read(min(max(gps_serial.in_waiting, 1), chunk_size))
+        stamp = (monotonic_ns(), realtime_ns())
+        if not data:
+            continue
+        frames = framer.feed(data)
+        if frames:
+            # The first frame began in an earlier read if bytes were already waiting in the buffer
+            first = pending or stamp
+            yield frames[0], first[0], first[1]
+            for frame in frames[1:]:
+                yield frame, stamp[0], stamp[1]
+            pending = None
+        if framer.buffer and pending is None:
+            pending = stamp
+
+
+class ClockEstimate:
+    __slots__ = ('offset_ns', 'drift_ppm', 'jitter_ns', 'samples', 'inliers', 'monotonic_ns')
+
+    def __init__(self, offset_ns, drift_ppm, jitter_ns, samples, inliers, monotonic_ns):
+        """
+        Host clock minus GPS time (offset_ns, at monotonic time monotonic_ns), its rate of change
+        (drift_ppm, positive when the host clock runs fast) and the spread of the samples (jitter_ns).
+        """
+        self.offset_ns = offset_ns
+        self.drift_ppm = drift_ppm
+        self.jitter_ns = jitter_ns
+        self.samples = samples
+        self.inliers = inliers
+        self.monotonic_ns = monotonic_ns
+
+    def __repr__(self):
+        return (f"ClockEstimate(offset={self.offset_ns / 1e6:.3f} ms, drift={self.drift_ppm:.3f} ppm, "
+                f"jitter={self.jitter_ns / 1e6:.3f} ms, inliers={self.inliers}/{self.samples})")
+
+
+class ClockOffsetEstimator:
+    def __init__(self, window=WINDOW, fudge_ns=0, outlier_mads=OUTLIER_MADS):
+        """
+        Estimate the offset and drift of the host clock against GPS time from (GPS UTC, arrival) pairs.
+        fudge_ns is the receiver's fixed delay from the start of the second to its first byte
+        (calibrate once per receiver model and baud rate); it is subtracted from every sample.
+        The fit is a Theil-Sen line (median of the pairwise slopes) over the last window samples,
+        so the occasional late read (USB polling, a busy host) does not pull the estimate.
+        """
+        self.window = window
+        self.fudge_ns = fudge_ns
+        self.outlier_mads = outlier_mads
+        self.samples = deque(maxlen=window)  # (monotonic_ns, offset_ns)
+        self.estimate = None
+
+    def add(self, utc_ns, monotonic_ns, realtime_ns):
+        """
+        Add one epoch: its GPS UTC time and the host stamps of its first byte.
+        Returns True unless the sample is an outlier against the current estimate.
+        """
+        offset = realtime_ns - utc_ns - self.fudge_ns
+        inlier = True
+        estimate = self.estimate
+        if estimate is not None and estimate.inliers >= MIN_SAMPLES:
+            predicted = estimate.offset_ns + estimate.drift_ppm * (monotonic_ns - estimate.monotonic_ns) / 1e6
+            limit = self.outlier_mads * max(estimate.jitter_ns, 1000)
+            inlier = abs(offset - predicted) <= limit
+        self.samples.append((monotonic_ns, offset))
+        self.estimate = self._fit(monotonic_ns)
+        return inlier
+
+    def _fit(self, now_ns):
+        samples = self.samples
+        if not samples:
+            return None
+        if len(samples) < 2:
+            return ClockEstimate(samples[0][1], 0.0, 0, 1, 1, now_ns)
+        slopes = []
+        items = list(samples)
+        for i, (t1, o1) in enumerate(items):
+            for t2, o2 in items[i + 1:]:
+                if t2 != t1:
+                    slopes.append((o2 - o1) / (t2 - t1))
+        slope = median(slopes) if slopes else 0.0
+        residuals = [o - slope * (t - now_ns) for t, o in items]  # each sample projected to now
+        offset = median(residuals)
+        deviations = [abs(r - offset) for r in residuals]
+        jitter = median(deviations)
+        limit = self.outlier_mads * max(jitter, 1000)
+        inliers = [r for r, d in zip(residuals, deviations) if d <= limit]
+        if len(inliers) != len(residuals):
+            offset = median(inliers)
+        return ClockEstimate(int(offset), slope * 1e6, int(jitter), len(items), len(inliers), now_ns)
+
+    def offset_now(self):
+        """
+        Current estimated offset in nanoseconds (host minus GPS), extrapolated with the drift.
+        """
+        estimate = self.estimate
+        if estimate is None:
+            return None
+        return estimate.offset_ns + estimate.drift_ppm * (time.monotonic_ns() - estimate.monotonic_ns) / 1e6
+
+    def gps_time_ns(self):
+        """
+        The host clock corrected to GPS time, as epoch nanoseconds.
+        """
+        offset = self.offset_now()
+        return None if offset is None else time.time_ns() - int(offset)
+
+
+class SHMSegment:
+    def __init__(self, buffer):
+        """
+        Writer for an ntpd/chrony SHM refclock segment (mode 1) in any writable buffer.
+        Use SysVSHM for the real segment or FileSHM for a file-backed stand-in with the same layout.
+        """
+        self.buffer = buffer
+        self.count = 0
+
+    def write(self, clock_ns, receive_ns, leap=0, precision=SHM_PRECISION):
+        """
+        Publish one sample: clock_ns is the true (GPS) time, receive_ns the host time at that moment.
+        count is bumped before and after the update and valid cleared while writing, so the reader
+        can tell a torn update from a complete one.
+        """
+        buffer = self.buffer
+        current = struct.unpack_from('@i', buffer, 4)[0]
+        struct.pack_into('@i', buffer, 48, 0)  # valid = 0
+        struct.pack_into('@i', buffer, 4, current + 1)
+        clock_sec, clock_nsec = divmod(clock_ns, NS_PER_SECOND)
+        receive_sec, receive_nsec = divmod(receive_ns, NS_PER_SECOND)
+        struct.pack_into('@iiqiqiiiiiII', buffer, 0, 1, current + 1, clock_sec, clock_nsec // 1000,
+                         receive_sec, receive_nsec // 1000, leap, precision, 3, 0, clock_nsec, receive_nsec)
+        struct.pack_into('@i', buffer, 4, current + 2)
+        struct.pack_into('@i', buffer, 48, 1)  # valid = 1
+        self.count = current + 2
+
+    def read(self):
+        """
+        The segment as a dict, as the time daemon would see it (for testing the stand-in).
+        """
+        values = SHM_TIME.unpack_from(self.buffer)
+        names = ('mode', 'count', 'clock_sec', 'clock_usec', 'receive_sec', 'receive_usec', 'leap',
+                 'precision', 'nsamples', 'valid', 'clock_nsec', 'receive_nsec')
+        return dict(zip(names, values))
+
+
+class FileSHM(SHMSegment):
+    def __init__(self, path):
+        """
+        SHM segment backed by a file, for testing without ntpd/chrony or root.
+        """
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < SHM_SIZE:
+            os.ftruncate(self._fd, SHM_SIZE)
+        self._map = mmap.mmap(self._fd, SHM_SIZE)
+        SHMSegment.__init__(self, self._map)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SysVSHM(SHMSegment):
+    def __init__(self, unit=0, mode=0o600):
+        """
+        Attach the SysV shared memory segment ntpd's and chrony's SHM refclock read (Linux, via libc).
+        Units 0 and 1 are only readable by root-owned daemons; use mode 0o666 with units 2 and up.
+        chrony: refclock SHM 2 refid GPS
+        """
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.shmget.restype = ctypes.c_int
+        libc.shmget.argtypes = (ctypes.c_int, ctypes.c_size_t, ctypes.c_int)
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = (ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        libc.shmdt.argtypes = (ctypes.c_void_p,)
+        ipc_creat = 0o1000
+        shm_id = libc.shmget(NTP_SHM_KEY + unit, SHM_SIZE, ipc_creat | mode)
+        if shm_id < 0:
+            raise OSError(ctypes.get_errno(), f"shmget failed for NTP SHM unit {unit}")
+        address = libc.shmat(shm_id, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            raise OSError(ctypes.get_errno(), f"shmat failed for NTP SHM unit {unit}")
+        self._libc = libc
+        self._address = address
+        SHMSegment.__init__(self, (ctypes.c_char * SHM_SIZE).from_address(address))
+
+    def close(self):
+        if self._address is not None:
+            self._libc.shmdt(self._address)
+            self._address = None
+
+
+class TimingReader:
+    def __init__(self, estimator=None, clock=None, shm=None):
+        """
+        Timing mode: pair the first sentence of each epoch that carries a new UTC time with the
+        host stamps of its first byte, feed the pairs to a ClockOffsetEstimator and, if shm is given,
+        publish each accepted sample to an SHM segment for chrony/ntpd.
+        Receivers start each epoch with a timed sentence (RMC or GGA), so that is the epoch's first byte.
+        """
+        self.estimator = estimator if estimator is not None else ClockOffsetEstimator()
+        self.clock = clock if clock is not None else GPSClock()
+        self.shm = shm
+        self.last_utc_ns = None
+        self.epochs = 0
+        self.rejected = 0
+
+    def add(self, frame, monotonic_ns, realtime_ns):
+        """
+        Handle one stamped frame. Returns the ClockEstimate after a new epoch, otherwise None.
+        """
+        try:
+            msg = nmea_fast.parse(frame)
+        except pynmea2.ParseError:
+            return None
+        if msg.sentence_type not in ("RMC", "GGA", "GLL") or not msg.timestamp:
+            return None
+        if msg.sentence_type == "RMC" and msg.status != 'A':
+            return None  # time from a receiver without a fix may be off by seconds
+        utc_ns = self.clock.update(msg)
+        if utc_ns == self.last_utc_ns:
+            return None
+        self.last_utc_ns = utc_ns
+        self.epochs += 1
+        estimator = self.estimator
+        if estimator.add(utc_ns, monotonic_ns, realtime_ns):
+            if self.shm is not None:
+                self.shm.write(utc_ns + estimator.fudge_ns, realtime_ns)
+        else:
+            self.rejected += 1
+        return estimator.estimate
+
+    def run(self, gps_serial, on_estimate=None):
+        for frame, monotonic_ns, realtime_ns in read_timed_frames(gps_serial):
+            estimate = self.add(frame, monotonic_ns, realtime_ns)
+            if estimate is not None and on_estimate is not None:
+                on_estimate(estimate)
+
+
+if __name__ == "__main__":
+    import serial  # install this module using command in the terminal "pip install pyserial"
+
+    # Replace with your GPS module's serial port and baud rate
+    SERIAL_PORT = "COM16"
+    BAUD_RATE = 9600
+    FUDGE_MS = 0.0  # Receiver delay from the start of the second to its first byte
+    SHM_UNIT = None  # e.g. 2 to feed chrony ("refclock SHM 2 refid GPS"); needs Linux
+
+    shm = SysVSHM(SHM_UNIT, 0o666) if SHM_UNIT is not None else None
+    timing = TimingReader(ClockOffsetEstimator(fudge_ns=int(FUDGE_MS * 1e6)), shm=shm)
+    try:
+        gps_serial = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+        print(f"Timing GPS data on {SERIAL_PORT} at {BAUD_RATE} baud.")
+        timing.run(gps_serial, print)
+    except serial.SerialException as e:
+        print(f"Serial error: {e}")
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        if shm is not None:
+            shm.close()
@@ -1,96 +1,74 @@
+import time
 import serial
 import pynmea2
-from datetime import datetime, timedelta, timezone
+from nmea_stream import read_frames
+import nmea_fast
+from gps_time import GPSClock
+from gps_satellites import SkyView
+from gps_epoch import EpochAssembler
+from gps_sinks import ConsoleSink
 
-def get_zone_time(utc_time):
-    """
-    Convert UTC time to local time using a predefined time zone offset.
-    Modify the offset as per your local time zone.
-    """
-    # Define your local time zone offset (e.g., +5:30 for IST)
-    local_offset = timedelta(hours=5, minutes=30)  # Change this for other zones
-    local_time = utc_time + local_offset
-    return local_time
+# Define your local time zone (e.g., "Asia/Kolkata" for IST)
+clock = GPSClock("Asia/Kolkata")  # Change this for other zones
+
+# Satellites in view, assembled from the GSV sentences
+sky_view = SkyView()
+
+# One record per time step, for sinks that take fixes
+assembler = EpochAssembler(clock)
+
+# Where the decoded data goes, e.g. add gps_sinks.JsonLinesSink("gps.jsonl")
+sinks = [ConsoleSink(clock, sky_view)]
+
+# Set to gps_metrics.Metrics() to count sentences and errors and time each stage (see read_and_decode_gps)
+metrics = None
 
 def parse_gps_data(line):
     """
-    Parse and display decoded GPS data in a human-readable format.
+    Decode a GPS data line (a bytes frame from read_frames, or str) and pass it to the output sinks.
+    The decoding itself does no I/O; with no sinks attached nothing is printed.
     """
+    if metrics is not None:
+        start = time.perf_counter_ns()
     try:
-        msg = pynmea2.parse(line)
-
-        if msg.sentence_type == "GGA":
-            print("\nGPS Fix Data:")
-            print(f"  Time (UTC): {msg.timestamp}")
-            if msg.timestamp:
-                utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                local_time = get_zone_time(utc_time)
-                print(f"  Zone Time: {local_time.strftime('%H:%M:%S')} (Local)")
-
-        elif msg.sentence_type == "RMC":
-            print("\nRecommended Minimum Navigation Data:")
-            print(f"  Time (UTC): {msg.timestamp}")
-            if msg.timestamp:
-                utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                local_time = get_zone_time(utc_time)
-                print(f"  Zone Time: {local_time.strftime('%H:%M:%S')} (Local)")
-            print(f"  Status: {'Active' if msg.status == 'A' else 'Void'}")
-            print(f"  Latitude: {msg.latitude} {msg.lat_dir}")
-            print(f"  Longitude: {msg.longitude} {msg.lon_dir}")
-            print(f"  Speed (knots): {msg.spd_over_grnd}")
-            print(f"  Date: {msg.datestamp}")
-
-        elif msg.sentence_type == "GSA":
-            print("\nSatellite Status:")
-            print(f"  Mode: {msg.mode}")
-            print(f"  Fix Type: {msg.mode_fix_type}")
-            try:
-                satellites_used = getattr(msg, 'sv_id', None)
-                if satellites_used:
-                    print(f"  Satellites Used: {', '.join(filter(None, satellites_used))}")
-                else:
-                    print("  Satellites Used: Not available")
-            except AttributeError:
-                print("  Satellites Used: Not available")
-            print(f"  PDOP: {msg.pdop}, HDOP: {msg.hdop}, VDOP: {msg.vdop}")
-
-        elif msg.sentence_type == "GSV":
-            print("\nSatellites in View:")
-            try:
-                total_satellites = msg.data[2]  # Typically the total number of satellites is in the third field
-                print(f"  Total Satellites: {total_satellites}")
-                print(f"  Message Number: {msg.msg_num}/{msg.total_msgs}")
-                satellite_info = msg.data[3:]  # Remaining data contains satellite information
-                for i in range(0, len(satellite_info), 4):
-                    print(f"    Satellite {i // 4 + 1}: ID={satellite_info[i]}, Elevation={satellite_info[i+1]}, Azimuth={satellite_info[i+2]}, SNR={satellite_info[i+3]}")
-            except (IndexError, AttributeError) as e:
-                print("  Satellite information not available.")
-
-        elif msg.sentence_type == "GLL":
-            print("\nGeographic Position:")
-            print(f"  Latitude: {msg.latitude} {msg.lat_dir}")
-            print(f"  Longitude: {msg.longitude} {msg.lon_dir}")
-            print(f"  Time (UTC): {msg.timestamp}")
-            if msg.timestamp:
-                utc_time = datetime.combine(datetime.now(timezone.utc).date(), msg.timestamp)
-                local_time = get_zone_time(utc_time)
-                print(f"  Zone Time: {local_time.strftime('%H:%M:%S')} (Local)")
-            print(f"  Status: {'Valid' if msg.status == 'A' else 'Invalid'}")
-
-        elif msg.sentence_type == "VTG":
-            print("\nCourse Over Ground and Ground Speed:")
-            print(f"  True Track: {msg.true_track}°")
-            print(f"  Magnetic Track: {msg.mag_track}°")
-            print(f"  Speed (knots): {msg.spd_over_grnd_kts}")
-            print(f"  Speed (km/h): {msg.spd_over_grnd_kmph}")
-
-        else:
-            print(f"\nUnhandled Message ({msg.sentence_type}):")
-            print(msg)
-    except pynmea2.ParseError as e:
-        print(f"Could not parse the line: {line}")
-        print(f"Error: {e}")
-
+        msg = nmea_fast.parse(line)
+    except (pynmea2.ParseError, ValueError) as e:
+        if metrics is not None:
+            metrics.count_error(e)
+        if isinstance(line, bytes):
+            line = line.decode('ascii', errors='ignore')
+        for sink in sinks:
+            sink.write_error(line, e)
+        return None
+    if metrics is not None:
+        parsed = time.perf_counter_ns()
+        metrics.stages['parse'].record(parsed - start)
+        metrics.count_sentence(msg.sentence_type)
+
+    utc_ns = None
+    if msg.sentence_type in ("GGA", "RMC", "GLL"):
+        if msg.timestamp:
+            utc_ns = clock.update(msg)
+    elif msg.sentence_type == "GSV":
+        sky_view.update(msg)
+    fix = assembler.add(msg)
+    if metrics is not None:
+        converted = time.perf_counter_ns()
+        metrics.stages['convert'].record(converted - parsed)
+
+    for sink in sinks:
+        sink.write(msg, utc_ns)
+        if fix is not None:
+            sink.write_fix(fix)
+    if metrics is not None:
+        metrics.stages['emit'].record(time.perf_counter_ns() - converted)
+    return msg
+
+
+def flush_due():
+    # Called when a read times out: print what the sinks still hold while the receiver is quiet
+    for sink in sinks:
+        sink.flush_due()
 
 
 def read_and_decode_gps(serial_port, baud_rate):
@@ -101,17 +79,19 @@ def read_and_decode_gps(serial_port, baud_rate):
         gps_serial = serial.Serial(serial_port, baud_rate, timeout=1)
         print(f"Listening to GPS data on {serial_port} at {baud_rate} baud.")
 
-        while True:
-            if gps_serial.in_waiting > 0:
-                line = gps_serial.readline().decode('ascii', errors='ignore').strip()
-                if line.startswith('$'):
-                    parse_gps_data(line)
-                    print("/////////////////////////////////////////////////////////////////////")
+        for frame in read_frames(gps_serial, metrics=metrics, idle=flush_due):
+            parse_gps_data(frame)
     except serial.SerialException as e:
         print(f"Serial error: {e}")
     except KeyboardInterrupt:
         print("\nExiting...")
     finally:
+        # Send the epoch still being assembled, then write out what the sinks hold
+        fix = assembler.flush()
+        for sink in sinks:
+            if fix is not None:
+                sink.write_fix(fix)
+            sink.flush()
         if gps_serial.is_open:
             gps_serial.close()
             print("Serial connection closed.")
@@ -121,6 +101,12 @@ if __name__ == "__main__":
     # Replace with your GPS module's serial port and baud rate
     SERIAL_PORT = "COM16"  # Example for Windows
     BAUD_RATE = 9600  # Default baud rate for many GPS modules
+    METRICS_PORT = None  # e.g. 9108 to serve Prometheus metrics at http://127.0.0.1:9108/metrics
+
+    if METRICS_PORT:
+        from gps_metrics import Metrics, serve_metrics
+        metrics = Metrics()
+        serve_metrics(metrics, METRICS_PORT)
 
     read_and_decode_gps(SERIAL_PORT, BAUD_RATE)
 
@@ -0,0 +1,214 @@
+import io
+import numpy as np  # install this module using command in the terminal "pip install numpy"
+
+BLOCK_SIZE = 8 << 20  # Bytes decoded per pass; bounds the temporary arrays
+MAX_NUMBER_WIDTH = 16  # Longest numeric field accepted, longer fields decode as NaN / -1
+
+# Columns decoded for each sentence type: (column name, data field index, kind)
+# Field indexes count from the first field after the "$GPRMC," header, as in pynmea2.
+COLUMNS = {
+    'RMC': (('time', 0, 'time'), ('status', 1, 'char'), ('lat', 2, 'lat'), ('lon', 4, 'lon'),
+            ('speed', 6, 'float'), ('course', 7, 'float'), ('date', 8, 'date')),
+    'GGA': (('time', 0, 'time'), ('lat', 1, 'lat'), ('lon', 3, 'lon'), ('quality', 5, 'int'),
+            ('num_sats', 6, 'int'), ('hdop', 7, 'float'), ('altitude', 8, 'float'), ('geo_sep', 10, 'float')),
+    'GLL': (('lat', 0, 'lat'), ('lon', 2, 'lon'), ('time', 4, 'time'), ('status', 5, 'char')),
+    'GSA': (('mode', 0, 'char'), ('fix_type', 1, 'int'), ('pdop', 14, 'float'), ('hdop', 15, 'float'),
+            ('vdop', 16, 'float')),
+    'VTG': (('true_track', 0, 'float'), ('mag_track', 2, 'float'), ('speed_kts', 4, 'float'),
+            ('speed_kmph', 6, 'float')),
+    'GSV': (('num_messages', 0, 'int'), ('msg_num', 1, 'int'), ('num_sv_in_view', 2, 'int')),
+}
+
+KIND_DTYPES = {'time': 'f8', 'char': 'S1', 'lat': 'f8', 'lon': 'f8', 'float': 'f8', 'int': 'i2',
+               'date': 'M8[D]'}
+
+DTYPES = {
+    sentence: np.dtype([('talker', 'S2'), ('offset', 'i8')] + [(name, KIND_DTYPES[kind]) for name, _, kind in columns])
+    for sentence, columns in COLUMNS.items()
+}
+
+_HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789ABCDEF'):
+    _HEX_VALUES[_c] = _i
+for _i, _c in enumerate(b'abcdef'):
+    _HEX_VALUES[_c] = _i + 10
+
+_SENTENCE_CODES = {sentence: (ord(sentence[0]) << 16) | (ord(sentence[1]) << 8) | ord(sentence[2])
+                   for sentence in COLUMNS}
+
+
+def _parse_numbers(buf, start, end):
+    """
+    Parse the decimal fields buf[start:end] of every row at once.
+    Returns (mantissa, scale, ok): the value is mantissa / 10**scale, ok is False for empty or malformed fields.
+    """
+    length = end - start
+    last = len(buf) - 1
+    mantissa = np.zeros(len(start), dtype=np.int64)
+    scale = np.zeros(len(start), dtype=np.int64)
+    seen_dot = np.zeros(len(start), dtype=bool)
+    negative = np.zeros(len(start), dtype=bool)
+    ok = (length > 0) & (length <= MAX_NUMBER_WIDTH)
+    has_digit = np.zeros(len(start), dtype=bool)
+
+    # One pass per character position, vectorised over rows (Horner's rule on the digits)
+    for k in range(MAX_NUMBER_WIDTH):
+        inside = k < length
+        if not inside.any():
+            break
+        ch = buf[np.minimum(start + k, last)]
+        digit = inside & (ch >= 48) & (ch <= 57)
+        dot = inside & (ch == 46)
+        minus = inside & (ch == 45) if k == 0 else False
+        ok &= ~inside | digit | (dot & ~seen_dot) | minus
+        mantissa = np.where(digit, mantissa * 10 + (ch.astype(np.int64) - 48), mantissa)
+        scale += digit & seen_dot
+        seen_dot |= dot
+        negative |= minus
+        has_digit |= digit
+    mantissa = np.where(negative, -mantissa, mantissa)
+    return mantissa, scale, ok & has_digit
+
+
+def _decode_column(kind, buf, start, end, hemisphere):
+    """
+    Convert one field of every row to the column type for kind.
+    """
+    if kind == 'char':
+        value = np.where(end > start, buf[np.minimum(start, len(buf) - 1)], 0).astype(np.uint8)
+        return value.view('S1')
+
+    mantissa, scale, ok = _parse_numbers(buf, start, end)
+    power = 10 ** scale
+    if kind == 'float':
+        return np.where(ok, mantissa / power, np.nan)
+    if kind == 'int':
+        return np.where(ok & (scale == 0), mantissa, -1)
+    if kind == 'time':
+        # hhmmss.sss -> seconds since UTC midnight
+        whole = mantissa // power
+        seconds = (whole // 10000) * 3600 + (whole // 100 % 100) * 60 + whole % 100
+        return np.where(ok, seconds + (mantissa % power) / power, np.nan)
+    if kind == 'date':
+        # ddmmyy -> datetime64[D], with the same century pivot as strptime('%y')
+        yy, mm, dd = mantissa % 100, mantissa // 100 % 100, mantissa // 10000
+        good = ok & (scale == 0) & (mm >= 1) & (mm <= 12) & (dd >= 1) & (dd <= 31)
+        years = np.where(yy < 69, 2000 + yy, 1900 + yy) - 1970
+        months = years.astype('datetime64[Y]').astype('datetime64[M]') + np.where(good, mm - 1, 0)
+        days = months.astype('datetime64[D]') + np.where(good, dd - 1, 0)
+        return np.where(good, days, np.datetime64('NaT'))
+
+    # 'lat' / 'lon': dddmm.mmmm plus hemisphere, the same arithmetic as pynmea2's dm_to_sd
+    degrees = mantissa // (100 * power)
+    value = degrees + (mantissa - degrees * 100 * power) / power / 60
+    sign = np.where((hemisphere == 78) | (hemisphere == 69), 1.0,  # 'N' / 'E'
+                    np.where((hemisphere == 83) | (hemisphere == 87), -1.0, 0.0))  # 'S' / 'W'
+    return np.where(ok, value * sign, np.nan)
+
+
+def decode_block(buf, stats=None, base=0):
+    """
+    Decode a block of complete NMEA lines (uint8 array ending in '\\n').
+    Returns {sentence type: structured array} for the types in COLUMNS.
+    Lines without a valid '*hh' checksum are dropped. base is the block's byte offset in the log,
+    added to each row's 'offset' so rows of different types can be put back in log order.
+    """
+    newlines = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], newlines[:-1] + 1))
+    ends = newlines - (buf[np.maximum(newlines - 1, 0)] == 13)
+    size = len(buf)
+
+    framed = ends - starts >= 10
+    starts, ends = starts[framed], ends[framed]
+    stars = ends - 3
+    framed = (buf[starts] == 36) & (buf[stars] == 42) & (buf[starts + 6] == 44)  # '$', '*', ','
+    starts, ends, stars = starts[framed], ends[framed], stars[framed]
+
+    # XOR of the body from a running XOR: body ^ = prefix[star - 1] ^ prefix[start]
+    prefix = np.bitwise_xor.accumulate(buf)
+    high = _HEX_VALUES[buf[stars + 1]]
+    low = _HEX_VALUES[buf[stars + 2]]
+    valid = (high != 255) & (low != 255) & ((prefix[stars - 1] ^ prefix[starts]) == ((high << 4) | low))
+
+    if stats is not None:
+        stats['lines'] = stats.get('lines', 0) + len(newlines)
+        stats['checksum_errors'] = stats.get('checksum_errors', 0) + int((~valid).sum())
+        stats['skipped'] = stats.get('skipped', 0) + len(newlines) - len(valid)
+    starts, stars = starts[valid], stars[valid]
+
+    codes = ((buf[starts + 3].astype(np.int32) << 16) | (buf[starts + 4].astype(np.int32) << 8)
+             | buf[starts + 5])
+    commas = np.flatnonzero(buf == 44)
+
+    tables = {}
+    for sentence, columns in COLUMNS.items():
+        rows = codes == _SENTENCE_CODES[sentence]
+        row_starts, row_stars = starts[rows], stars[rows]
+        table = np.empty(len(row_starts), dtype=DTYPES[sentence])
+        table['talker'] = np.stack((buf[row_starts + 1], buf[row_starts + 2]), axis=1).reshape(-1).view('S2')
+        table['offset'] = row_starts + base
+
+        # Index of the header comma of each row; data field j runs from comma j to comma j + 1 (or '*')
+        first = np.searchsorted(commas, row_starts + 6)
+        padded = np.concatenate((commas, [size]))
+        for name, field, kind in columns:
+            field_start = padded[np.minimum(first + field, len(commas))] + 1
+            field_end = padded[np.minimum(first + field + 1, len(commas))]
+            field_start = np.minimum(field_start, row_stars)
+            field_end = np.clip(field_end, field_start, row_stars)
+            hemisphere = None
+            if kind in ('lat', 'lon'):
+                next_end = np.minimum(field_end + 1, size - 1)
+                hemisphere = np.where(field_end < row_stars, buf[next_end], 0)
+            table[name] = _decode_column(kind, buf, field_start, field_end, hemisphere)
+        tables[sentence] = table
+    return tables
+
+
+def iter_blocks(source, block_size=BLOCK_SIZE):
+    """
+    Yield uint8 arrays of whole lines read from a path, binary file object or bytes-like buffer.
+    A partial line at the end of one block is carried into the next.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        stream, close = io.BytesIO(source), False
+    elif isinstance(source, str) or hasattr(source, '__fspath__'):
+        stream, close = open(source, 'rb'), True
+    else:
+        stream, close = source, False
+
+    try:
+        carry = b''
+        while True:
+            chunk = stream.read(block_size)
+            if not chunk:
+                break
+            data = carry + chunk
+            cut = data.rfind(b'\n') + 1
+            carry = data[cut:]
+            if cut:
+                yield np.frombuffer(data, dtype=np.uint8, count=cut)
+        if carry:
+            yield np.frombuffer(carry + b'\n', dtype=np.uint8)
+    finally:
+        if close:
+            stream.close()
+
+
+def load_nmea(source, block_size=BLOCK_SIZE, stats=None):
+    """
+    Decode a whole NMEA log into one NumPy structured array per sentence type.
+    source can be a file path, a binary file object or a bytes-like buffer.
+    Returns {'RMC': array, 'GGA': array, ...}; see COLUMNS for the fields of each type. Every array
+    also has 'talker' and 'offset' (byte position of the sentence in the log) columns.
+    Pass a dict as stats to collect line, checksum error and skipped line counts.
+    """
+    parts = {sentence: [] for sentence in COLUMNS}
+    base = 0
+    for block in iter_blocks(source, block_size):
+        for sentence, table in decode_block(block, stats, base).items():
+            if len(table):
+                parts[sentence].append(table)
+        base += len(block)
+    return {sentence: np.concatenate(tables) if tables else np.empty(0, dtype=DTYPES[sentence])
+            for sentence, tables in parts.items()}
@@ -0,0 +1,294 @@
+import pynmea2  # install this module using command in the terminal "pip install pynmea2"
+from datetime import date, time, timezone
+from decimal import Decimal, InvalidOperation
+from operator import itemgetter
+
+
+_MASK_128 = (1 << 128) - 1
+_MASK_64 = (1 << 64) - 1
+
+# '*hh' checksum digits -> value, in either case (int(hh, 16) without the call and the exception)
+_DIGITS = {digit: int(digit, 16) for digit in '0123456789abcdefABCDEF'}
+_HEX = {(high + low).encode('ascii'): _DIGITS[high] * 16 + _DIGITS[low] for high in _DIGITS for low in _DIGITS}
+
+
+def nmea_checksum(body):
+    """
+    XOR of every byte in body (the bytes between '$' and '*').
+    The body is read as one little-endian integer and folded in halves down to one byte, so the
+    XOR takes a few big-integer operations instead of a Python loop over the bytes.
+    """
+    if len(body) > 128:  # longer than any real sentence
+        return _checksum_long(body)
+    value = int.from_bytes(body, 'little')
+    # The top bits left over by the unmasked folds never reach the low byte
+    value ^= value >> 512
+    value ^= value >> 256
+    value = (value ^ (value >> 128)) & _MASK_128
+    value = (value ^ (value >> 64)) & _MASK_64
+    value ^= value >> 32
+    value ^= value >> 16
+    value ^= value >> 8
+    return value & 0xFF
+
+
+def _checksum_long(body):
+    value = 0
+    for byte in body:
+        value ^= byte
+    return value
+
+
+def checksum_ok(frame):
+    """
+    Check the '*hh' checksum of a frame given as bytes ('$...*hh').
+    """
+    star = len(frame) - 3
+    if star < 1 or frame[star] != 0x2A:  # '*'
+        return False
+    return nmea_checksum(frame[1:star]) == _HEX.get(frame[star + 1:])
+
+
+# Last conversions, as (text, value) tuples replaced in one assignment, so a reader on another
+# thread always sees a text together with its own value
+_last_timestamp = ('', None)
+_last_datestamp = ('', None)
+
+
+def _timestamp(s):
+    """
+    "hhmmss[.ss]" -> datetime.time in UTC, the same value pynmea2 returns.
+    Every sentence of one fix carries the same time, so the last conversion is reused.
+    """
+    global _last_timestamp
+    if not s:
+        return None
+    last = _last_timestamp
+    if s == last[0]:
+        return last[1]
+    fraction = s[6:]
+    try:
+        value = time(int(s[0:2]), int(s[2:4]), int(s[4:6]),
+                     fraction and int(float(fraction) * 1000000) or 0, timezone.utc)
+    except ValueError:
+        return s  # like every typed pynmea2 field, text that does not convert is returned as it is
+    _last_timestamp = s, value
+    return value
+
+
+def _datestamp(s):
+    """
+    "ddmmyy" -> datetime.date, using the same century pivot as strptime('%y').
+    """
+    global _last_datestamp
+    if not s:
+        return None
+    last = _last_datestamp
+    if s == last[0]:
+        return last[1]
+    try:
+        year = int(s[4:6])
+        value = date(year + (2000 if year < 69 else 1900), int(s[2:4]), int(s[0:2]))
+    except ValueError:
+        return s
+    _last_datestamp = s, value
+    return value
+
+
+def _degrees(dm, direction, positive, negative):
+    """
+    "dddmm.mmmm" plus hemisphere -> signed decimal degrees.
+    Raises ValueError for malformed text, as pynmea2 does.
+    """
+    if not dm or dm == '0':
+        value = 0.
+    else:
+        dot = dm.find('.')
+        if dot < 3 or not dm[:dot].isdigit() or not dm[dot + 1:].isdigit():
+            raise ValueError(f"Geographic coordinate value '{dm}' is not valid DDDMM.MMM")
+        value = int(dm[:dot - 2]) + float(dm[dot - 2:]) / 60
+    if direction == positive:
+        return value
+    if direction == negative:
+        return -value
+    return 0.
+
+
+def _float(s):
+    if not s:
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return s
+
+
+def _int(s):
+    if not s:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        return s
+
+
+def _decimal(s):
+    if not s:
+        return None
+    try:
+        return Decimal(s)
+    except InvalidOperation:
+        return s
+
+
+class _Field:
+    __slots__ = ('name', 'decode')
+
+    def __init__(self, decode):
+        """
+        A sentence attribute decoded from the split fields on first access and then stored on the
+        instance (a plain attribute from then on), so fields that are never read are never converted.
+        """
+        self.name = None
+        self.decode = decode
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.decode(instance.padded)
+        return value
+
+
+class FastSentence:
+    """
+    Base for the sentences decoded without pynmea2.
+    Every field is available as text under the name pynmea2 uses; the converted fields
+    (timestamp, latitude, speed...) have the same types as in pynmea2. Like pynmea2, fields are
+    only converted when read; a malformed number, time or date is returned as its text, and a
+    malformed latitude or longitude raises ValueError when it is read.
+    """
+    sentence_type = None
+    fields = ()
+    attributes = ()  # every attribute decoded from the fields, including the converted ones
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for i, name in enumerate(cls.fields):
+            if name not in cls.__dict__:
+                field = _Field(itemgetter(i))
+                field.name = name
+                setattr(cls, name, field)
+        cls.attributes = tuple(name for name, value in cls.__dict__.items() if isinstance(value, _Field))
+
+    def __init__(self, talker, data):
+        self.talker = talker
+        self.data = data
+        # Missing trailing fields read as '' (converted fields as None)
+        count = len(self.fields)
+        self.padded = data if len(data) >= count else data + [''] * (count - len(data))
+
+    def __repr__(self):
+        return f"<{self.sentence_type}({','.join(self.data)})>"
+
+
+class RMC(FastSentence):
+    sentence_type = 'RMC'
+    fields = ('timestamp', 'status', 'lat', 'lat_dir', 'lon', 'lon_dir', 'spd_over_grnd',
+              'true_course', 'datestamp', 'mag_variation', 'mag_var_dir', 'mode_indicator', 'nav_status')
+    timestamp = _Field(lambda d: _timestamp(d[0]))
+    latitude = _Field(lambda d: _degrees(d[2], d[3], 'N', 'S'))
+    longitude = _Field(lambda d: _degrees(d[4], d[5], 'E', 'W'))
+    spd_over_grnd = _Field(lambda d: _float(d[6]))
+    true_course = _Field(lambda d: _float(d[7]))
+    datestamp = _Field(lambda d: _datestamp(d[8]))
+
+
+class GGA(FastSentence):
+    sentence_type = 'GGA'
+    fields = ('timestamp', 'lat', 'lat_dir', 'lon', 'lon_dir', 'gps_qual', 'num_sats', 'horizontal_dil',
+              'altitude', 'altitude_units', 'geo_sep', 'geo_sep_units', 'age_gps_data', 'ref_station_id')
+    timestamp = _Field(lambda d: _timestamp(d[0]))
+    latitude = _Field(lambda d: _degrees(d[1], d[2], 'N', 'S'))
+    longitude = _Field(lambda d: _degrees(d[3], d[4], 'E', 'W'))
+    gps_qual = _Field(lambda d: _int(d[5]))
+    altitude = _Field(lambda d: _float(d[8]))
+
+
+class GLL(FastSentence):
+    sentence_type = 'GLL'
+    fields = ('lat', 'lat_dir', 'lon', 'lon_dir', 'timestamp', 'status', 'faa_mode')
+    latitude = _Field(lambda d: _degrees(d[0], d[1], 'N', 'S'))
+    longitude = _Field(lambda d: _degrees(d[2], d[3], 'E', 'W'))
+    timestamp = _Field(lambda d: _timestamp(d[4]))
+
+
+class GSA(FastSentence):
+    sentence_type = 'GSA'
+    fields = ('mode', 'mode_fix_type', 'sv_id01', 'sv_id02', 'sv_id03', 'sv_id04', 'sv_id05', 'sv_id06',
+              'sv_id07', 'sv_id08', 'sv_id09', 'sv_id10', 'sv_id11', 'sv_id12', 'pdop', 'hdop', 'vdop')
+
+
+class VTG(FastSentence):
+    sentence_type = 'VTG'
+    fields = ('true_track', 'true_track_sym', 'mag_track', 'mag_track_sym', 'spd_over_grnd_kts',
+              'spd_over_grnd_kts_sym', 'spd_over_grnd_kmph', 'spd_over_grnd_kmph_sym', 'faa_mode')
+    true_track = _Field(lambda d: _float(d[0]))
+    mag_track = _Field(lambda d: _decimal(d[2]))
+    spd_over_grnd_kts = _Field(lambda d: _decimal(d[4]))
+    spd_over_grnd_kmph = _Field(lambda d: _float(d[6]))
+
+
+class GSV(FastSentence):
+    sentence_type = 'GSV'
+    fields = ('num_messages', 'msg_num', 'num_sv_in_view',
+              'sv_prn_num_1', 'elevation_deg_1', 'azimuth_1', 'snr_1',
+              'sv_prn_num_2', 'elevation_deg_2', 'azimuth_2', 'snr_2',
+              'sv_prn_num_3', 'elevation_deg_3', 'azimuth_3', 'snr_3',
+              'sv_prn_num_4', 'elevation_deg_4', 'azimuth_4', 'snr_4')
+
+
+DECODERS = {cls.sentence_type: cls for cls in (RMC, GGA, GLL, GSA, VTG, GSV)}
+_DECODERS = {name.encode('ascii'): cls for name, cls in DECODERS.items()}
+
+
+def parse_fast(frame):
+    """
+    Decode a sentence with the fast decoders; frame is the bytes from read_frames() (a str line
+    is accepted too).
+    Returns None when the sentence is not one of DECODERS or is anything other than a
+    well-formed, correctly checksummed sentence, so the caller can hand it to pynmea2.
+    """
+    if isinstance(frame, str):
+        try:
+            frame = frame.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+
+    if len(frame) < 10 or frame[0] != 0x24 or frame[6] != 0x2C:  # '$' and ','
+        return None
+    cls = _DECODERS.get(frame[3:6])
+    if cls is None or frame.find(b'*', 7) != len(frame) - 3:
+        return None
+    if nmea_checksum(frame[1:-3]) != _HEX.get(frame[-2:]):
+        return None
+    try:
+        line = frame.decode('ascii')
+    except UnicodeDecodeError:
+        return None
+    return cls(line[1:3], line[7:-3].split(','))
+
+
+def parse(line):
+    """
+    Decode one NMEA sentence (bytes frame or str line): RMC/GGA/GLL/GSA/VTG/GSV go through the fast decoders,
+    everything else falls back to pynmea2.parse (which also raises the ParseError for bad input).
+    """
+    msg = parse_fast(line)
+    if msg is None:
+        if not isinstance(line, str):
+            line = line.decode('ascii', errors='ignore')
+        msg = pynmea2.parse(line)
+    return msg
@@ -0,0 +1,285 @@
+import gzip
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np  # install this module using command in the terminal "pip install numpy"
+import nmea_batch
+from gps_history import FIX_DTYPE, MISSING
+
+CHUNK_SIZE = 64 << 20  # Uncompressed files larger than this are split across workers
+EXTENSIONS = ('.nmea', '.nmea.gz')  # Log folders often hold other .txt/.log/.gz files: add those with --extensions
+DEVICE_PATTERN = r'^(?P<device>[^_.]+)'  # Device id from a file name such as "unit17_2024-01-01.nmea.gz"
+DATE_NAME = r'^\d{4}-?\d{2}-?\d{2}'  # Files named by date only ("unit17/2024-01-01.nmea.gz") take the folder name
+EPOCH_BYTES = 4096  # RMC and GGA sentences further apart than this in the log are not the same epoch
+MANIFEST = "manifest.json"
+
+
+def find_logs(root, extensions=EXTENSIONS):
+    """
+    All NMEA log files under root (or root itself if it is a file), largest first so big files
+    start early and the pool finishes evenly.
+    """
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(extensions):
+                found.append(os.path.join(directory, name))
+    return sorted(found, key=os.path.getsize, reverse=True)
+
+
+def device_of(path, pattern=DEVICE_PATTERN):
+    """
+    Device id of a log: the 'device' group of pattern in the file name, or the name of the folder
+    holding the file when the file is named by its date only.
+    """
+    name = os.path.basename(path)
+    if re.match(DATE_NAME, name):
+        folder = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        if folder:
+            return folder
+    match = re.search(pattern, name)
+    return match.group('device') if match else os.path.splitext(name)[0]
+
+
+def shard_name(path, root, extensions=EXTENSIONS):
+    """
+    Shard file name stem for a log: its path relative to root without the extension (the longest
+    of extensions it ends with), with the folders joined by '__', so logs with the same file name
+    in different folders stay apart.
+    """
+    name = os.path.relpath(path, root) if os.path.isdir(root) else os.path.basename(path)
+    for extension in sorted(extensions, key=len, reverse=True):
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return name.replace(os.sep, '__')
+
+
+def plan_tasks(paths, chunk_size=CHUNK_SIZE, pattern=DEVICE_PATTERN, root=None, extensions=EXTENSIONS):
+    """
+    Split the logs into (path, device, chunk index, start, end, shard) work items; shard is the
+    output file path relative to the output directory, without the format extension.
+    Gzip files cannot be entered in the middle, so each is one item; plain files are cut every
+    chunk_size bytes and the workers move the cuts to the next line boundary.
+    Raises ValueError if two items would write the same shard.
+    """
+    tasks = []
+    shards = {}
+    for path in paths:
+        device = device_of(path, pattern)
+        name = os.path.join(device, shard_name(path, path if root is None else root, extensions))
+        if name in shards:
+            raise ValueError(f"{path} and {shards[name]} would both be written to {name}")
+        shards[name] = path
+        size = os.path.getsize(path)
+        if path.endswith('.gz') or size <= chunk_size:
+            tasks.append((path, device, 0, 0, None, f"{name}.0000"))
+            continue
+        for index, start in enumerate(range(0, size, chunk_size)):
+            tasks.append((path, device, index, start, min(start + chunk_size, size), f"{name}.{index:04d}"))
+    return tasks
+
+
+def read_range(path, start, end):
+    """
+    The complete lines of a plain file that start in [start, end): the line cut by start belongs
+    to the previous chunk and the line cut by end is read to its end.
+    """
+    with open(path, 'rb') as log:
+        if start:
+            log.seek(start - 1)
+            log.readline()
+        position = log.tell()
+        if position >= end:
+            return b''
+        data = log.read(end - position)
+        if not data.endswith(b'\n'):
+            data += log.readline()
+    return data
+
+
+def build_track(tables):
+    """
+    Join RMC (time, date, position, speed, course, status) with the GGA of the same time
+    (altitude, quality, satellites, HDOP) into rows of gps_history.FIX_DTYPE.
+    RMC carries the date, so rows exist only for RMC sentences with a valid date and time.
+    """
+    rmc = tables['RMC']
+    good = ~np.isnat(rmc['date']) & ~np.isnan(rmc['time'])
+    rmc = rmc[good]
+    track = np.empty(len(rmc), dtype=FIX_DTYPE)
+    day_ns = rmc['date'].astype('datetime64[ns]').astype(np.int64)
+    track['utc_ns'] = day_ns + np.round(rmc['time'] * 1e9).astype(np.int64)
+    track['latitude'] = rmc['lat']
+    track['longitude'] = rmc['lon']
+    track['speed'] = rmc['speed']
+    track['course'] = rmc['course']
+    track['status'] = rmc['status']
+    track['fix_type'] = MISSING
+
+    # The GGA of the same epoch is the one next to the RMC in the log (just before or after it) with
+    # the same time of day to the millisecond; a log spanning several days repeats every time of day
+    gga = tables['GGA']
+    gga = gga[~np.isnan(gga['time'])]
+    found = np.zeros(len(rmc), dtype=bool)
+    matched = np.empty(len(rmc), dtype=gga.dtype)
+    if len(gga):
+        gga_ms = np.round(gga['time'] * 1000).astype(np.int64)
+        rmc_ms = np.round(rmc['time'] * 1000).astype(np.int64)
+        after = np.searchsorted(gga['offset'], rmc['offset'])  # GGA rows are in log order
+        before = np.maximum(after - 1, 0)
+        after = np.minimum(after, len(gga) - 1)
+        distance_before = np.abs(gga['offset'][before] - rmc['offset'])
+        distance_after = np.abs(gga['offset'][after] - rmc['offset'])
+        match_before = (gga_ms[before] == rmc_ms) & (distance_before <= EPOCH_BYTES)
+        match_after = (gga_ms[after] == rmc_ms) & (distance_after <= EPOCH_BYTES)
+        use_before = match_before & (~match_after | (distance_before <= distance_after))
+        found = match_before | match_after
+        matched = gga[np.where(use_before, before, after)]
+    track['altitude'] = np.where(found, matched['altitude'], np.nan)
+    track['hdop'] = np.where(found, matched['hdop'], np.nan)
+    track['quality'] = np.where(found, matched['quality'], MISSING)
+    track['num_sats'] = np.where(found, np.minimum(matched['num_sats'], 127), MISSING)
+    return track
+
+
+def write_shard(track, path, output_format='npz'):
+    if output_format == 'parquet':
+        import pyarrow  # install this module using command in the terminal "pip install pyarrow"
+        import pyarrow.parquet
+        table = pyarrow.table({name: track[name] for name in track.dtype.names})
+        pyarrow.parquet.write_table(table, path)
+    else:
+        np.savez(path, track=track)
+
+
+def ingest_task(task, output_dir, output_format='npz'):
+    """
+    Worker: decode one work item, write its track shard and return only the shard's path and a
+    small summary, so nothing row-sized is pickled back to the parent.
+    """
+    path, device, index, start, end, name = task
+    stats = {}
+    if end is None:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as log:
+            tables = nmea_batch.load_nmea(log, stats=stats)
+    else:
+        tables = nmea_batch.load_nmea(read_range(path, start, end), stats=stats)
+    track = build_track(tables)
+    track = track[np.argsort(track['utc_ns'], kind='stable')]
+
+    shard = os.path.join(output_dir, f"{name}.{output_format}")
+    os.makedirs(os.path.dirname(shard), exist_ok=True)
+    write_shard(track, shard, output_format)
+    return {
+        'device': device,
+        'source': path,
+        'chunk': index,
+        'shard': os.path.relpath(shard, output_dir),
+        'rows': len(track),
+        'lines': stats.get('lines', 0),
+        'checksum_errors': stats.get('checksum_errors', 0),
+        'skipped': stats.get('skipped', 0),
+        'first_ns': int(track['utc_ns'][0]) if len(track) else None,
+        'last_ns': int(track['utc_ns'][-1]) if len(track) else None,
+    }
+
+
+def ingest(root, output_dir, workers=None, chunk_size=CHUNK_SIZE, output_format='npz',
+           pattern=DEVICE_PATTERN, progress=True, extensions=EXTENSIONS):
+    """
+    Decode every log under root whose name ends with one of extensions in a process pool and write
+    one track shard per work item to output_dir/<device>/, plus a manifest listing each device's
+    shards in time order.
+    A log that cannot be read (e.g. a truncated .gz) is reported and left out. Returns the manifest.
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    tasks = plan_tasks(find_logs(root, extensions), chunk_size, pattern, root, extensions)
+    os.makedirs(output_dir, exist_ok=True)
+    summaries = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_task, task, output_dir, output_format): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                summaries.append(future.result())
+            except (OSError, EOFError, ValueError, zlib.error) as e:
+                path, _, index = futures[future][:3]
+                print(f"\nError ingesting {path} (chunk {index}): {e}")
+                continue
+            if progress:
+                print(f"\r{done}/{len(tasks)} chunks", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    if progress:
+        print()
+
+    devices = {}
+    for summary in summaries:
+        devices.setdefault(summary['device'], []).append(summary)
+    for shards in devices.values():
+        shards.sort(key=lambda s: (s['first_ns'] is None, s['first_ns'] or 0, s['source'], s['chunk']))
+    manifest = {
+        'format': output_format,
+        'seconds': elapsed,
+        'lines': sum(s['lines'] for s in summaries),
+        'rows': sum(s['rows'] for s in summaries),
+        'devices': devices,
+    }
+    with open(os.path.join(output_dir, MANIFEST), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return manifest
+
+
+def load_track(output_dir, device):
+    """
+    One device's whole track from an ingest output directory, in time order.
+    """
+    with open(os.path.join(output_dir, MANIFEST)) as manifest_file:
+        manifest = json.load(manifest_file)
+    parts = []
+    for shard in manifest['devices'].get(device, []):
+        path = os.path.join(output_dir, shard['shard'])
+        if manifest['format'] == 'parquet':
+            import pyarrow.parquet
+            table = pyarrow.parquet.read_table(path)
+            part = np.empty(table.num_rows, dtype=FIX_DTYPE)
+            for name in FIX_DTYPE.names:
+                part[name] = table.column(name).to_numpy()
+        else:
+            with np.load(path) as shard_file:
+                part = shard_file['track']
+        parts.append(part)
+    if not parts:
+        return np.empty(0, dtype=FIX_DTYPE)
+    track = np.concatenate(parts)
+    return track[np.argsort(track['utc_ns'], kind='stable')]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Decode a directory of NMEA logs (.nmea, .nmea.gz) in parallel.")
+    parser.add_argument("logs", help="directory (searched recursively) or a single log file")
+    parser.add_argument("output", help="output directory for the track shards and manifest.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE >> 20, help="split plain files into chunks of this size")
+    parser.add_argument("--format", choices=("npz", "parquet"), default="npz",
+                        help="shard format (parquet needs pyarrow)")
+    parser.add_argument("--device-pattern", default=DEVICE_PATTERN,
+                        help="regular expression with a 'device' group, matched against file names")
+    parser.add_argument("--extensions", default=",".join(EXTENSIONS),
+                        help="file name endings of the logs to decode, e.g. .nmea,.nmea.gz,.log,.txt.gz")
+    args = parser.parse_args()
+
+    extensions = tuple(extension for extension in args.extensions.split(",") if extension)
+    result = ingest(args.logs, args.output, args.workers, args.chunk_mb << 20, args.format, args.device_pattern,
+                    extensions=extensions)
+    rate = result['lines'] / result['seconds'] if result['seconds'] else 0
+    print(f"{result['lines']} lines, {result['rows']} track points from {len(result['devices'])} devices"
+          f" in {result['seconds']:.1f} s ({rate:.0f} lines/s)")
@@ -0,0 +1,262 @@
+import mmap
+import os
+import threading
+import time
+
+# Sentences whose first field (or GLL's fifth) is the hhmmss.ss UTC time used for time-scaled pacing
+TIME_FIELDS = {b'RMC': 1, b'GGA': 1, b'GNS': 1, b'ZDA': 1, b'GLL': 5}
+
+
+def sentence_time(line):
+    """
+    Seconds since UTC midnight from a raw sentence (bytes), or None if it carries no time.
+    """
+    field = TIME_FIELDS.get(line[3:6])
+    if field is None:
+        return None
+    parts = line.split(b',', field + 1)
+    if len(parts) <= field or len(parts[field]) < 6:
+        return None
+    text = parts[field]
+    try:
+        return int(text[0:2]) * 3600 + int(text[2:4]) * 60 + float(text[4:].split(b'*')[0])
+    except ValueError:
+        return None
+
+
+class ReplaySource:
+    def __init__(self, path, baud_rate=None, update_rate=None, time_scale=None, loop=False, timeout=1):
+        """
+        Serial port stand-in that plays back a recorded NMEA file through a memory map.
+        With no pacing option the data is delivered as fast as it is read. Otherwise:
+          baud_rate  - bytes are released as a UART at that rate (10 bits per byte) would deliver them
+          update_rate - one epoch (the sentences sharing a timestamp) is released every 1/update_rate s
+          time_scale - epochs follow the recorded timestamps, time_scale times faster than real time
+        It offers the parts of serial.Serial the readers use: read, readline, in_waiting, is_open, close.
+        """
+        self.port = path
+        self.baud_rate = baud_rate
+        self.update_rate = update_rate
+        self.time_scale = time_scale
+        self.loop = loop
+        self.timeout = timeout
+
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # An empty file (e.g. an aborted recording) cannot be mapped; it plays back as nothing
+            self._map = b''
+        self.is_open = True
+        self.bytes_sent = 0
+        self.rewind()
+
+    def rewind(self):
+        """
+        Start the playback again from the beginning of the file.
+        """
+        self.position = 0
+        self.released = 0
+        self.started = time.monotonic()
+        self._schedule = self._release_schedule()
+        self._pending = next(self._schedule, None)
+
+    def _lines(self):
+        """
+        Yield (line, end offset) for each line of the capture, without copying the file.
+        """
+        data = self._map
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b'\n', start)
+            end = size if end < 0 else end + 1
+            yield data[start:end], end
+            start = end
+
+    def _release_schedule(self):
+        """
+        Yield (seconds after start, end offset) pairs: the data up to the offset may be read from that time on.
+        """
+        size = len(self._map)
+        if self.baud_rate:
+            bytes_per_second = self.baud_rate / 10.0
+            for _, end in self._lines():
+                yield end / bytes_per_second, end
+            return
+        if not (self.update_rate or self.time_scale):
+            yield 0.0, size
+            return
+
+        # Epoch pacing: an epoch is released in one piece when the next timestamp appears
+        epoch_end = 0
+        epoch_index = 0
+        first_time = last_time = None
+        day_offset = 0.0
+        for line, end in self._lines():
+            t = sentence_time(line)
+            if t is not None and t + day_offset != last_time:
+                if last_time is not None and t + day_offset < last_time - 43200:
+                    day_offset += 86400.0  # midnight rollover
+                t += day_offset
+                if epoch_end:
+                    yield self._epoch_delay(epoch_index, first_time, last_time), epoch_end
+                    epoch_index += 1
+                if first_time is None:
+                    first_time = t
+                last_time = t
+            epoch_end = end
+        if epoch_end:
+            yield self._epoch_delay(epoch_index, first_time, last_time), epoch_end
+
+    def _epoch_delay(self, index, first_time, epoch_time):
+        if self.update_rate:
+            return index / self.update_rate
+        if first_time is None:
+            return 0.0
+        return (epoch_time - first_time) / self.time_scale
+
+    def _advance(self, now):
+        """
+        Release every scheduled piece whose time has come.
+        """
+        while self._pending is not None and self.started + self._pending[0] <= now:
+            self.released = self._pending[1]
+            self._pending = next(self._schedule, None)
+
+    def _at_end(self):
+        return self._pending is None and self.position >= self.released
+
+    @property
+    def baudrate(self):
+        return self.baud_rate
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            return 0
+        self._advance(time.monotonic())
+        return self.released - self.position
+
+    def read(self, size=1):
+        """
+        Return up to size bytes, waiting (at most timeout seconds) until some are released.
+        At the end of the capture it starts over when loop is set, and closes otherwise.
+        """
+        if not self.is_open:
+            return b''
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            now = time.monotonic()
+            self._advance(now)
+            if self.position < self.released:
+                break
+            if self._at_end():
+                if not self.loop or not self._map:
+                    self.close()
+                    return b''
+                self.rewind()
+                continue
+            wait = self.started + self._pending[0] - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+                if wait <= 0:
+                    return b''
+            time.sleep(wait)
+
+        end = min(self.position + size, self.released)
+        data = self._map[self.position:end]
+        self.position = end
+        self.bytes_sent += len(data)
+        return data
+
+    def readline(self):
+        """
+        Read up to and including the next '\\n', like serial.Serial.readline.
+        """
+        line = bytearray()
+        while self.is_open and not line.endswith(b'\n'):
+            available = max(self.in_waiting, 1)
+            newline = self._map.find(b'\n', self.position, self.position + available)
+            chunk = self.read(newline - self.position + 1 if newline >= 0 else available)
+            if not chunk and self.timeout is not None:
+                break
+            line += chunk
+        return bytes(line)
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            if self._map:
+                self._map.close()
+            self._file.close()
+
+
+class PtyReplay:
+    def __init__(self, source, chunk_size=4096):
+        """
+        Serve a ReplaySource on a local pseudo-terminal (Linux/macOS), so anything that opens
+        a serial port by name, like GPSReader.connect(), can read the recording unchanged.
+        """
+        import pty
+        import tty
+
+        self.source = source
+        self.chunk_size = chunk_size
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Start copying the recording to the pty in a background thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._pump, name="nmea-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def _pump(self):
+        while self._running and self.source.is_open:
+            data = self.source.read(self.chunk_size)
+            if data:
+                os.write(self.master, data)
+
+    def wait(self):
+        """
+        Block until the whole recording has been written.
+        """
+        if self._thread:
+            self._thread.join()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        self.source.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a recorded NMEA capture on a local pty.")
+    parser.add_argument("capture", help="NMEA capture file")
+    parser.add_argument("--baud", type=int, help="pace the data at this baud rate")
+    parser.add_argument("--rate", type=float, help="release this many epochs per second")
+    parser.add_argument("--scale", type=float, help="follow the recorded timestamps, this many times faster")
+    parser.add_argument("--loop", action="store_true", help="start over at the end of the capture")
+    args = parser.parse_args()
+
+    replay = PtyReplay(ReplaySource(args.capture, baud_rate=args.baud, update_rate=args.rate,
+                                    time_scale=args.scale, loop=args.loop)).start()
+    print(f"Replaying {args.capture} on {replay.port}")
+    try:
+        replay.wait()
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        replay.stop()
@@ -0,0 +1,120 @@
+import time
+
+READ_CHUNK_SIZE = 4096  # Largest single read() issued against the port
+MAX_FRAME_LENGTH = 256  # NMEA 0183 allows 82 characters, leave room for proprietary sentences
+INTER_BYTE_TIMEOUT = 0.005  # Seconds of silence that end a burst (about 5 characters at 9600 baud)
+
+
+class NMEAFramer:
+    def __init__(self, max_frame_length=MAX_FRAME_LENGTH, metrics=None):
+        """
+        Split a raw byte stream into complete NMEA sentences.
+        Bytes after the last line ending are kept and joined with the next chunk.
+        metrics (gps_metrics.Metrics), if given, counts frames, discarded lines and carryovers.
+        """
+        self.buffer = bytearray()
+        self.max_frame_length = max_frame_length
+        self.metrics = metrics
+
+    def feed(self, data):
+        """
+        Add a chunk of bytes and return the list of complete frames found in it.
+        Each frame is a bytes object from '$' up to the checksum, without the line ending.
+        """
+        buffer = self.buffer
+        buffer += data
+        frames = []
+        start = 0
+        lines = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            lines += 1
+            # Take the last '$' so a sentence cut short by line noise does not swallow the next one
+            dollar = buffer.rfind(b'$', start, end)
+            if dollar >= 0:
+                frames.append(bytes(buffer[dollar:end]).rstrip())
+            start = end + 1
+        if start:
+            del buffer[:start]
+
+        # A partial frame longer than any real sentence is garbage (wrong baud rate, binary data)
+        overflow = len(buffer) > self.max_frame_length
+        if overflow:
+            # Keep the last '$' only if what follows it could still be a sentence
+            dollar = buffer.rfind(b'$')
+            if dollar > 0 and len(buffer) - dollar <= self.max_frame_length:
+                del buffer[:dollar]
+            else:
+                buffer.clear()
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.frames += len(frames)
+            metrics.discarded_lines += lines - len(frames)
+            metrics.overflows += overflow
+            if buffer:
+                metrics.carryovers += 1
+        return frames
+
+    def reset(self):
+        """
+        Drop any partial frame, e.g. after reopening the port.
+        """
+        self.buffer.clear()
+
+
+def burst_reads(gps_serial, inter_byte_timeout=INTER_BYTE_TIMEOUT):
+    """
+    Make read(n) on a pyserial port return as soon as the receiver pauses after a burst, instead
+    of waiting until n bytes have arrived or the port timeout expires. Objects without the setting
+    (e.g. nmea_replay.ReplaySource) already return whatever is available. Returns the port.
+    """
+    if getattr(gps_serial, 'inter_byte_timeout', False) is None:
+        gps_serial.inter_byte_timeout = inter_byte_timeout
+    return gps_serial
+
+
+def read_frames(gps_serial, chunk_size=READ_CHUNK_SIZE, metrics=None, idle=None):
+    """
+    Read GPS data from an open serial port and yield complete NMEA frames as bytes.
+    Each read blocks until a burst of data has arrived (or the port timeout expires), so a whole
+    epoch of sentences usually comes in one call instead of polling in_waiting (see burst_reads).
+    metrics (gps_metrics.Metrics), if given, records the reads and the time spent reading and framing.
+    idle, if given, is called each time a read times out with no data (e.g. to flush output while
+    the receiver is quiet); reading stops when it returns True.
+    """
+    burst_reads(gps_serial)
+    if metrics is not None:
+        yield from _read_frames_measured(gps_serial, chunk_size, metrics, idle)
+        return
+    framer = NMEAFramer()
+    while gps_serial.is_open:
+        data = gps_serial.read(chunk_size)
+        if data:
+            yield from framer.feed(data)
+        elif idle is not None and idle():
+            return
+
+
+def _read_frames_measured(gps_serial, chunk_size, metrics, idle=None):
+    # read_frames with timing; kept separate so the plain loop has no per-read checks
+    framer = NMEAFramer(metrics=metrics)
+    read_stage = metrics.stages['read']
+    frame_stage = metrics.stages['frame']
+    clock = time.perf_counter_ns
+    while gps_serial.is_open:
+        start = clock()
+        data = gps_serial.read(chunk_size)
+        framed = clock()
+        if data:
+            # Time blocked waiting for data is included, so an idle port shows up as long reads
+            read_stage.record(framed - start)
+            metrics.reads += 1
+            metrics.bytes_read += len(data)
+            frames = framer.feed(data)
+            frame_stage.record(clock() - framed)
+            yield from frames
+        elif idle is not None and idle():
+            return
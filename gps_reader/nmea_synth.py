@@ -0,0 +1,156 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from nmea_fast import nmea_checksum
+
+SENTENCE_MIX = ('RMC', 'GGA', 'GSA', 'GSV', 'VTG', 'GLL')  # One cycle of a typical receiver, in order
+START_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+START_POSITION = (12.9716, 77.5946)  # latitude, longitude in degrees
+METERS_PER_DEGREE = 111320.0
+KNOTS_TO_MPS = 0.514444
+
+
+def _lat(value):
+    degrees = int(abs(value))
+    return f"{degrees:02d}{(abs(value) - degrees) * 60:07.4f}", 'N' if value >= 0 else 'S'
+
+
+def _lon(value):
+    degrees = int(abs(value))
+    return f"{degrees:03d}{(abs(value) - degrees) * 60:07.4f}", 'E' if value >= 0 else 'W'
+
+
+class SyntheticNMEA:
+    def __init__(self, seed=0, mix=SENTENCE_MIX, constellations=('GP',), satellites=12, corrupt_rate=0.0,
+                 update_rate=1.0, start=START_TIME, position=START_POSITION):
+        """
+        Deterministic NMEA stream of a receiver driving a slowly turning path, for benchmarks.
+        The same seed and settings always produce the same bytes.
+        mix: sentence types sent each epoch, in order
+        constellations: GSV talkers (GP, GL, GA, BD...), each with `satellites` satellites in view
+        corrupt_rate: fraction of sentences sent with a wrong checksum
+        update_rate: epochs per second (sets the timestamps)
+        """
+        self.random = random.Random(seed)
+        self.mix = tuple(mix)
+        self.constellations = tuple(constellations)
+        self.satellites = satellites
+        self.corrupt_rate = corrupt_rate
+        self.step = timedelta(seconds=1 / update_rate)
+        self.time = start
+        self.latitude, self.longitude = position
+        self.course = self.random.uniform(0, 360)
+        self.speed = 20.0  # knots
+        self.epochs = 0
+        self.sentences = 0
+        self.corrupted = 0
+        # Fixed sky per constellation: PRN, elevation, azimuth; SNR varies every epoch
+        self.sky = {talker: [(prn, self.random.randint(5, 89), self.random.randint(0, 359))
+                             for prn in range(1, satellites + 1)]
+                    for talker in self.constellations}
+
+    def _frame(self, body):
+        self.sentences += 1
+        checksum = nmea_checksum(body.encode('ascii'))
+        if self.corrupt_rate and self.random.random() < self.corrupt_rate:
+            checksum ^= 0x5A
+            self.corrupted += 1
+        return f"${body}*{checksum:02X}\r\n"
+
+    def _move(self):
+        seconds = self.step.total_seconds()
+        self.course = (self.course + self.random.uniform(-3, 3)) % 360
+        self.speed = min(max(self.speed + self.random.uniform(-1, 1), 0.0), 60.0)
+        distance = self.speed * KNOTS_TO_MPS * seconds
+        self.latitude += distance * math.cos(math.radians(self.course)) / METERS_PER_DEGREE
+        self.longitude += (distance * math.sin(math.radians(self.course))
+                           / (METERS_PER_DEGREE * math.cos(math.radians(self.latitude))))
+        self.time += self.step
+
+    def epoch(self):
+        """
+        The sentences of the next epoch, as a list of str lines ending in CRLF.
+        """
+        self._move()
+        self.epochs += 1
+        hhmmss = self.time.strftime('%H%M%S') + f".{self.time.microsecond // 10000:02d}"
+        ddmmyy = self.time.strftime('%d%m%y')
+        lat, lat_dir = _lat(self.latitude)
+        lon, lon_dir = _lon(self.longitude)
+        used = [prn for prn, elevation, _ in self.sky[self.constellations[0]] if elevation > 15][:12]
+        hdop = round(self.random.uniform(0.6, 1.5), 1)
+
+        lines = []
+        for kind in self.mix:
+            if kind == 'RMC':
+                lines.append(self._frame(f"GPRMC,{hhmmss},A,{lat},{lat_dir},{lon},{lon_dir},{self.speed:.2f},"
+                                         f"{self.course:.2f},{ddmmyy},,,A"))
+            elif kind == 'GGA':
+                lines.append(self._frame(f"GPGGA,{hhmmss},{lat},{lat_dir},{lon},{lon_dir},1,{len(used):02d},"
+                                         f"{hdop},{self.random.uniform(900, 910):.1f},M,-86.0,M,,"))
+            elif kind == 'GSA':
+                prns = [f"{prn:02d}" for prn in used] + [''] * (12 - len(used))
+                lines.append(self._frame(f"GPGSA,A,3,{','.join(prns)},{hdop + 0.8:.1f},{hdop},{hdop + 0.5:.1f}"))
+            elif kind == 'GSV':
+                for talker in self.constellations:
+                    lines += self._gsv(talker)
+            elif kind == 'VTG':
+                lines.append(self._frame(f"GPVTG,{self.course:.2f},T,,M,{self.speed:.2f},N,"
+                                         f"{self.speed * 1.852:.2f},K,A"))
+            elif kind == 'GLL':
+                lines.append(self._frame(f"GPGLL,{lat},{lat_dir},{lon},{lon_dir},{hhmmss},A,A"))
+        return lines
+
+    def _gsv(self, talker):
+        sky = self.sky[talker]
+        parts = max(1, (len(sky) + 3) // 4)
+        lines = []
+        for part in range(parts):
+            fields = []
+            for prn, elevation, azimuth in sky[part * 4:part * 4 + 4]:
+                fields.append(f"{prn:02d},{elevation:02d},{azimuth:03d},{self.random.randint(20, 48):02d}")
+            body = f"{talker}GSV,{parts},{part + 1},{len(sky):02d}"
+            if fields:
+                body += "," + ",".join(fields)
+            lines.append(self._frame(body))
+        return lines
+
+    def lines(self, epochs):
+        """
+        Yield the lines of the next `epochs` epochs.
+        """
+        for _ in range(epochs):
+            yield from self.epoch()
+
+    def to_bytes(self, epochs):
+        return "".join(self.lines(epochs)).encode('ascii')
+
+    def write(self, path, epochs):
+        """
+        Save `epochs` epochs as an NMEA capture (e.g. for nmea_replay.py). Returns the sentence count.
+        """
+        before = self.sentences
+        with open(path, 'w', newline='') as capture:
+            for line in self.lines(epochs):
+                capture.write(line)
+        return self.sentences - before
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic NMEA capture.")
+    parser.add_argument("output", help="capture file to write")
+    parser.add_argument("--epochs", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default=",".join(SENTENCE_MIX), help="sentence types per epoch")
+    parser.add_argument("--constellations", default="GP", help="GSV talkers, e.g. GP,GL,GA")
+    parser.add_argument("--satellites", type=int, default=12, help="satellites in view per constellation")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="fraction of sentences with a bad checksum")
+    parser.add_argument("--rate", type=float, default=1.0, help="epochs per second")
+    args = parser.parse_args()
+
+    generator = SyntheticNMEA(args.seed, args.mix.split(","), args.constellations.split(","), args.satellites,
+                              args.corrupt, args.rate)
+    count = generator.write(args.output, args.epochs)
+    print(f"Wrote {count} sentences ({generator.corrupted} corrupted) to {args.output}")
@@ -0,0 +1,15 @@
+import pytest
+from gps_bench import EDGE_CASES, check_decoders
+from nmea_synth import SyntheticNMEA
+
+
+def test_edge_cases_decode_like_pynmea2():
+    assert "$GPGGA,092750.000,53216802,N,00630.3372,W,1,08,1.03,61.7,M,55.2,M,,*68" in EDGE_CASES
+    assert check_decoders(EDGE_CASES) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_synthetic_stream_decodes_like_pynmea2(seed):
+    synth = SyntheticNMEA(seed=seed, constellations=('GP', 'GL', 'GA'), corrupt_rate=0.02)
+    lines = [line.rstrip('\r\n') for line in synth.lines(200)]
+    assert check_decoders(lines + EDGE_CASES) == []
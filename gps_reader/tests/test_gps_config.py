@@ -0,0 +1,41 @@
+import os
+import pytest
+from gps_config import (ConfigResult, SimulatedReceiver, configure, probe_baud, required_baud,
+                        pmtk, ubx_set_rate)
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'openpty'), reason="the simulated receiver needs a pty")
+
+
+def test_commands():
+    assert pmtk("PMTK220,100") == b"$PMTK220,100*2F\r\n"
+    assert ubx_set_rate(10) == bytes.fromhex('b562060806006400010001007a12')
+    assert required_baud(('RMC', 'GGA', 'GSA', 'GSV', 'VTG'), 10) == 115200
+    assert required_baud(('RMC',), 1) == 4800
+
+
+@pytest.mark.parametrize("vendor", ["mtk", "ublox"])
+def test_configure_simulated_receiver(vendor):
+    receiver = SimulatedReceiver(vendor).start()
+    try:
+        result = configure(receiver.port, update_rate=10.0, verify_seconds=2.0)
+    finally:
+        receiver.stop()
+    assert result.errors == []
+    assert result.vendor == vendor
+    assert (result.old_baud, result.baud) == (9600, 115200)
+    assert receiver.baud_rate == 115200 and receiver.update_rate == 10.0
+    assert result.measured_rate >= 9.0
+    assert result.ok
+    assert all(result.acks.values())
+
+
+def test_probe_skips_rates_that_fail(tmp_path):
+    errors = []
+    assert probe_baud(str(tmp_path / "no-such-port"), rates=(9600, 115200), seconds=0.1, errors=errors) is None
+    assert [error.split(':')[0] for error in errors] == ["Serial error at 9600 baud", "Serial error at 115200 baud"]
+
+
+def test_configure_reports_errors_on_the_result(tmp_path):
+    result = configure(str(tmp_path / "no-such-port"), current_baud=9600)
+    assert isinstance(result, ConfigResult) and not result.ok
+    assert result.errors and result.errors[0].startswith("Serial error")
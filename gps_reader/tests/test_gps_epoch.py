@@ -0,0 +1,99 @@
+from functools import reduce
+import pynmea2
+import pytest
+import nmea_fast
+from gps_epoch import EpochAssembler, position
+from gps_reader import GPSReader
+from gps_time import GPSClock
+
+
+def sentence(body):
+    checksum = reduce(lambda value, char: value ^ ord(char), body, 0)
+    return f"${body}*{checksum:02X}"
+
+
+EPOCH_1 = [
+    sentence("GPRMC,092750.000,A,5321.6802,N,00630.3372,W,0.02,31.66,280511,,,A"),
+    sentence("GPGGA,092750.000,5321.6802,N,00630.3372,W,1,8,1.03,61.7,M,55.2,M,,"),
+    sentence("GPGSA,A,3,10,07,05,02,29,04,08,13,,,,,1.72,1.03,1.38"),
+    sentence("GPGSV,2,1,08,02,74,042,45,04,18,190,36,07,67,279,42,12,29,323,36"),
+    sentence("GLGSV,1,1,03,65,12,034,30,66,40,110,28,81,55,300,"),
+    sentence("GPGLL,5321.6802,N,00630.3372,W,092750.000,A,A"),
+]
+EPOCH_2 = [
+    sentence("GPRMC,092751.000,A,5321.6803,N,00630.3373,W,0.02,31.66,280511,,,A"),
+    sentence("GPGGA,092751.000,5321.6803,N,00630.3373,W,1,8,1.03,61.8,M,55.2,M,,"),
+]
+# Coordinates that are not DDDMM.MMM: reading latitude raises ValueError
+BAD_GGA = "$GPGGA,092750.000,53216802,N,00630.3372,W,1,08,1.03,61.7,M,55.2,M,,*68"
+BAD_RMC = sentence("GPRMC,092750.000,A,-321.6802,S,00630.3372,W,0.02,31.66,280511,,,A")
+
+
+@pytest.fixture(params=['fast', 'pynmea2'])
+def decode(request):
+    return nmea_fast.parse if request.param == 'fast' else pynmea2.parse
+
+
+def test_epoch_closes_on_timestamp_change(decode):
+    assembler = EpochAssembler(GPSClock("UTC"))
+    assert [assembler.add(decode(line)) for line in EPOCH_1] == [None] * len(EPOCH_1)
+    fix = assembler.add(decode(EPOCH_2[0]))
+    assert fix is not None
+    assert fix.sentences == len(EPOCH_1)
+    assert fix.latitude == pytest.approx(53.361337)
+    assert fix.longitude == pytest.approx(-6.505620)
+    assert fix.altitude == 61.7
+    assert fix.quality == 1 and fix.num_sats == 8 and fix.fix_type == 3
+    assert fix.pdop == 1.72 and fix.hdop == 1.03
+    assert fix.satellites_in_view == 11  # GPS and GLONASS GSV added up
+    assert fix.status == 'A'
+    assert str(fix.date) == "2011-05-28"
+
+    assembler.add(decode(EPOCH_2[1]))
+    last = assembler.flush()
+    assert last.sentences == 2 and last.altitude == 61.8
+    assert last.utc_ns - fix.utc_ns == 1_000_000_000
+    assert assembler.flush() is None
+
+
+def test_epoch_closes_on_cycle_end(decode):
+    fixes = []
+    assembler = EpochAssembler(GPSClock("UTC"), cycle_end="GLL", on_fix=fixes.append)
+    results = [assembler.add(decode(line)) for line in EPOCH_1]
+    assert results[:-1] == [None] * (len(EPOCH_1) - 1)
+    assert results[-1] is fixes[0]
+    assert fixes[0].sentences == len(EPOCH_1)
+    # The next epoch starts empty instead of being closed again by its first sentence
+    assert assembler.add(decode(EPOCH_2[0])) is None
+    assert len(fixes) == 1
+
+
+@pytest.mark.parametrize("line", [BAD_GGA, BAD_RMC])
+def test_malformed_coordinates_are_no_position(decode, line):
+    msg = decode(line)
+    with pytest.raises(ValueError):
+        msg.latitude
+    assert position(msg) is None
+    assembler = EpochAssembler(GPSClock("UTC"))
+    assembler.add(msg)
+    fix = assembler.flush()
+    assert fix.latitude is None and fix.longitude is None
+    assert fix.altitude == 61.7 or fix.speed == 0.02
+
+
+def test_unconverted_timestamp_does_not_close_the_epoch(decode):
+    assembler = EpochAssembler(GPSClock("UTC"))
+    assembler.add(decode(EPOCH_1[0]))
+    assert assembler.add(decode(sentence("GPGGA,09x750.000,5321.6802,N,00630.3372,W,1,8,1.03,61.7,M,55.2,M,,"))) is None
+    assert assembler.flush().sentences == 2
+
+
+@pytest.mark.parametrize("use_fast_decoder", [True, False])
+def test_reader_survives_malformed_sentences(use_fast_decoder):
+    reader = GPSReader(use_fast_decoder=use_fast_decoder, time_zone="UTC")
+    assert reader.parse_gps_data(BAD_GGA) is False
+    assert reader.parse_gps_data(BAD_RMC) is True
+    assert reader.latitude is None and reader.speed == 0.02
+    assert reader.parse_gps_data(EPOCH_2[0]) is True
+    assert reader.latitude == pytest.approx(53.361338)
+    assert reader.get_fix().sentences == 2
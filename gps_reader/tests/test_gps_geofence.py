@@ -0,0 +1,59 @@
+import random
+import pytest
+from gps_epoch import Fix
+from gps_geofence import CircleFence, GeofenceEngine, PolygonFence
+
+
+def kinds(events):
+    return [(event.kind, event.fence.fence_id) for event in events]
+
+
+def test_circle_across_the_meridian():
+    fence = CircleFence('x', 0, 179.999, 1000)
+    assert fence.contains(0, -179.9995)
+    assert fence.contains(0, 179.995)
+    assert not fence.contains(0, -179.98)
+
+
+@pytest.mark.parametrize("longitude", [179.999, -179.999])
+def test_enter_and_exit_across_the_meridian(longitude):
+    engine = GeofenceEngine()
+    engine.add(CircleFence('date line', 0, longitude, 1000))
+    track = [179.97, 179.995, 180.0, -179.9995, -179.995, -179.97]
+    events = [kinds(engine.check_position('ship', 0.0, lon, utc_ns=i)) for i, lon in enumerate(track)]
+    # Inside from 179.995 east across the meridian to -179.995, whichever side the centre is on
+    assert events == [[], [('enter', 'date line')], [], [], [], [('exit', 'date line')]]
+    assert engine.inside('ship') == []
+
+
+def test_dwell_and_fix_without_position():
+    engine = GeofenceEngine(dwell=10)
+    engine.add(CircleFence('yard', 12.9716, 77.5946, 200))
+    assert kinds(engine.check_position('unit17', 12.9716, 77.5946, utc_ns=0)) == [('enter', 'yard')]
+    assert kinds(engine.check_position('unit17', 12.9717, 77.5946, utc_ns=5_000_000_000)) == []
+    assert kinds(engine.check_position('unit17', 12.9717, 77.5947, utc_ns=10_000_000_000)) == [('dwell', 'yard')]
+    assert engine.check('unit17', Fix()) == []
+    assert [fence.fence_id for fence in engine.inside('unit17')] == ['yard']
+
+
+def test_polygon_with_hole():
+    engine = GeofenceEngine()
+    engine.add(PolygonFence('ring', [(0, 0), (0, 1), (1, 1), (1, 0)], holes=[[(0.4, 0.4), (0.4, 0.6), (0.6, 0.6), (0.6, 0.4)]]))
+    assert kinds(engine.check_position('a', 0.2, 0.2)) == [('enter', 'ring')]
+    assert kinds(engine.check_position('a', 0.5, 0.5)) == [('exit', 'ring')]
+
+
+def test_grid_matches_brute_force():
+    rng = random.Random(0)
+    engine = GeofenceEngine()
+    fences = [CircleFence(i, rng.uniform(-60, 60), rng.uniform(-180, 180), rng.uniform(100, 200000))
+              for i in range(300)]
+    for fence in fences:
+        engine.add(fence)
+    for _ in range(2000):
+        fence = rng.choice(fences)
+        latitude = fence.latitude + rng.uniform(-2, 2)
+        longitude = (fence.longitude + rng.uniform(-2, 2) + 180) % 360 - 180
+        expected = {f.fence_id for f in fences if f.contains(latitude, longitude)}
+        found = {f.fence_id for f in engine.candidates(latitude, longitude) if f.contains(latitude, longitude)}
+        assert found == expected
@@ -0,0 +1,83 @@
+import json
+from functools import reduce
+import pytest
+import nmea_fast
+from gps_server import ClientProtocol, GPSServer, Subscription
+
+
+def sentence(body):
+    checksum = reduce(lambda value, char: value ^ ord(char), body, 0)
+    return f"${body}*{checksum:02X}\r\n".encode('ascii')
+
+
+class Transport:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+def client(server):
+    protocol = ClientProtocol(server)
+    protocol.connection_made(Transport())
+    return protocol
+
+
+@pytest.mark.parametrize("types, expected", [("RMC", {"RMC"}), (["RMC", "GGA"], {"RMC", "GGA"}), (None, None)])
+def test_subscription_types(types, expected):
+    subscription = Subscription.from_request(json.dumps({"types": types}))
+    assert subscription.types == (None if expected is None else frozenset(expected))
+
+
+@pytest.mark.parametrize("request_line", [b'{"types": 5}', b'{"types": {"RMC": 1}}', b'{"types": ["RMC", 1]}',
+                                          b'["RMC"]', b'not json'])
+def test_bad_subscription_gets_an_error_reply(request_line):
+    protocol = client(GPSServer())
+    protocol.data_received(request_line + b'\n')
+    [reply] = protocol.transport.written
+    assert json.loads(reply)["error"].startswith("bad subscription")
+    assert protocol.subscription.types is None and protocol.subscription.raw  # unchanged
+
+
+def test_multicast_sends_only_fixes_by_default():
+    subscription = GPSServer().multicast_subscription
+    assert not subscription.wants("RMC", 0.0)
+    assert subscription.wants("fix", 0.0)
+
+
+def test_bad_sentences_are_counted_and_the_chunk_goes_on():
+    server = GPSServer()
+    protocol = client(server)
+    protocol.data_received(b'{"types": "GGA", "fixes": true}\n')
+    good = sentence("GPGGA,092750.000,5321.6802,N,00630.3372,W,1,8,1.03,61.7,M,55.2,M,,")
+    chunk = (b"$GPGGA,092750.000,53216802,N,00630.3372,W,1,08,1.03,61.7,M,55.2,M,,*68\r\n"
+             + b"$GPGGA,092750.000,5321.6802,N*00\r\n"
+             + good
+             + sentence("GPGGA,092751.000,5321.6803,N,00630.3373,W,1,8,1.03,61.8,M,55.2,M,,"))
+    server._handle(chunk)
+    assert server.parse_errors == 1  # the checksum error; the malformed coordinate has no position
+    assert server.sentences == 3
+    assert server.fixes == 1
+    written = protocol.transport.written
+    assert written[1] == good
+    fixes = [json.loads(line) for line in written if line.startswith(b'{')]
+    assert fixes[0]["latitude"] == pytest.approx(53.361337)
+
+
+def test_value_error_drops_only_that_sentence():
+    def decode(frame):
+        if b'GSA' in frame:
+            raise ValueError("field does not convert")
+        return nmea_fast.parse(frame)
+
+    server = GPSServer(decode=decode)
+    server._handle(sentence("GPGSA,A,3,01,02,,,,,,,,,,,2.5,1.3,2.1") + sentence("GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A"))
+    assert server.parse_errors == 1
+    assert server.sentences == 1
@@ -0,0 +1,49 @@
+import io
+import time
+import nmea_fast
+from gps_epoch import Fix
+from gps_sinks import ConsoleSink, LatestFixConsoleSink
+
+
+def make_fix(latitude):
+    fix = Fix()
+    fix.status = 'A'
+    fix.latitude = latitude
+    fix.longitude = 77.5946
+    return fix
+
+
+def test_latest_fix_is_drawn_when_the_link_goes_idle():
+    stream = io.StringIO()
+    sink = LatestFixConsoleSink(target=stream, interval=0.05)
+    sink.write_fix(make_fix(12.1))
+    sink.write_fix(make_fix(12.2))  # within the interval: only kept
+    assert "12.1" in stream.getvalue() and "12.2" not in stream.getvalue()
+    sink.flush_due()
+    assert "12.2" not in stream.getvalue()
+    time.sleep(0.06)
+    sink.flush_due()
+    assert stream.getvalue().endswith("lat 12.2  lon 77.5946  alt None  None kn  sats None  hdop None   ")
+    # Nothing new: no redraw
+    drawn = stream.getvalue()
+    time.sleep(0.06)
+    sink.flush_due()
+    assert stream.getvalue() == drawn
+
+
+def test_latest_fix_is_drawn_on_close():
+    stream = io.StringIO()
+    sink = LatestFixConsoleSink(target=stream, interval=60)
+    sink.write_fix(make_fix(12.1))
+    sink.write_fix(make_fix(12.3))
+    sink.close()
+    assert "lat 12.3" in stream.getvalue() and stream.getvalue().endswith("\n")
+
+
+def test_console_prints_malformed_coordinates_as_received():
+    stream = io.StringIO()
+    sink = ConsoleSink(target=stream)
+    sink.write(nmea_fast.parse("$GPGLL,53216802,N,00630.3372,W,092750.000,A,A*65"))
+    sink.flush()
+    assert "Latitude: 53216802 N" in stream.getvalue()
+    assert "Longitude: 00630.3372 W" in stream.getvalue()
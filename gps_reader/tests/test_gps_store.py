@@ -0,0 +1,76 @@
+import os
+import numpy as np
+from gps_epoch import Fix
+from gps_store import RECORD_SIZE, StoreSink, TrackStore
+
+HOUR_NS = 3600 * 1_000_000_000
+START_NS = 1704103200 * 1_000_000_000  # 2024-01-01 10:00 UTC
+
+
+def fix_at(utc_ns):
+    fix = Fix()
+    fix.utc_ns = utc_ns
+    fix.latitude = 12.9716 + (utc_ns - START_NS) * 1e-15
+    fix.longitude = 77.5946
+    fix.status = 'A'
+    fix.num_sats = 9
+    return fix
+
+
+def fill(store, count, step_ns=100_000_000):
+    for i in range(count):
+        assert store.append("unit17", fix_at(START_NS + i * step_ns))
+
+
+def test_query_across_segments(tmp_path):
+    store = TrackStore(str(tmp_path), index_stride=16)
+    fill(store, 500, step_ns=HOUR_NS // 200)  # 2.5 hours
+    assert len(store.segments("unit17")) == 3
+    result = store.query("unit17", START_NS + HOUR_NS // 2, START_NS + 2 * HOUR_NS)
+    assert len(result) == 300
+    assert result['utc_ns'][0] == START_NS + HOUR_NS // 2
+    assert np.all(np.diff(result['utc_ns']) > 0)
+    store.close()
+
+
+def test_recovers_from_a_torn_record_and_a_truncated_index(tmp_path):
+    store = TrackStore(str(tmp_path), index_stride=16)
+    fill(store, 100)
+    store.close()
+    [(_, path)] = store.segments("unit17")
+    index_path = path[:-4] + ".idx"
+    # A crash in the middle of a write: half a record and a partial index entry
+    with open(path, 'ab') as segment:
+        segment.write(b'\x01' * (RECORD_SIZE // 2))
+    with open(index_path, 'r+b') as index:
+        index.truncate(3 * 8 + 5)
+
+    reopened = TrackStore(str(tmp_path), index_stride=16)
+    assert len(reopened.query("unit17", START_NS, START_NS + HOUR_NS)) == 100
+    # The next append drops the torn record and rebuilds the index from the records
+    assert not reopened.append("unit17", fix_at(START_NS))  # not after the last stored time
+    assert reopened.append("unit17", fix_at(START_NS + 100 * 100_000_000))
+    reopened.sync()
+    assert os.path.getsize(path) == 101 * RECORD_SIZE
+    assert os.path.getsize(index_path) == 7 * 8
+    result = reopened.query("unit17", START_NS + 50 * 100_000_000, START_NS + HOUR_NS)
+    assert len(result) == 51 and result['utc_ns'][-1] == START_NS + 100 * 100_000_000
+    reopened.close()
+
+
+def test_query_without_an_index(tmp_path):
+    store = TrackStore(str(tmp_path), index_stride=16)
+    fill(store, 100)
+    store.close()
+    [(_, path)] = store.segments("unit17")
+    os.remove(path[:-4] + ".idx")
+    assert len(TrackStore(str(tmp_path)).query("unit17", START_NS + 10 * 100_000_000, START_NS + HOUR_NS)) == 90
+
+
+def test_sink_close_closes_the_store(tmp_path):
+    store = TrackStore(str(tmp_path))
+    sink = StoreSink(store, "unit17")
+    sink.write_fix(fix_at(START_NS))
+    sink.close()
+    assert store._segments == {}
+    assert len(store.query("unit17", START_NS, START_NS + 1)) == 1
@@ -0,0 +1,77 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from gps_time import GPSClock, NS_PER_SECOND, ZoneTable
+
+UTC = timezone.utc
+
+
+def ns(*args):
+    return int(datetime(*args, tzinfo=UTC).timestamp()) * NS_PER_SECOND
+
+
+class Sentence:
+    def __init__(self, timestamp, datestamp=None):
+        self.timestamp = timestamp
+        self.datestamp = datestamp
+
+
+def test_date_and_time():
+    clock = GPSClock("UTC")
+    assert clock.update(Sentence(time(12, 35, 19, 500000, UTC), date(2024, 3, 1))) == ns(2024, 3, 1, 12, 35, 19) + 500_000_000
+
+
+def test_midnight_rollover_without_a_date():
+    clock = GPSClock("UTC")
+    clock.update(Sentence(time(23, 59, 59, tzinfo=UTC), date(2023, 12, 31)))
+    # GGA carries no date: the day advances when the time of day wraps
+    assert clock.update(Sentence(time(0, 0, 0, tzinfo=UTC))) == ns(2024, 1, 1)
+    assert clock.update(Sentence(time(0, 0, 1, tzinfo=UTC))) == ns(2024, 1, 1, 0, 0, 1)
+    # The next RMC confirms the date without moving the time
+    assert clock.update(Sentence(time(0, 0, 2, tzinfo=UTC), date(2024, 1, 1))) == ns(2024, 1, 1, 0, 0, 2)
+
+
+def test_rmc_date_change_at_midnight():
+    clock = GPSClock("UTC")
+    clock.update(Sentence(time(23, 59, 59, tzinfo=UTC), date(2024, 2, 28)))
+    assert clock.update(Sentence(time(0, 0, 0, tzinfo=UTC), date(2024, 2, 29))) == ns(2024, 2, 29)
+
+
+def test_unconverted_fields_count_as_missing():
+    clock = GPSClock("UTC")
+    assert clock.update(Sentence("12x519", "320394")) is None
+    assert clock.day_ns is None
+
+
+@pytest.mark.parametrize("zone", ["Europe/Berlin", "America/New_York", "Australia/Lord_Howe", "Asia/Kolkata"])
+def test_offsets_around_dst_transitions(zone):
+    tz = ZoneInfo(zone)
+    table = ZoneTable(tz)
+    clock = GPSClock(zone)
+    for year in (2023, 2024):
+        for month, day in ((3, 10), (3, 31), (4, 7), (10, 1), (10, 27), (11, 3)):
+            start = datetime(year, month, day, tzinfo=UTC) - timedelta(hours=6)
+            for minute in range(0, 24 * 60, 7):
+                instant = start + timedelta(minutes=minute, seconds=13)
+                utc_ns = int(instant.timestamp()) * NS_PER_SECOND
+                expected = instant.astimezone(tz)
+                assert table.offset_ns(utc_ns) == expected.utcoffset() // timedelta(microseconds=1) * 1000
+                assert clock.format_local(utc_ns) == expected.strftime('%H:%M:%S')
+                assert clock.format_local(utc_ns, '%Y-%m-%d %H:%M %z') == expected.strftime('%Y-%m-%d %H:%M %z')
+
+
+def test_berlin_spring_forward():
+    clock = GPSClock("Europe/Berlin")
+    # 2024-03-31 01:00 UTC: 02:00 CET becomes 03:00 CEST
+    assert clock.format_local(ns(2024, 3, 31, 0, 59, 59)) == "01:59:59"
+    assert clock.format_local(ns(2024, 3, 31, 1, 0, 0)) == "03:00:00"
+    assert clock.local_datetime(ns(2024, 3, 31, 1)).utcoffset() == timedelta(hours=2)
+
+
+def test_zone_table_years_out_of_order():
+    tz = ZoneInfo("America/New_York")
+    table = ZoneTable(tz)
+    for year in (2030, 1995, 2012, 1971, 2037):
+        instant = datetime(year, 7, 1, 12, tzinfo=UTC)
+        assert table.offset_ns(int(instant.timestamp()) * NS_PER_SECOND) == \
+            instant.astimezone(tz).utcoffset() // timedelta(microseconds=1) * 1000
@@ -0,0 +1,83 @@
+import pynmea2
+import pytest
+import nmea_fast
+
+
+def sentence(body, checksum=None):
+    if checksum is None:
+        checksum = f"{nmea_fast.nmea_checksum(body.encode('ascii')):02X}"
+    return f"${body}*{checksum}"
+
+
+# Well-formed, empty, short and malformed fields of every fast-decoded type
+SENTENCES = [sentence(body) for body in (
+    "GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W",
+    "GNRMC,235959.999,A,0000.0001,S,17959.9999,W,0.00,359.99,311299,3.1,W,A",
+    "GPRMC,,V,,,,,,,,,,N",
+    "GPRMC,123519,A,4807.038,N,01131.000,E",
+    "GPRMC,123519,A,48O7.038,N,01131.000,E,x,084.4,230394,003.1,W",
+    "GPRMC,12x519,A,4807.038,N,01131.000,E,022.4,084.4,320394,003.1,W",
+    "GPRMC,256099,A,4807.038,N,01131.000,E,022.4,084.4,23039a,003.1,W",
+    "GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,",
+    "GPGGA,,,,,,0,00,99.99,,,,,,",
+    "GPGGA,092750.000,53216802,N,00630.3372,W,1,08,1.03,61.7,M,55.2,M,,",
+    "GPGGA,092750.000,-321.6802,S,00630.3372,E,1,08,1.03,-61.7,M,55.2,M,1.5,0001",
+    "GPGGA,123519,4807.038,N,01131.000,E,q,08,0.9,alt,M,46.9,M,,",
+    "GLGLL,3723.2475,N,12158.3416,W,161229.487,A,A",
+    "GPGLL,,,,,,V,N",
+    "GNGSA,A,3,01,02,03,,,,,,,,,,2.5,1.3,2.1,1",
+    "GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A",
+    "GPVTG,,T,,M,0.0,N,0.0,K,N",
+    "GPVTG,x,T,y,M,z,N,1e,K,A",
+    "GLGSV,3,3,09,65,12,034,",
+    "GPGSV,1,1,00",
+)] + [
+    sentence("GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,").lower()[:-2] + "47",
+    sentence("GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A", "4f"),
+    "$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*00",
+    "$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W",
+    "$GPGGA,1*23519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47",
+    "$GPZDA,201530.00,04,07,2002,00,00*60",
+]
+
+
+def outcome(call):
+    try:
+        value = call()
+    except Exception as e:
+        return 'raises', type(e).__name__
+    return type(value).__name__, value
+
+
+@pytest.mark.parametrize("line", SENTENCES)
+def test_matches_pynmea2(line):
+    fast = outcome(lambda: nmea_fast.parse(line.encode('ascii')))
+    slow = outcome(lambda: pynmea2.parse(line))
+    if 'raises' in (fast[0], slow[0]):
+        assert fast == slow
+        return
+    fast_msg, slow_msg = fast[1], slow[1]
+    for name in ('sentence_type', 'talker') + getattr(type(fast_msg), 'attributes', ()):
+        assert outcome(lambda: getattr(fast_msg, name)) == outcome(lambda: getattr(slow_msg, name)), name
+
+
+def test_str_and_bytes_decode_alike():
+    line = SENTENCES[0]
+    assert nmea_fast.parse(line).latitude == nmea_fast.parse(line.encode('ascii')).latitude
+
+
+def test_checksum():
+    for body in (b"", b"GPGSV,1,1,00", b"x" * 200):
+        expected = 0
+        for byte in body:
+            expected ^= byte
+        assert nmea_fast.nmea_checksum(body) == expected
+    assert nmea_fast.checksum_ok(SENTENCES[0].encode('ascii'))
+    assert not nmea_fast.checksum_ok(SENTENCES[0].encode('ascii')[:-1] + b"0")
+
+
+def test_fields_are_converted_on_first_read():
+    msg = nmea_fast.parse(SENTENCES[0].encode('ascii'))
+    assert 'latitude' not in msg.__dict__
+    assert msg.latitude == pytest.approx(48.1173)
+    assert msg.__dict__['latitude'] == msg.latitude
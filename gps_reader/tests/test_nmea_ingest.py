@@ -0,0 +1,31 @@
+import os
+from nmea_ingest import find_logs, plan_tasks, shard_name
+
+
+def make_logs(root):
+    for name in ("unit17_day1.nmea", "unit17_day2.nmea.gz", "notes.txt", "build.log", "photos.tar.gz",
+                 os.path.join("unit18", "2024-01-01.log")):
+        path = root / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"$GPRMC,,V,,,,,,,,,,N*53\r\n")
+
+
+def test_only_nmea_logs_by_default(tmp_path):
+    make_logs(tmp_path)
+    found = sorted(os.path.relpath(path, tmp_path) for path in find_logs(str(tmp_path)))
+    assert found == ["unit17_day1.nmea", "unit17_day2.nmea.gz"]
+
+
+def test_other_extensions_are_opt_in(tmp_path):
+    make_logs(tmp_path)
+    extensions = ('.nmea', '.nmea.gz', '.log')
+    paths = find_logs(str(tmp_path), extensions)
+    assert len(paths) == 4
+    shards = sorted(task[5] for task in plan_tasks(paths, root=str(tmp_path), extensions=extensions))
+    assert shards == [os.path.join("build", "build.0000"), os.path.join("unit17", "unit17_day1.0000"), os.path.join("unit17", "unit17_day2.0000"),
+                      os.path.join("unit18", "unit18__2024-01-01.0000")]
+
+
+def test_shard_name_strips_the_longest_extension(tmp_path):
+    assert shard_name(str(tmp_path / "a" / "unit17.nmea.gz"), str(tmp_path)) == "a__unit17"
+    assert shard_name(str(tmp_path / "unit17.txt.gz"), str(tmp_path), ('.txt', '.txt.gz', '.gz')) == "unit17"
@@ -0,0 +1,78 @@
+import os
+import sys
+import pytest
+from nmea_stream import NMEAFramer, read_frames
+
+RMC = b"$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A"
+GGA = b"$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47"
+
+
+def test_frames_split_across_chunks():
+    framer = NMEAFramer()
+    data = RMC + b"\r\n" + GGA + b"\r\n"
+    frames = []
+    for i in range(0, len(data), 7):
+        frames += framer.feed(data[i:i + 7])
+    assert frames == [RMC, GGA]
+    assert not framer.buffer
+
+
+def test_partial_frame_is_kept_until_complete():
+    framer = NMEAFramer()
+    assert framer.feed(RMC[:30]) == []
+    assert framer.feed(RMC[30:] + b"\r\n" + GGA[:10]) == [RMC]
+    assert bytes(framer.buffer) == GGA[:10]
+
+
+def test_last_dollar_wins_after_line_noise():
+    framer = NMEAFramer()
+    assert framer.feed(b"$GPRMC,1235" + GGA + b"\r\n") == [GGA]
+
+
+def test_lines_without_dollar_are_dropped():
+    framer = NMEAFramer()
+    assert framer.feed(b"garbage\r\n" + RMC + b"\n") == [RMC]
+
+
+def test_overflow_clears_garbage():
+    framer = NMEAFramer(max_frame_length=64)
+    assert framer.feed(b"\x00\xff" * 100) == []
+    assert not framer.buffer
+    assert framer.feed(RMC + b"\r\n") == [RMC]
+
+
+def test_overflow_keeps_a_sentence_start():
+    framer = NMEAFramer(max_frame_length=100)
+    framer.feed(b"x" * 90 + GGA[:20])
+    assert bytes(framer.buffer) == GGA[:20]
+    assert framer.feed(GGA[20:] + b"\r\n") == [GGA]
+
+
+def test_overflow_drops_a_long_sentence_start():
+    # A buffer that starts with '$' but is already too long cannot be a sentence
+    framer = NMEAFramer(max_frame_length=64)
+    framer.feed(b"$" + b"x" * 100)
+    assert not framer.buffer
+
+
+@pytest.mark.skipif(not sys.platform.startswith(("linux", "darwin")), reason="needs a pseudo-terminal")
+def test_read_frames_reads_a_burst_in_one_call():
+    import pty
+    import tty
+    import serial
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    port = serial.Serial(os.ttyname(slave), 9600, timeout=0.2)
+    reads = []
+    read = port.read
+    port.read = lambda size: reads.append(read(size)) or reads[-1]
+    try:
+        os.write(master, (RMC + b"\r\n" + GGA + b"\r\n") * 5)
+        frames = list(read_frames(port, idle=lambda: True))
+        assert frames == [RMC, GGA] * 5
+        assert len([data for data in reads if data]) == 1
+    finally:
+        port.close()
+        os.close(master)
+        os.close(slave)
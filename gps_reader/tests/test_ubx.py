@@ -0,0 +1,94 @@
+import struct
+import pytest
+from ubx import NAV_PVT, NAV_SAT, UBXAssembler, UBXDecoder, pvt_to_fix, ubx_checksum, ubx_frame
+
+
+def fletcher(data):
+    ck_a = ck_b = 0
+    for byte in data:
+        ck_a = (ck_a + byte) & 0xFF
+        ck_b = (ck_b + ck_a) & 0xFF
+    return ck_a, ck_b
+
+
+def nav_pvt_payload():
+    # Field offsets from the u-blox interface description (UBX-NAV-PVT, 92 bytes)
+    payload = bytearray(92)
+    struct.pack_into('<I', payload, 0, 123456000)  # iTOW
+    struct.pack_into('<HBBBBB', payload, 4, 2024, 2, 29, 23, 59, 58)  # year..sec
+    payload[11] = 0x07  # valid: date, time, fully resolved
+    struct.pack_into('<i', payload, 16, 250_000_000)  # nano
+    payload[20] = 3  # fixType 3D
+    payload[21] = 0x01 | 0x02  # gnssFixOK, diffSoln
+    payload[23] = 14  # numSV
+    struct.pack_into('<ii', payload, 24, 775946000, 129716000)  # lon, lat
+    struct.pack_into('<ii', payload, 32, 950000, 920500)  # height, hMSL (mm)
+    struct.pack_into('<i', payload, 60, 5144)  # gSpeed (mm/s)
+    struct.pack_into('<i', payload, 64, 4512345)  # headMot (deg * 1e-5)
+    struct.pack_into('<H', payload, 76, 132)  # pDOP * 0.01
+    return bytes(payload)
+
+
+def nav_sat_payload(satellites):
+    payload = bytearray(struct.pack('<IBB2x', 123456000, 1, len(satellites)))
+    for gnss_id, sv_id, cno, elevation, azimuth, flags in satellites:
+        record = bytearray(12)
+        record[0], record[1], record[2] = gnss_id, sv_id, cno
+        struct.pack_into('<bh', record, 3, elevation, azimuth)
+        struct.pack_into('<I', record, 8, flags)
+        payload += record
+    return bytes(payload)
+
+
+@pytest.mark.parametrize("data", [b'', b'\x06\x00\x00\x00', bytes(range(256)), bytes(range(256)) * 9,
+                                  nav_pvt_payload()])
+def test_checksum_matches_the_fletcher_loop(data):
+    assert ubx_checksum(data) == fletcher(data)
+
+
+def test_frame_layout():
+    # UBX-MON-VER poll, as printed in the u-blox documentation
+    assert ubx_frame(0x0A, 0x04) == bytes.fromhex('b5620a0400000e34')
+    assert ubx_frame(0x06, 0x00) == bytes.fromhex('b562060000000618')
+
+
+def test_nav_pvt_payload():
+    decoder = UBXDecoder()
+    [pvt] = decoder.feed(ubx_frame(*NAV_PVT, nav_pvt_payload()))
+    assert (pvt.year, pvt.month, pvt.day, pvt.hour, pvt.minute, pvt.second) == (2024, 2, 29, 23, 59, 58)
+    assert pvt.nano == 250_000_000 and pvt.num_sv == 14 and pvt.p_dop == 132
+    fix = pvt_to_fix(pvt)
+    assert fix.utc_ns == 1709251198_250_000_000
+    assert str(fix.date) == "2024-02-29"
+    assert fix.latitude == pytest.approx(12.9716) and fix.longitude == pytest.approx(77.5946)
+    assert fix.altitude == 920.5
+    assert fix.speed == pytest.approx(10.0, abs=0.01)
+    assert fix.course == pytest.approx(45.12345)
+    assert fix.quality == 2 and fix.fix_type == 3 and fix.status == 'A'
+    assert fix.pdop == pytest.approx(1.32)
+
+
+def test_nav_sat_payload():
+    satellites = [(0, 5, 42, 67, 279, 0x08), (6, 3, 30, -2, 359, 0x00), (2, 11, 0, 12, 34, 0x08)]
+    [sat] = UBXDecoder().feed(ubx_frame(*NAV_SAT, nav_sat_payload(satellites)))
+    assert sat.version == 1
+    assert [s[:5] for s in sat.satellites] == [(g, s, c, e, a) for g, s, c, e, a, _ in satellites]
+    assert sat.used == 2
+    assembler = UBXAssembler()
+    assert assembler.add(sat) is None
+    assert assembler.satellites_in_view == 3
+
+
+def test_decoder_splits_chunks_and_skips_noise():
+    pvt = ubx_frame(*NAV_PVT, nav_pvt_payload())
+    bad = bytearray(ubx_frame(*NAV_SAT, nav_sat_payload([(0, 5, 42, 67, 279, 0x08)])))
+    bad[-1] ^= 0xFF
+    stream = b'$GPGGA,noise\r\n' + pvt + bytes(bad) + ubx_frame(0x0A, 0x04) + pvt + b'\xb5'
+    decoder = UBXDecoder()
+    messages = []
+    for i in range(0, len(stream), 7):
+        messages += decoder.feed(stream[i:i + 7])
+    assert [msg.message_type for msg in messages] == ['NAV-PVT', 'NAV-PVT']
+    assert decoder.checksum_errors == 1
+    assert decoder.frames == 3  # the undecoded MON-VER frame is counted too
+    assert decoder.buffer == b'\xb5'  # may be the start of the next frame
@@ -0,0 +1,308 @@
+import struct
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+from gps_epoch import Fix
+from gps_time import EPOCH_ORDINAL, NS_PER_DAY, NS_PER_SECOND
+from nmea_stream import burst_reads
+
+SYNC = b'\xb5\x62'  # Every UBX frame starts with these two bytes
+MAX_PAYLOAD = 4096  # Longer length fields are treated as line noise
+READ_CHUNK_SIZE = 4096
+MM_PER_S_TO_KNOTS = 1 / 514.444
+
+NAV_PVT = (0x01, 0x07)
+NAV_TIMEUTC = (0x01, 0x21)
+NAV_SAT = (0x01, 0x35)
+
+_HEADER = struct.Struct('<BBH')  # class, id, payload length
+_NAV_PVT = struct.Struct('<IHBBBBBBIiBBBBiiiiIIiiiiiIIH')  # first 78 of the 92 payload bytes
+_NAV_TIMEUTC = struct.Struct('<IIiHBBBBBB')
+_NAV_SAT_HEADER = struct.Struct('<IBB2x')
+_NAV_SAT_SV = struct.Struct('<BBBbhhI')
+
+
+def ubx_checksum(data):
+    """
+    8-bit Fletcher checksum (CK_A, CK_B) of data: the class, id, length and payload bytes.
+    CK_B is the sum of the running CK_A values, so both are computed without a Python-level loop.
+    """
+    return sum(data) & 0xFF, sum(accumulate(data)) & 0xFF
+
+
+def ubx_frame(msg_class, msg_id, payload=b''):
+    """
+    Build a complete UBX frame (sync, header, payload, checksum), e.g. for configuration messages.
+    """
+    body = _HEADER.pack(msg_class, msg_id, len(payload)) + bytes(payload)
+    return SYNC + body + bytes(ubx_checksum(body))
+
+
+class NavPVT:
+    message_type = 'NAV-PVT'
+    __slots__ = ('itow', 'year', 'month', 'day', 'hour', 'minute', 'second', 'valid', 't_acc', 'nano',
+                 'fix_type', 'flags', 'flags2', 'num_sv', 'lon', 'lat', 'height', 'h_msl', 'h_acc', 'v_acc',
+                 'vel_n', 'vel_e', 'vel_d', 'g_speed', 'head_mot', 's_acc', 'head_acc', 'p_dop')
+
+    def __init__(self, values):
+        """
+        Navigation position velocity time solution, in the receiver's integer units
+        (degrees * 1e-7, millimetres, mm/s, degrees * 1e-5, pDOP * 0.01).
+        """
+        (self.itow, self.year, self.month, self.day, self.hour, self.minute, self.second, self.valid,
+         self.t_acc, self.nano, self.fix_type, self.flags, self.flags2, self.num_sv, self.lon, self.lat,
+         self.height, self.h_msl, self.h_acc, self.v_acc, self.vel_n, self.vel_e, self.vel_d, self.g_speed,
+         self.head_mot, self.s_acc, self.head_acc, self.p_dop) = values
+
+    @property
+    def latitude(self):
+        return self.lat * 1e-7
+
+    @property
+    def longitude(self):
+        return self.lon * 1e-7
+
+    @property
+    def gnss_fix_ok(self):
+        return bool(self.flags & 0x01)
+
+    @property
+    def time_valid(self):
+        # validDate and validTime
+        return self.valid & 0x03 == 0x03
+
+    def utc_ns(self):
+        """
+        Epoch nanoseconds of the solution, or None when the receiver has no valid date and time.
+        """
+        if not self.time_valid:
+            return None
+        days = date(self.year, self.month, self.day).toordinal() - EPOCH_ORDINAL
+        seconds = (self.hour * 60 + self.minute) * 60 + self.second
+        return days * NS_PER_DAY + seconds * NS_PER_SECOND + self.nano
+
+
+class NavTimeUTC:
+    message_type = 'NAV-TIMEUTC'
+    __slots__ = ('itow', 't_acc', 'nano', 'year', 'month', 'day', 'hour', 'minute', 'second', 'valid')
+
+    def __init__(self, values):
+        (self.itow, self.t_acc, self.nano, self.year, self.month, self.day, self.hour, self.minute,
+         self.second, self.valid) = values
+
+    def utc_ns(self):
+        if self.valid & 0x04 == 0:  # validUTC
+            return None
+        days = date(self.year, self.month, self.day).toordinal() - EPOCH_ORDINAL
+        seconds = (self.hour * 60 + self.minute) * 60 + self.second
+        return days * NS_PER_DAY + seconds * NS_PER_SECOND + self.nano
+
+
+class NavSat:
+    message_type = 'NAV-SAT'
+    __slots__ = ('itow', 'version', 'satellites')
+
+    def __init__(self, itow, version, satellites):
+        """
+        Satellite information: satellites is a list of (gnss_id, sv_id, cno, elevation, azimuth,
+        pr_res, flags) tuples; cno in dB-Hz, elevation and azimuth in degrees.
+        """
+        self.itow = itow
+        self.version = version
+        self.satellites = satellites
+
+    @property
+    def used(self):
+        # flags bit 3: svUsed
+        return sum(1 for sat in self.satellites if sat[6] & 0x08)
+
+
+def _nav_pvt(view):
+    if len(view) < 92:
+        return None
+    return NavPVT(_NAV_PVT.unpack_from(view))
+
+
+def _nav_timeutc(view):
+    if len(view) < _NAV_TIMEUTC.size:
+        return None
+    return NavTimeUTC(_NAV_TIMEUTC.unpack_from(view))
+
+
+def _nav_sat(view):
+    if len(view) < _NAV_SAT_HEADER.size:
+        return None
+    itow, version, count = _NAV_SAT_HEADER.unpack_from(view)
+    end = 8 + count * _NAV_SAT_SV.size
+    if len(view) < end:
+        return None
+    with view[8:end] as records:
+        return NavSat(itow, version, list(_NAV_SAT_SV.iter_unpack(records)))
+
+
+DECODERS = {NAV_PVT: _nav_pvt, NAV_TIMEUTC: _nav_timeutc, NAV_SAT: _nav_sat}
+
+
+class UBXDecoder:
+    def __init__(self, decoders=DECODERS):
+        """
+        Split a raw byte stream into UBX frames and decode the known messages.
+        Bytes before a sync pair (NMEA text, line noise) are skipped; frames are unpacked straight
+        from the receive buffer through a memoryview, and a partial frame waits for the next chunk.
+        """
+        self.buffer = bytearray()
+        self.decoders = decoders
+        self.frames = 0
+        self.checksum_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """
+        Add a chunk of bytes and return the list of decoded messages completed by it.
+        Frames with a valid checksum but no decoder are counted and dropped.
+        """
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        start = 0
+        size = len(buffer)
+        with memoryview(buffer) as view:
+            while True:
+                sync = buffer.find(SYNC, start)
+                if sync < 0:
+                    # Keep a trailing 0xB5, it may be the first half of the next sync
+                    keep = 1 if size and buffer[-1] == 0xB5 else 0
+                    self.skipped_bytes += size - keep - start
+                    start = size - keep
+                    break
+                self.skipped_bytes += sync - start
+                start = sync
+                if size - start < 6:
+                    break
+                msg_class, msg_id, length = _HEADER.unpack_from(view, start + 2)
+                if length > MAX_PAYLOAD:
+                    start += 2  # not a real frame, look for the next sync
+                    continue
+                end = start + 8 + length
+                if end > size:
+                    break
+                body = view[start + 2:end - 2]
+                if ubx_checksum(body) != (buffer[end - 2], buffer[end - 1]):
+                    self.checksum_errors += 1
+                    body.release()
+                    start += 2
+                    continue
+                self.frames += 1
+                decode = self.decoders.get((msg_class, msg_id))
+                if decode is not None:
+                    # The buffer cannot be trimmed while a view into it is alive, so release them all
+                    with body[4:] as payload:
+                        msg = decode(payload)
+                    if msg is not None:
+                        messages.append(msg)
+                body.release()
+                start = end
+        if start:
+            del buffer[:start]
+        return messages
+
+    def reset(self):
+        self.buffer.clear()
+
+
+def read_ubx(gps_serial, chunk_size=READ_CHUNK_SIZE):
+    """
+    Read UBX data from an open serial port (or nmea_replay.ReplaySource) and yield decoded messages.
+    Like nmea_stream.read_frames, each read blocks until a burst has arrived (see burst_reads).
+    """
+    decoder = UBXDecoder()
+    burst_reads(gps_serial)
+    while gps_serial.is_open:
+        data = gps_serial.read(chunk_size)
+        if data:
+            yield from decoder.feed(data)
+
+
+class UBXAssembler:
+    def __init__(self, on_fix=None):
+        """
+        Turn UBX navigation messages into the same gps_epoch.Fix records the NMEA path produces.
+        Every NAV-PVT completes a fix; the latest NAV-SAT supplies satellites in view.
+        """
+        self.on_fix = on_fix
+        self.satellites_in_view = None
+
+    def add(self, msg):
+        """
+        Merge one decoded UBX message. Returns a Fix for NAV-PVT, otherwise None.
+        """
+        if msg.message_type == 'NAV-SAT':
+            self.satellites_in_view = len(msg.satellites)
+            return None
+        if msg.message_type != 'NAV-PVT':
+            return None
+        fix = pvt_to_fix(msg)
+        fix.satellites_in_view = self.satellites_in_view
+        if self.on_fix is not None:
+            self.on_fix(fix)
+        return fix
+
+
+def _quality(pvt):
+    # NMEA GGA fix quality from the PVT fix type and flags
+    if not pvt.gnss_fix_ok:
+        return 0
+    if pvt.fix_type == 1:
+        return 6  # dead reckoning
+    carrier = (pvt.flags >> 6) & 0x03
+    if carrier == 2:
+        return 4  # RTK fixed
+    if carrier == 1:
+        return 5  # RTK float
+    return 2 if pvt.flags & 0x02 else 1
+
+
+def pvt_to_fix(pvt):
+    """
+    A gps_epoch.Fix with the fields a GGA+RMC+GSA+VTG epoch would have filled.
+    """
+    fix = Fix()
+    utc_ns = pvt.utc_ns()
+    if utc_ns is not None:
+        fix.utc_ns = utc_ns
+        moment = datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=utc_ns // 1000)
+        fix.timestamp = moment.timetz()
+        fix.date = moment.date()
+    fix.status = 'A' if pvt.gnss_fix_ok else 'V'
+    if pvt.fix_type in (2, 3, 4):
+        fix.latitude = pvt.latitude
+        fix.longitude = pvt.longitude
+        fix.altitude = pvt.h_msl / 1000
+        fix.speed = pvt.g_speed * MM_PER_S_TO_KNOTS
+        fix.course = pvt.head_mot * 1e-5
+    fix.quality = _quality(pvt)
+    fix.num_sats = pvt.num_sv
+    fix.fix_type = 3 if pvt.fix_type in (3, 4) else 2 if pvt.fix_type == 2 else 1
+    fix.pdop = pvt.p_dop * 0.01
+    fix.sentences = 1
+    return fix
+
+
+if __name__ == "__main__":
+    import serial  # install this module using command in the terminal "pip install pyserial"
+
+    # Replace with your GPS module's serial port and baud rate (UBX output enabled on the receiver)
+    SERIAL_PORT = "COM16"
+    BAUD_RATE = 115200
+
+    assembler = UBXAssembler()
+    try:
+        gps_serial = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+        print(f"Listening to UBX data on {SERIAL_PORT} at {BAUD_RATE} baud.")
+        for msg in read_ubx(gps_serial):
+            fix = assembler.add(msg)
+            if fix is not None:
+                print(fix)
+    except serial.SerialException as e:
+        print(f"Serial error: {e}")
+    except KeyboardInterrupt:
+        print("\nExiting...")